@@ -4,7 +4,6 @@ Market Analyzer - Main analysis engine
 Fetches data, calculates indicators, and generates trading signals
 """
 
-import yfinance as yf
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
@@ -12,6 +11,9 @@ import json
 import sys
 import argparse
 import os
+from data_provider import get_provider
+from profiling import make_profiler
+from telemetry import timed
 
 # Import cache if available
 try:
@@ -21,35 +23,77 @@ except ImportError:
     USE_CACHE = False
 
 class MarketAnalyzer:
-    def __init__(self, use_cache=True):
+    # Methods timed individually when profiling is enabled
+    PROFILED_METHODS = {
+        '_calculate_rsi': 'indicator.rsi',
+        '_calculate_macd': 'indicator.macd',
+        '_calculate_bollinger': 'indicator.bollinger',
+        '_calculate_trend': 'indicator.trend',
+        '_calculate_volume_signal': 'indicator.volume',
+        '_calculate_adx_score': 'indicator.adx',
+        '_calculate_williams_r_score': 'indicator.williams_r',
+        '_calculate_obv_score': 'indicator.obv',
+        '_calculate_52w_position_score': 'indicator.52w_position',
+        '_score_volatility_sentiment': 'sentiment.volatility',
+    }
+    
+    def __init__(self, use_cache=True, provider=None, profile=None):
         self.weights = {
             'technical': 0.4,
             'fundamental': 0.4,
             'sentiment': 0.2
         }
-        self.cache = DataCache() if USE_CACHE and use_cache else None
+        self.provider = provider or get_provider()
+        self.cache = DataCache(provider=self.provider) if USE_CACHE and use_cache else None
+        
+        # Opt-in profiling (profile=True or MARKET_PROFILE=1); methods are only wrapped when enabled
+        self.profiler = make_profiler(profile)
+        if self.profiler.enabled:
+            for method, step in self.PROFILED_METHODS.items():
+                setattr(self, method, self.profiler.wrap(step, getattr(self, method)))
+    
+    @timed('analysis')
+    def analyze_stock(self, ticker, as_of=None, hist=None, info=None):
+        """Analyze a stock and return comprehensive data (as_of: analyze with data up to that date only;
+        hist/info: analyze already-loaded data instead of reading the cache)"""
+        with self.profiler.step('analyze_stock'):
+            return self._analyze_stock(ticker, as_of, hist, info)
     
-    def analyze_stock(self, ticker):
-        """Analyze a stock and return comprehensive data"""
+    def _analyze_stock(self, ticker, as_of=None, hist=None, info=None):
+        profiler = self.profiler
         try:
+            if hist is not None:
+                # Caller keeps the frames warm (live monitor daemon)
+                if info is None:
+                    with profiler.step('data_load.info'):
+                        info = self.cache.get_cached_info(ticker) if self.cache else self.provider.info(ticker)
             # Use cache if available
-            if self.cache:
-                end_date = datetime.now()
+            elif self.cache:
+                end_date = as_of or datetime.now()
                 start_date = end_date - timedelta(days=365)
-                hist = self.cache.get_cached_data(ticker, start_date, end_date)
-                info = self.cache.get_cached_info(ticker)
+                with profiler.step('data_load.history'):
+                    hist = self.cache.get_cached_data(ticker, start_date, end_date)
+                with profiler.step('data_load.info'):
+                    info = self.cache.get_cached_info(ticker)
             else:
-                stock = yf.Ticker(ticker)
-                hist = stock.history(period="1y")
-                info = stock.info
+                with profiler.step('data_load.history'):
+                    if as_of:
+                        hist = self.provider.history(ticker, start=as_of - timedelta(days=365), end=as_of + timedelta(days=1))
+                    else:
+                        hist = self.provider.history(ticker, period="1y")
+                with profiler.step('data_load.info'):
+                    info = self.provider.info(ticker)
             
             if hist.empty:
                 return {"error": f"No data for {ticker}"}
             
             # Calculate scores
-            technical_score = self._calculate_technical_score(hist)
-            fundamental_score = self._calculate_fundamental_score(info)
-            sentiment_score = self._calculate_sentiment_score(hist)
+            with profiler.step('technical'):
+                technical_score = self._calculate_technical_score(hist)
+            with profiler.step('fundamentals'):
+                fundamental_score = self._calculate_fundamental_score(info)
+            with profiler.step('sentiment'):
+                sentiment_score = self._calculate_sentiment_score(hist)
             
             # Weighted total score
             total_score = (
@@ -65,7 +109,11 @@ class MarketAnalyzer:
             current_price = hist['Close'].iloc[-1]
             
             # Price targets
-            targets = self._calculate_targets(current_price, total_score)
+            with profiler.step('targets'):
+                targets = self._calculate_targets(current_price, total_score)
+            
+            with profiler.step('indicators'):
+                indicators = self._get_indicators(hist, info)
             
             return {
                 "ticker": ticker,
@@ -79,7 +127,7 @@ class MarketAnalyzer:
                 },
                 "signal": signal,
                 "targets": targets,
-                "indicators": self._get_indicators(hist, info)
+                "indicators": indicators
             }
         except Exception as e:
             return {"error": str(e), "ticker": ticker}
@@ -317,7 +365,8 @@ class MarketAnalyzer:
         minus_dm = -low.diff()
         plus_dm[plus_dm < 0] = 0
         minus_dm[minus_dm < 0] = 0
-        tr = pd.concat([high - low, abs(high - close.shift(1)), abs(low - close.shift(1))], axis=1).max(axis=1)
+        with self.profiler.step('indicator.adx.true_range'):
+            tr = pd.concat([high - low, abs(high - close.shift(1)), abs(low - close.shift(1))], axis=1).max(axis=1)
         atr = tr.rolling(period).mean()
         plus_di = 100 * (plus_dm.rolling(period).mean() / atr)
         minus_di = 100 * (minus_dm.rolling(period).mean() / atr)
@@ -511,10 +560,11 @@ def main():
     parser.add_argument('tickers', nargs='+', help='Stock ticker symbols')
     parser.add_argument('--output', choices=['json', 'text'], default='text', help='Output format')
     parser.add_argument('--interval', default='5m', help='Watch interval (e.g., 5m, 1h)')
+    parser.add_argument('--profile', metavar='FILE', help='Time each analysis sub-step and write the histograms as JSON')
     
     args = parser.parse_args()
     
-    analyzer = MarketAnalyzer()
+    analyzer = MarketAnalyzer(profile=True if args.profile else None)
     
     if args.command == 'analyze':
         results = []
@@ -542,6 +592,10 @@ def main():
         
         if args.output == 'json':
             print(json.dumps(results, indent=2))
+        
+        if args.profile:
+            analyzer.profiler.dump(args.profile)
+            print(f"\n⏱️  Profile written to {args.profile}", file=sys.stderr)
     
     elif args.command == 'watch':
         print(f"Watching {', '.join(args.tickers)} (interval: {args.interval})")
@@ -3,203 +3,307 @@
 Backtesting Engine - Test strategy performance on historical data
 """
 
-import yfinance as yf
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import json
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 from analyzer import MarketAnalyzer
+from data_cache import DataCache
+from data_provider import get_provider, period_to_start
+import metrics
+import montecarlo
+from kernels import find_exits, EXIT_REASONS, EXIT_NONE
+from telemetry import timed
 
 
 class Backtester:
-    def __init__(self, initial_capital=10000, position_size=0.2, stop_loss=0.05, take_profit=0.15):
+    WARMUP_BARS = 200  # Skip first 200 days for indicators
+    
+    def __init__(self, initial_capital=10000, position_size=0.2, stop_loss=0.05, take_profit=0.15, intrabar=False, provider=None,
+                 buy_threshold=7, sell_threshold=3, mc_paths=0):
         self.initial_capital = initial_capital
         self.position_size = position_size  # Fraction of capital per position
         self.stop_loss = stop_loss  # 5% stop loss
         self.take_profit = take_profit  # 15% take profit
-        self.analyzer = MarketAnalyzer()
+        self.intrabar = intrabar  # Trigger SL/TP on High/Low instead of Close
+        self.buy_threshold = buy_threshold  # Technical score to enter
+        self.sell_threshold = sell_threshold  # Technical score to exit
+        self.mc_paths = mc_paths  # Monte Carlo trade-bootstrap paths per result (0 = off, the CLI turns it on)
+        self.provider = provider or get_provider()
+        self._analyzer = None
+    
+    @property
+    def analyzer(self):
+        """MarketAnalyzer, built on first use (the vectorized backtests only need prices)"""
+        if self._analyzer is None:
+            self._analyzer = MarketAnalyzer(provider=self.provider)
+        return self._analyzer
     
-    def backtest_stock(self, ticker, period='2y'):
-        """Backtest strategy on a single stock"""
+    @timed('backtest')
+    def backtest_stock(self, ticker, period='2y', start_date=None, end_date=None):
+        """Backtest strategy on a single stock (over [start_date, end_date] when given, else over period)"""
+        if start_date is not None:
+            end_date = end_date or datetime.now()
+            period = f"{start_date.strftime('%Y-%m-%d')} → {end_date.strftime('%Y-%m-%d')}"
         print(f"\n🔄 Backtesting {ticker} over {period}...")
         
         try:
-            stock = yf.Ticker(ticker)
-            hist = stock.history(period=period)
+            if start_date is not None:
+                hist = self.provider.history(ticker, start=start_date, end=end_date + timedelta(days=1))
+            else:
+                hist = self.provider.history(ticker, period=period)
             
             if hist.empty:
                 return {"error": f"No data for {ticker}"}
             
-            # Simulate trading
-            trades = []
-            capital = self.initial_capital
-            position = None
-            
-            # Iterate through historical data (skip first 200 days for indicators)
-            for i in range(200, len(hist)):
-                current_date = hist.index[i]
-                current_price = hist['Close'].iloc[i]
-                
-                # Get historical data up to current point
-                hist_slice = hist.iloc[:i+1]
-                
-                # Calculate score (simplified - using only technical for speed)
-                score = self._calculate_score_at_date(hist_slice)
-                
-                # Trading logic
-                if position is None:
-                    # No position - check for buy signal
-                    if score >= 7:  # Buy threshold
-                        shares = int((capital * self.position_size) / current_price)
-                        if shares > 0:
-                            position = {
-                                'entry_date': current_date,
-                                'entry_price': current_price,
-                                'shares': shares,
-                                'capital_invested': shares * current_price
-                            }
-                            capital -= position['capital_invested']
-                else:
-                    # Have position - check exit conditions
-                    pnl_pct = (current_price - position['entry_price']) / position['entry_price']
-                    
-                    # Exit conditions
-                    should_exit = False
-                    exit_reason = ''
-                    
-                    if pnl_pct <= -self.stop_loss:
-                        should_exit = True
-                        exit_reason = 'STOP_LOSS'
-                    elif pnl_pct >= self.take_profit:
-                        should_exit = True
-                        exit_reason = 'TAKE_PROFIT'
-                    elif score <= 3:  # Sell signal
-                        should_exit = True
-                        exit_reason = 'SELL_SIGNAL'
-                    
-                    if should_exit:
-                        # Close position
-                        exit_value = position['shares'] * current_price
-                        capital += exit_value
-                        
-                        pnl = exit_value - position['capital_invested']
-                        pnl_pct = (pnl / position['capital_invested']) * 100
-                        
-                        trades.append({
-                            'entry_date': position['entry_date'].strftime('%Y-%m-%d'),
-                            'exit_date': current_date.strftime('%Y-%m-%d'),
-                            'entry_price': round(position['entry_price'], 2),
-                            'exit_price': round(current_price, 2),
-                            'shares': position['shares'],
-                            'pnl': round(pnl, 2),
-                            'pnl_pct': round(pnl_pct, 2),
-                            'reason': exit_reason
-                        })
-                        
-                        position = None
-            
-            # Close any open position at end
-            if position:
-                current_price = hist['Close'].iloc[-1]
-                exit_value = position['shares'] * current_price
-                capital += exit_value
-                
-                pnl = exit_value - position['capital_invested']
-                pnl_pct = (pnl / position['capital_invested']) * 100
-                
-                trades.append({
-                    'entry_date': position['entry_date'].strftime('%Y-%m-%d'),
-                    'exit_date': hist.index[-1].strftime('%Y-%m-%d'),
-                    'entry_price': round(position['entry_price'], 2),
-                    'exit_price': round(current_price, 2),
-                    'shares': position['shares'],
-                    'pnl': round(pnl, 2),
-                    'pnl_pct': round(pnl_pct, 2),
-                    'reason': 'END_OF_PERIOD'
-                })
-            
-            # Calculate metrics
-            total_return = capital - self.initial_capital
-            total_return_pct = (total_return / self.initial_capital) * 100
+            scores = self._score_series(hist['Close']).to_numpy(dtype=float)
+            close = hist['Close'].to_numpy(dtype=float)
+            trades, capital, equity = self._simulate_trades(
+                hist.index, close, scores,
+                hist['High'].to_numpy(dtype=float), hist['Low'].to_numpy(dtype=float),
+                hist['Open'].to_numpy(dtype=float), curve=True
+            )
             
-            winning_trades = [t for t in trades if t['pnl'] > 0]
-            losing_trades = [t for t in trades if t['pnl'] <= 0]
-            
-            win_rate = (len(winning_trades) / len(trades) * 100) if trades else 0
-            
-            avg_win = np.mean([t['pnl'] for t in winning_trades]) if winning_trades else 0
-            avg_loss = np.mean([t['pnl'] for t in losing_trades]) if losing_trades else 0
-            
-            # Buy & Hold comparison
-            buy_hold_return = ((hist['Close'].iloc[-1] - hist['Close'].iloc[200]) / hist['Close'].iloc[200]) * 100
-            
-            return {
-                'ticker': ticker,
-                'period': period,
-                'initial_capital': self.initial_capital,
-                'final_capital': round(capital, 2),
-                'total_return': round(total_return, 2),
-                'total_return_pct': round(total_return_pct, 2),
-                'num_trades': len(trades),
-                'winning_trades': len(winning_trades),
-                'losing_trades': len(losing_trades),
-                'win_rate': round(win_rate, 2),
-                'avg_win': round(avg_win, 2),
-                'avg_loss': round(avg_loss, 2),
-                'buy_hold_return_pct': round(buy_hold_return, 2),
-                'vs_buy_hold': round(total_return_pct - buy_hold_return, 2),
-                'trades': trades
-            }
+            return self._summarize(ticker, period, trades, capital, close, equity)
             
         except Exception as e:
             return {"error": str(e), "ticker": ticker}
     
-    def _calculate_score_at_date(self, hist_slice):
-        """Calculate technical score at specific point in time"""
-        # Simplified scoring for backtesting (only technical)
-        scores = []
+    @timed('backtest_panel')
+    def backtest_panel(self, tickers, start_date, end_date, period=None, workers=None):
+        """
+        Backtest many tickers in one pass from the local cache.
+        Prices are aligned on a common date index (dates x tickers), each ticker is scored on
+        its own bars, then trades are generated per ticker column.
+        workers > 1 splits the tickers across a process pool (useful for very large N).
+        Returns one result dict per ticker, in input order.
+        """
+        period = period or f"{start_date.strftime('%Y-%m-%d')} → {end_date.strftime('%Y-%m-%d')}"
+        cache = DataCache(provider=self.provider)
+        cache.preload_universe(tickers, start_date, end_date)
+        panel = cache.get_cached_panel(tickers, start_date, end_date)
         
-        # RSI
-        rsi = self._calculate_rsi(hist_slice['Close'])
-        if rsi < 30:
-            scores.append(8)
-        elif rsi > 70:
-            scores.append(2)
+        if workers and workers > 1 and len(panel['Close'].columns) > 1:
+            columns = list(panel['Close'].columns)
+            chunks = [columns[i::workers] for i in range(workers)]
+            settings = {
+                'initial_capital': self.initial_capital, 'position_size': self.position_size,
+                'stop_loss': self.stop_loss, 'take_profit': self.take_profit, 'intrabar': self.intrabar,
+                'buy_threshold': self.buy_threshold, 'sell_threshold': self.sell_threshold,
+                'mc_paths': self.mc_paths
+            }
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(_backtest_panel_chunk, settings, {k: v[chunk] for k, v in panel.items()}, period)
+                    for chunk in chunks if chunk
+                ]
+                by_ticker = {}
+                for future in futures:
+                    by_ticker.update(future.result())
         else:
-            scores.append(4 + (rsi - 30) / 20)
+            by_ticker = self._backtest_frames(panel, period)
         
-        # MACD
-        exp1 = hist_slice['Close'].ewm(span=12, adjust=False).mean()
-        exp2 = hist_slice['Close'].ewm(span=26, adjust=False).mean()
-        macd = exp1 - exp2
-        signal = macd.ewm(span=9, adjust=False).mean()
+        return [by_ticker.get(t, {"error": f"No data for {t}", "ticker": t}) for t in tickers]
+    
+    def _backtest_frames(self, panel, period):
+        """Score a (dates x tickers) panel and generate each ticker's trades"""
+        close = panel['Close']
+        scores = self._score_panel(close).to_numpy(dtype=float)
+        arrays = {name: frame.to_numpy(dtype=float) for name, frame in panel.items()}
+        
+        results = {}
+        for j, ticker in enumerate(close.columns):
+            try:
+                # Only this ticker's own bars (leading/trailing gaps from alignment are dropped)
+                rows = np.flatnonzero(~np.isnan(arrays['Close'][:, j]))
+                if len(rows) <= self.WARMUP_BARS:
+                    results[ticker] = {"error": f"Not enough data for {ticker}", "ticker": ticker}
+                    continue
+                ticker_close = arrays['Close'][rows, j]
+                trades, capital, equity = self._simulate_trades(
+                    close.index[rows], ticker_close, scores[rows, j],
+                    arrays['High'][rows, j], arrays['Low'][rows, j], arrays['Open'][rows, j], curve=True
+                )
+                results[ticker] = self._summarize(ticker, period, trades, capital, ticker_close, equity)
+            except Exception as e:
+                results[ticker] = {"error": str(e), "ticker": ticker}
+        
+        return results
+    
+    def _summarize(self, ticker, period, trades, capital, close, equity):
+        """Performance metrics for one ticker's trade list and equity curve (see metrics.py)"""
+        total_return = capital - self.initial_capital
+        total_return_pct = (total_return / self.initial_capital) * 100
+        
+        pnl = np.array([t['pnl'] for t in trades], dtype=float)
+        wins, losses = pnl[pnl > 0], pnl[pnl <= 0]
+        traded_value = sum(t['shares'] * (t['entry_price'] + t['exit_price']) for t in trades)
+        m = metrics.summary(equity['equity'][self.WARMUP_BARS:], pnl=pnl,
+                            positions_value=equity['positions_value'][self.WARMUP_BARS:], traded_value=traded_value)
+        
+        def rounded(name):
+            value = metrics.scalar(m[name])
+            return round(value, 2) if value is not None else None
+        
+        # Buy & Hold comparison
+        start_price = close[self.WARMUP_BARS]
+        buy_hold_return = ((close[-1] - start_price) / start_price) * 100
         
-        if macd.iloc[-1] > signal.iloc[-1]:
-            scores.append(7)
+        return {
+            'ticker': ticker,
+            'period': period,
+            'initial_capital': self.initial_capital,
+            'final_capital': round(capital, 2),
+            'total_return': round(total_return, 2),
+            'total_return_pct': round(total_return_pct, 2),
+            'num_trades': len(trades),
+            'winning_trades': len(wins),
+            'losing_trades': len(losses),
+            'win_rate': rounded('win_rate') or 0,
+            'avg_win': round(float(wins.mean()), 2) if len(wins) else 0,
+            'avg_loss': round(float(losses.mean()), 2) if len(losses) else 0,
+            'profit_factor': rounded('profit_factor'),
+            'max_drawdown_pct': rounded('max_drawdown_pct'),
+            'max_drawdown_days': int(m['max_drawdown_days']),
+            'volatility_pct': rounded('volatility_pct'),
+            'sharpe': rounded('sharpe'),
+            'sortino': rounded('sortino'),
+            'exposure_pct': rounded('exposure_pct'),
+            'turnover': rounded('turnover'),
+            'buy_hold_return_pct': round(buy_hold_return, 2),
+            'vs_buy_hold': round(total_return_pct - buy_hold_return, 2),
+            'monte_carlo': montecarlo.from_trades(pnl, self.initial_capital, self.mc_paths),
+            'trades': trades
+        }
+    
+    def _simulate_trades(self, dates, close, scores, high=None, low=None, open_=None, warmup=None, curve=False):
+        """
+        Generate the trade list for one ticker (one position at a time).
+        Every bar with a buy signal is a candidate entry; exits for all candidates are found
+        at once by the exit kernel, then trades are chained: the next entry is the first
+        candidate after the previous exit. Returns (trades, final_capital).
+        warmup: bars to skip (default WARMUP_BARS; 0 for windows of an already-scored series)
+        curve: also return the daily marked-to-market curve, {'equity', 'positions_value'} arrays
+        """
+        warmup = self.WARMUP_BARS if warmup is None else warmup
+        candidates = np.flatnonzero(scores[warmup:] >= self.buy_threshold) + warmup
+        sell_mask = scores <= self.sell_threshold
+        
+        if self.intrabar:
+            exit_idx, exit_price, reason = find_exits(
+                candidates, close, self.stop_loss, self.take_profit, sell_mask,
+                high=high, low=low, open_=open_
+            )
         else:
-            scores.append(3)
+            exit_idx, exit_price, reason = find_exits(candidates, close, self.stop_loss, self.take_profit, sell_mask)
         
-        # Trend
-        if len(hist_slice) >= 200:
-            sma_50 = hist_slice['Close'].rolling(window=50).mean().iloc[-1]
-            sma_200 = hist_slice['Close'].rolling(window=200).mean().iloc[-1]
+        trades = []
+        bars = []  # (entry bar, exit bar, shares, entry price, pnl) for the equity curve
+        capital = self.initial_capital
+        k = 0
+        while k < len(candidates):
+            entry = candidates[k]
+            entry_price = close[entry]
+            shares = int((capital * self.position_size) / entry_price)
+            if shares <= 0:
+                k += 1
+                continue
             
-            if sma_50 > sma_200:
-                scores.append(7)
+            if exit_idx[k] < 0:
+                # Close any open position at end
+                exit_bar, price, exit_reason = len(close) - 1, close[-1], EXIT_REASONS[EXIT_NONE]
             else:
-                scores.append(3)
+                exit_bar, price, exit_reason = exit_idx[k], exit_price[k], EXIT_REASONS[int(reason[k])]
+            
+            capital_invested = shares * entry_price
+            exit_value = shares * price
+            capital += exit_value - capital_invested
+            
+            pnl = exit_value - capital_invested
+            pnl_pct = (pnl / capital_invested) * 100
+            
+            trades.append({
+                'entry_date': dates[entry].strftime('%Y-%m-%d'),
+                'exit_date': dates[exit_bar].strftime('%Y-%m-%d'),
+                'entry_price': round(entry_price, 2),
+                'exit_price': round(price, 2),
+                'shares': shares,
+                'pnl': round(pnl, 2),
+                'pnl_pct': round(pnl_pct, 2),
+                'reason': exit_reason
+            })
+            bars.append((entry, exit_bar, shares, entry_price, pnl))
+            
+            if exit_idx[k] < 0:
+                break
+            k = np.searchsorted(candidates, exit_bar, side='right')
         
-        return np.mean(scores)
+        if curve:
+            return trades, capital, self._equity_curve(close, bars)
+        return trades, capital
+    
+    def _equity_curve(self, close, bars):
+        """
+        Daily equity from the trade bars: realized P&L steps in on exit bars, open positions
+        are marked at the close in between (shares and cost as running sums of entry/exit deltas)
+        """
+        n = len(close)
+        realized, shares, cost = np.zeros(n), np.zeros(n), np.zeros(n)
+        if bars:
+            entry, exit_bar, qty, entry_price, pnl = (np.array(c) for c in zip(*bars))
+            np.add.at(realized, exit_bar, pnl)
+            np.add.at(shares, entry, qty)
+            np.add.at(shares, exit_bar, -qty)
+            np.add.at(cost, entry, qty * entry_price)
+            np.add.at(cost, exit_bar, -qty * entry_price)
+        positions_value = np.cumsum(shares) * close
+        equity = self.initial_capital + np.cumsum(realized) + positions_value - np.cumsum(cost)
+        return {'equity': equity, 'positions_value': positions_value}
+    
+    def _score_panel(self, close):
+        """
+        Scores of a (dates x tickers) close frame, aligned on its index. Each column is scored on
+        its own bars only: a NaN left by alignment would otherwise poison the rolling windows
+        (up to SMA200) that follow it, and the panel would trade differently from backtest_stock.
+        """
+        return pd.DataFrame({t: self._score_series(close[t].dropna()) for t in close.columns},
+                            index=close.index, columns=close.columns)
     
-    def _calculate_rsi(self, prices, period=14):
-        """Calculate RSI"""
-        delta = prices.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        return rsi.iloc[-1]
+    def _score_series(self, close):
+        """
+        Technical score (RSI, MACD, SMA trend) for every bar at once.
+        Causal rolling/EWM windows make each value identical to scoring hist.iloc[:i+1].
+        Works on a Series (one ticker) or a DataFrame (one column per ticker).
+        """
+        # RSI
+        delta = close.diff()
+        gain = delta.where(delta > 0, 0).rolling(window=14).mean()
+        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+        rsi = 100 - (100 / (1 + gain / loss))
+        rsi_score = (4 + (rsi - 30) / 20).mask(rsi < 30, 8).mask(rsi > 70, 2)
+        
+        # MACD
+        macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+        signal = macd.ewm(span=9, adjust=False).mean()
+        macd_score = 3 + 4 * (macd > signal)
+        
+        # Trend
+        sma_50 = close.rolling(window=50).mean()
+        sma_200 = close.rolling(window=200).mean()
+        trend_score = 3 + 4 * (sma_50 > sma_200)
+        
+        return (rsi_score + macd_score + trend_score) / 3
+
+
+def _backtest_panel_chunk(settings, panel, period):
+    """Process-pool worker: backtest one slice of the panel's tickers"""
+    return Backtester(**settings)._backtest_frames(panel, period)
+
+
+def _fmt(value, unit=''):
+    return f"{value:.2f}{unit}" if value is not None else 'N/A'
 
 
 def main():
@@ -210,6 +314,13 @@ def main():
     parser.add_argument('--position-size', type=float, default=0.2, help='Position size (fraction)')
     parser.add_argument('--stop-loss', type=float, default=0.05, help='Stop loss (fraction)')
     parser.add_argument('--take-profit', type=float, default=0.15, help='Take profit (fraction)')
+    parser.add_argument('--intrabar', action='store_true', help='Trigger stop-loss/take-profit on intraday High/Low')
+    parser.add_argument('--panel', action='store_true', help='Backtest all tickers in one pass from the local cache')
+    parser.add_argument('--start', help='Panel start date (YYYY-MM-DD, default: derived from --period)')
+    parser.add_argument('--end', help='Panel end date (YYYY-MM-DD, default: today)')
+    parser.add_argument('--workers', type=int, help='Panel mode: split tickers across N processes')
+    parser.add_argument('--mc-paths', type=int, default=montecarlo.DEFAULT_PATHS,
+                        help='Monte Carlo trade-bootstrap paths (0 = off)')
     parser.add_argument('--output', choices=['json', 'text'], default='text', help='Output format')
     
     args = parser.parse_args()
@@ -218,12 +329,22 @@ def main():
         initial_capital=args.capital,
         position_size=args.position_size,
         stop_loss=args.stop_loss,
-        take_profit=args.take_profit
+        take_profit=args.take_profit,
+        intrabar=args.intrabar,
+        mc_paths=args.mc_paths
     )
     
+    tickers = [t.upper() for t in args.tickers]
+    if args.panel:
+        end = datetime.strptime(args.end, '%Y-%m-%d') if args.end else datetime.now()
+        start = datetime.strptime(args.start, '%Y-%m-%d') if args.start else period_to_start(args.period, end)
+        panel_results = backtester.backtest_panel(tickers, start, end, workers=args.workers)
+    else:
+        panel_results = None
+    
     results = []
-    for ticker in args.tickers:
-        result = backtester.backtest_stock(ticker.upper(), args.period)
+    for i, ticker in enumerate(tickers):
+        result = panel_results[i] if panel_results else backtester.backtest_stock(ticker, args.period)
         results.append(result)
         
         if args.output == 'text' and 'error' not in result:
@@ -244,6 +365,15 @@ def main():
             print(f"  Win Rate:         {result['win_rate']:.2f}%")
             print(f"  Avg Win:          ${result['avg_win']:,.2f}")
             print(f"  Avg Loss:         ${result['avg_loss']:,.2f}")
+            print(f"  Profit Factor:    {_fmt(result['profit_factor'])}")
+            print(f"\nRisk:")
+            print(f"  Max Drawdown:     {result['max_drawdown_pct']:.2f}% ({result['max_drawdown_days']} days underwater)")
+            print(f"  Volatility:       {_fmt(result['volatility_pct'], '%')}")
+            print(f"  Sharpe / Sortino: {_fmt(result['sharpe'])} / {_fmt(result['sortino'])}")
+            print(f"  Exposure:         {_fmt(result['exposure_pct'], '%')} | Turnover: {_fmt(result['turnover'], 'x/yr')}")
+            if result['monte_carlo']:
+                print()
+                print('\n'.join(montecarlo.format_report(result['monte_carlo'])))
             
             if result['trades']:
                 print(f"\nRecent Trades (last 5):")
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite - Times the analyzer, cache, backtester and simulator hot paths
+on deterministic synthetic universes, and compares against a saved JSON baseline.
+
+Usage:
+    python3 benchmark.py --tickers 50 --save-baseline       # record a baseline
+    python3 benchmark.py --tickers 50                       # rerun and flag regressions
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import io
+import gc
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import contextlib
+from datetime import datetime
+
+from data_provider import SyntheticProvider
+from data_cache import DataCache, default_db_path
+from analyzer import MarketAnalyzer
+from backtest import Backtester
+from portfolio_sim import PortfolioSimulator
+from db_migrations import remove_database
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+# Fixed window so every run measures exactly the same data
+START = datetime(2022, 1, 3)
+END = datetime(2023, 12, 29)
+SIM_START = '2023-07-03'
+SIM_END = '2023-09-29'
+
+
+class BenchmarkSuite:
+    def __init__(self, n_tickers=20, seed=42, repeat=3, workdir=None):
+        self.tickers = [f'SYN{i:04d}' for i in range(n_tickers)]
+        self.provider = SyntheticProvider(seed)
+        self.repeat = repeat
+        self.workdir = workdir or tempfile.mkdtemp(prefix='market_bench_')
+
+    def cases(self):
+        """Benchmark cases: name -> (setup, run, items processed per run)"""
+        n = len(self.tickers)
+        return {
+            'cache.fetch_and_cache': (self._fresh_cache, self._fetch_all, n),
+            'cache.get_cached_data': (self._warm_cache, self._read_all, n),
+            'analyzer.analyze_stock': (self._warm_cache, self._analyze_all, n),
+            'backtest.backtest_stock': (self._warm_cache, self._backtest_all, n),
+            'portfolio_sim.run_simulation': (self._warm_cache, self._simulate, n),
+        }
+
+    # --- setups (not timed) ---
+
+    def _fresh_cache(self):
+        cache_path = default_db_path(self.provider.name)
+        if os.path.exists(cache_path):
+            os.remove(cache_path)
+        return DataCache(provider=self.provider)
+
+    def _warm_cache(self):
+        cache = DataCache(provider=self.provider)
+        if not getattr(self, '_warmed', False):
+            cache.preload_universe(self.tickers, START, END)
+            self._warmed = True
+        return cache
+
+    # --- timed bodies ---
+
+    def _fetch_all(self, cache):
+        for ticker in self.tickers:
+            cache.fetch_and_cache(ticker, START, END, force_refresh=True)
+
+    def _read_all(self, cache):
+        for ticker in self.tickers:
+            cache.get_cached_data(ticker, START, END)
+
+    def _analyze_all(self, cache):
+        analyzer = MarketAnalyzer(provider=self.provider)
+        for ticker in self.tickers:
+            analyzer.analyze_stock(ticker, as_of=END)
+
+    def _backtest_all(self, cache):
+        backtester = Backtester(provider=self.provider)
+        for ticker in self.tickers:
+            backtester.backtest_stock(ticker, start_date=START, end_date=END)
+
+    def _simulate(self, cache):
+        remove_database('portfolio_sim.db')
+        sim = PortfolioSimulator(provider=self.provider)
+        portfolio = sim.create_portfolio('benchmark', 100000, SIM_START, config={'universe': self.tickers})
+        sim.run_simulation(portfolio['portfolio_id'], end_date=SIM_END)
+
+    # --- runner ---
+
+    def run(self, only=None):
+        """Run every case; returns {name: {'seconds', 'items_per_sec', 'peak_mb'}}"""
+        results = {}
+        cwd = os.getcwd()
+        os.chdir(self.workdir)  # Engines use relative db paths: keep them out of the repo
+        try:
+            for name, (setup, body, items) in self.cases().items():
+                if only and not any(o in name for o in only):
+                    continue
+                print(f"  ⏱️  {name}...", end=' ', flush=True)
+
+                with contextlib.redirect_stdout(io.StringIO()):
+                    timings = []
+                    for _ in range(self.repeat):
+                        state = setup()
+                        gc.collect()
+                        start = time.perf_counter()
+                        body(state)
+                        timings.append(time.perf_counter() - start)
+
+                    # Separate pass for memory: tracemalloc slows the code it traces
+                    state = setup()
+                    gc.collect()
+                    tracemalloc.start()
+                    body(state)
+                    _, peak = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+
+                best = min(timings)
+                results[name] = {
+                    'seconds': round(best, 4),
+                    'items_per_sec': round(items / best, 2) if best > 0 else None,
+                    'peak_mb': round(peak / 1024 / 1024, 2)
+                }
+                print(f"{best:.3f}s, {results[name]['items_per_sec']} items/s, {results[name]['peak_mb']} MB")
+        finally:
+            os.chdir(cwd)
+
+        return results
+
+    def cleanup(self):
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+def compare(results, baseline, tolerance):
+    """List of regressions: cases slower or heavier than baseline by more than tolerance"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for metric in ('seconds', 'peak_mb'):
+            old, new = previous.get(metric), current.get(metric)
+            if old and new and new > old * (1 + tolerance):
+                regressions.append({
+                    'case': name,
+                    'metric': metric,
+                    'baseline': old,
+                    'current': new,
+                    'change_pct': round((new / old - 1) * 100, 1)
+                })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the market analyzer hot paths')
+    parser.add_argument('--tickers', type=int, default=20, help='Synthetic universe size (default: 20)')
+    parser.add_argument('--seed', type=int, default=42, help='Synthetic data seed')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per case (best is kept)')
+    parser.add_argument('--only', nargs='+', help='Run only cases whose name contains one of these')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file')
+    parser.add_argument('--save-baseline', action='store_true', help='Write results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed slowdown before flagging (0.2 = 20%%)')
+    parser.add_argument('--output', help='Also write this run to a JSON file')
+
+    args = parser.parse_args()
+
+    print(f"\n🏁 Benchmark: {args.tickers} synthetic tickers, seed {args.seed}, best of {args.repeat}\n")
+
+    suite = BenchmarkSuite(args.tickers, args.seed, args.repeat)
+    try:
+        results = suite.run(args.only)
+    finally:
+        suite.cleanup()
+
+    report = {
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'tickers': args.tickers,
+        'seed': args.seed,
+        'results': results
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\nℹ️  No baseline at {args.baseline} (run with --save-baseline)")
+        return
+
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+
+    if baseline.get('tickers') != args.tickers or baseline.get('seed') != args.seed:
+        print(f"\n⚠️  Baseline was recorded with {baseline.get('tickers')} tickers / seed {baseline.get('seed')}: "
+              f"comparison may not be meaningful")
+
+    regressions = compare(results, baseline.get('results', {}), args.tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) vs baseline (tolerance {args.tolerance:.0%}):")
+        for r in regressions:
+            print(f"   {r['case']} {r['metric']}: {r['baseline']} → {r['current']} (+{r['change_pct']}%)")
+        sys.exit(1)
+
+    print(f"\n✅ No regression vs baseline (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == '__main__':
+    main()
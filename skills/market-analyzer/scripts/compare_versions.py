@@ -3,32 +3,36 @@
 Compare performance of different versions/configurations
 """
 
-import sqlite3
 import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from db_migrations import pending_migrations, PORTFOLIO_SIM_MIGRATIONS
+from portfolio_sim import list_portfolio_summaries
 
 def compare_portfolios(db_path='portfolio_sim.db'):
-    """Compare all portfolios"""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT id, name, initial_capital, current_capital, start_date, end_date,
-               (SELECT COUNT(*) FROM trades_log WHERE portfolio_id = p.id) as num_trades
-        FROM portfolios p
-        ORDER BY start_date, name
-    ''')
+    """Compare all portfolios (read-only: reads the materialized portfolio_summary rows)"""
+    if not os.path.exists(db_path):
+        print(f"❌ {db_path} not found")
+        return
+    if pending_migrations(db_path, PORTFOLIO_SIM_MIGRATIONS):
+        print(f"⚠️  {db_path} needs a schema upgrade first: python3 scripts/db_migrations.py migrate {db_path}")
+        return
+    portfolios = list_portfolio_summaries(db_path)
     
-    portfolios = cursor.fetchall()
-    
-    print("\n" + "="*100)
-    print(f"{'Portfolio':<30} {'Period':<25} {'Initial':>12} {'Final':>12} {'Return':>10} {'Trades':>8}")
-    print("="*100)
+    print("\n" + "="*118)
+    print(f"{'Portfolio':<30} {'Period':<25} {'Initial':>12} {'Final':>12} {'Return':>10} {'Max DD':>8} {'Sharpe':>7} {'Trades':>8}")
+    print("="*118)
     
     results_by_year = {}
     
     for p in portfolios:
-        pid, name, initial, current, start, end, trades = p
+        name, initial, start, end = p['name'], p['initial_capital'], p['start_date'], p['end_date']
+        current = p['final_value'] if p['final_value'] is not None else p['current_capital']
         return_pct = ((current - initial) / initial) * 100
+        trades = p['num_trades'] or 0
+        max_dd = f"{p['max_drawdown_pct']:.1f}%" if p['max_drawdown_pct'] is not None else '-'
+        sharpe = f"{p['sharpe']:.2f}" if p['sharpe'] is not None else '-'
         
         period = f"{start} → {end or 'now'}"
         year = start[:4]
@@ -46,12 +50,13 @@ def compare_portfolios(db_path='portfolio_sim.db'):
         color = '\033[92m' if return_pct > 0 else '\033[91m'
         reset = '\033[0m'
         
-        print(f"{name:<30} {period:<25} ${initial:>11,.0f} ${current:>11,.0f} {color}{return_pct:>9.2f}%{reset} {trades:>8}")
+        print(f"{name:<30} {period:<25} ${initial:>11,.0f} ${current:>11,.0f} {color}{return_pct:>9.2f}%{reset} "
+              f"{max_dd:>8} {sharpe:>7} {trades:>8}")
     
     # Summary by year
-    print("\n" + "="*100)
+    print("\n" + "="*118)
     print("📊 SUMMARY BY YEAR")
-    print("="*100)
+    print("="*118)
     
     for year in sorted(results_by_year.keys()):
         print(f"\n{year}:")
@@ -65,10 +70,7 @@ def compare_portfolios(db_path='portfolio_sim.db'):
         avg_return = sum(p['return'] for p in portfolios_year) / len(portfolios_year)
         avg_trades = sum(p['trades'] for p in portfolios_year) / len(portfolios_year)
         print(f"  📈 Average: {avg_return:+.2f}% ({avg_trades:.0f} trades)")
-    
-    conn.close()
 
 if __name__ == '__main__':
-    import os
     os.chdir(os.path.dirname(os.path.dirname(__file__)))
     compare_portfolios()
@@ -3,26 +3,167 @@
 Advanced Market Analyzer Dashboard with Chart.js and Strategy Comparison
 """
 
-from fastapi import FastAPI, Request, Form
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from fastapi import FastAPI, APIRouter, Request, Form
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
 import uvicorn
+import html as html_lib
 from analyzer import MarketAnalyzer
 from backtest import Backtester
-from portfolio_sim import PortfolioSimulator
+from portfolio_sim import PortfolioSimulator, PORTFOLIO_COLUMNS
+from screener import Screener, INDICATOR_COLUMNS
+from live_monitor import LiveMonitor
+from db_migrations import remove_database
+from downsampling import downsample_dates
+from page_cache import PageCache, etag_matches, make_etag
+import listings
+import telemetry
+import time
 import json
-from datetime import datetime, timedelta
+import os
+import threading
+import contextlib
+from datetime import datetime, date, timedelta
 
-app = FastAPI(title="Market Analyzer Dashboard")
+router = APIRouter()
 
-analyzer = MarketAnalyzer()
-backtester = Backtester()
-simulator = PortfolioSimulator()
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config.json')
+STRATEGIES_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'strategies.json')
 
-# Load strategies
-import os
-strategies_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'strategies.json')
-with open(strategies_path, 'r') as f:
-    STRATEGIES = json.load(f)
+# Shared engines, built once by the app's startup phase (init_services)
+analyzer = None
+backtester = None
+simulator = None
+screener = None
+live_monitor = None
+live_lock = threading.Lock()  # LiveMonitor keeps warm frames: one user at a time
+# Handlers taking live_lock are plain `def`: FastAPI runs them in its threadpool, so waiting on
+# the lock (held by the preload thread) never blocks the event loop serving /healthz and /readyz
+
+READINESS = {'ready': threading.Event(), 'started_at': None, 'preload': None}
+
+def init_services():
+    """Create the shared engines (DataCache, schema DDL) once per process"""
+    global analyzer, backtester, simulator, screener, live_monitor
+    if analyzer is None:
+        analyzer = MarketAnalyzer()
+        backtester = Backtester()
+        simulator = PortfolioSimulator()
+        screener = Screener()
+        live_monitor = LiveMonitor()
+
+def preload_watchlist():
+    """Warm the watchlist's price frames and scores so the first request is not a cold one"""
+    started = time.perf_counter()
+    try:
+        with open(CONFIG_PATH, 'r') as f:
+            watchlist = json.load(f)['watchlist']
+        with live_lock:
+            live_monitor.refresh_frames(watchlist)
+            analyses = live_monitor.get_analyses(watchlist)
+        READINESS['preload'] = {
+            'tickers': len(watchlist),
+            'analyzed': sum(1 for a in analyses.values() if 'error' not in a),
+            'seconds': round(time.perf_counter() - started, 2)
+        }
+    except Exception as e:
+        READINESS['preload'] = {'error': str(e)}
+    finally:
+        READINESS['ready'].set()
+
+def create_app(preload=None):
+    """
+    Build the dashboard app. Engines are created in the startup phase, not at import.
+    preload (default: DASHBOARD_PRELOAD env var) warms the watchlist in the background;
+    /readyz reports 503 until it is done, /healthz only reports that the process is up.
+    """
+    if preload is None:
+        preload = os.environ.get('DASHBOARD_PRELOAD', '').lower() in ('1', 'true', 'yes', 'on')
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        READINESS['started_at'] = datetime.now().isoformat()
+        init_services()
+        if preload:
+            threading.Thread(target=preload_watchlist, daemon=True).start()
+        else:
+            READINESS['ready'].set()
+        yield
+
+    app = FastAPI(title="Market Analyzer Dashboard", lifespan=lifespan)
+    app.middleware("http")(record_request_latency)
+    app.include_router(router)
+    return app
+
+async def record_request_latency(request: Request, call_next):
+    """Per-route latency histogram (route template, not raw path, to bound cardinality)"""
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get('route')
+    telemetry.HTTP_REQUEST_DURATION.observe(
+        time.perf_counter() - start,
+        method=request.method, route=route.path if route else 'unmatched', status=response.status_code
+    )
+    return response
+
+@router.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(telemetry.render(), media_type=telemetry.CONTENT_TYPE)
+
+@router.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving"""
+    return JSONResponse({'status': 'ok'})
+
+@router.get("/readyz")
+async def readyz():
+    """Readiness: engines created and preload (if any) finished"""
+    ready = READINESS['ready'].is_set()
+    return JSONResponse({
+        'status': 'ready' if ready else 'starting',
+        'started_at': READINESS['started_at'],
+        'preload': READINESS['preload']
+    }, status_code=200 if ready else 503)
+
+# Strategies (strategies.json), reloaded when the file changes on disk
+_strategies_cache = {'mtime': None, 'strategies': {}}
+
+def get_strategies():
+    mtime = os.stat(STRATEGIES_PATH).st_mtime
+    if mtime != _strategies_cache['mtime']:
+        with open(STRATEGIES_PATH, 'r') as f:
+            _strategies_cache['strategies'] = json.load(f)
+        _strategies_cache['mtime'] = mtime
+    return _strategies_cache['strategies']
+
+def save_strategies(strategies):
+    with open(STRATEGIES_PATH, 'w') as f:
+        json.dump(strategies, f, indent=2)
+    _strategies_cache['mtime'] = os.stat(STRATEGIES_PATH).st_mtime
+    _strategies_cache['strategies'] = strategies
+
+def strategies_version():
+    """strategies.json fingerprint; pages that prefill today's date also depend on the day"""
+    st = os.stat(STRATEGIES_PATH)
+    return (st.st_mtime_ns, st.st_size, date.today().isoformat())
+
+# Rendered HTML of the heavy pages, keyed on the version of the data they show
+page_cache = PageCache()
+
+def cached_html(request, key, version, render):
+    """
+    HTML response for `key` at `version`: 304 if the client's ETag is current, otherwise the
+    cached page (gzip when accepted), rendering it with render() -> str on a miss
+    """
+    headers = {'ETag': make_etag(key, version), 'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding'}
+    if etag_matches(request.headers.get('if-none-match'), headers['ETag']):
+        return Response(status_code=304, headers=headers)
+    
+    page = page_cache.get(key, version, render)
+    if 'gzip' in request.headers.get('accept-encoding', ''):
+        return Response(page.gzipped, media_type='text/html; charset=utf-8',
+                        headers={**headers, 'Content-Encoding': 'gzip'})
+    return Response(page.body, media_type='text/html; charset=utf-8', headers=headers)
 
 # Common CSS + Chart.js
 COMMON_HEAD = """
@@ -71,17 +212,22 @@ def generate_nav(active='simulator'):
     return f"""
     <nav>
         <a href="/" class="{'active' if active == 'analyzer' else ''}">📊 Analyzer</a>
+        <a href="/screener" class="{'active' if active == 'screener' else ''}">🔎 Screener</a>
         <a href="/simulator" class="{'active' if active == 'simulator' else ''}">🎮 Simulator</a>
         <a href="/strategies" class="{'active' if active == 'strategies' else ''}">⚙️ Strategies</a>
         <a href="/compare" class="{'active' if active == 'compare' else ''}">📈 Compare</a>
         <a href="/live" class="{'active' if active == 'live' else ''}">🔴 Live Trading</a>
         <a href="/settings/telegram" class="{'active' if active == 'telegram' else ''}">✈️ Telegram</a>
+        <a href="/profiling" class="{'active' if active == 'profiling' else ''}">⏱️ Profiling</a>
     </nav>
     """
 
-@app.get("/", response_class=HTMLResponse)
-async def root():
+@router.get("/", response_class=HTMLResponse)
+async def root(request: Request):
     """Analyzer page"""
+    return cached_html(request, 'root', (), render_root)
+
+def render_root():
     return f"""
     <!DOCTYPE html>
     <html lang="fr">
@@ -111,7 +257,7 @@ async def root():
     </html>
     """
 
-@app.post("/analyze")
+@router.post("/analyze")
 async def analyze_stock(ticker: str = Form(...)):
     """Analyze a stock and display results"""
     try:
@@ -210,12 +356,174 @@ async def analyze_stock(ticker: str = Form(...)):
         </html>
         """)
 
-@app.get("/strategies", response_class=HTMLResponse)
-async def strategies_page():
+@router.get("/api/screener")
+def screener_api(where: str = None, rank: str = None, desc: bool = False,
+                 limit: int = 50, as_of: str = None):
+    """Run a screen over cached indicators (JSON)"""
+    result = screener.screen(where, rank, desc, limit, as_of)
+    return JSONResponse(result, status_code=400 if 'error' in result else 200)
+
+@router.post("/screener/refresh")
+def screener_refresh():
+    """Recompute indicators for tickers with new bars"""
+    screener.refresh()
+    return RedirectResponse(url='/screener', status_code=303)
+
+@router.get("/screener", response_class=HTMLResponse)
+def screener_page(where: str = '', rank: str = '', desc: bool = False, limit: int = 50):
+    """Universe screener page"""
+    results_html = ""
+    if where or rank:
+        result = screener.screen(where or None, rank or None, desc, limit)
+        if 'error' in result:
+            results_html = f"<p style='color: #ef4444;'>{html_lib.escape(result['error'])}</p>"
+        elif not result['results']:
+            results_html = "<p>Aucun résultat (indicateurs non calculés ou filtre trop strict)</p>"
+        else:
+            names = list(result['results'][0].keys())
+            rows = []
+            for row in result['results']:
+                cells = ''.join(
+                    f"<td>{value:,.2f}</td>" if isinstance(value, float) else f"<td>{value if value is not None else '-'}</td>"
+                    for value in row.values()
+                )
+                rows.append(f"<tr>{cells}</tr>")
+            results_html = f"""
+            <p style="color: #94a3b8;">{result['count']} résultat(s), chacun à sa dernière séance en cache</p>
+            <table>
+                <thead><tr>{''.join(f'<th>{n}</th>' for n in names)}</tr></thead>
+                <tbody>{''.join(rows)}</tbody>
+            </table>
+            """
+
+    columns_html = ', '.join(f'<code title="{html_lib.escape(d)}">{c}</code>' for c, d in INDICATOR_COLUMNS.items())
+
+    return f"""
+    <!DOCTYPE html>
+    <html lang="fr">
+    <head>
+        <title>Screener 🔎</title>
+        {COMMON_HEAD}
+    </head>
+    <body>
+        <div class="container">
+            <header>
+                <h1>🔎 Screener</h1>
+                <p>Filtrer et classer tout l'univers en cache</p>
+            </header>
+            {generate_nav('screener')}
+            <div class="card">
+                <div class="card-header">Filtre</div>
+                <form method="get" action="/screener">
+                    <div class="input-group">
+                        <input type="text" name="where" value="{html_lib.escape(where)}" placeholder="rsi < 30 and sma50 > sma200" />
+                        <input type="text" name="rank" value="{html_lib.escape(rank)}" placeholder="Classement (ex: rsi)" />
+                        <select name="desc">
+                            <option value="false" {'' if desc else 'selected'}>Croissant</option>
+                            <option value="true" {'selected' if desc else ''}>Décroissant</option>
+                        </select>
+                        <input type="number" name="limit" value="{limit}" min="1" max="1000" />
+                        <button type="submit" class="btn-primary">Filtrer</button>
+                    </div>
+                </form>
+                <p style="font-size: 0.85em; color: #94a3b8;">Colonnes : {columns_html}</p>
+                <form method="post" action="/screener/refresh" style="padding: 0; margin: 15px 0 0 0; background: none;">
+                    <button type="submit" class="btn-secondary">🔄 Recalculer les indicateurs</button>
+                </form>
+            </div>
+            <div class="card">
+                <div class="card-header">Résultats</div>
+                {results_html or "<p style='color: #94a3b8;'>Saisir un filtre ou un classement</p>"}
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+
+def profiled_analyzers():
+    """Analyzer instances whose profilers are exposed (profiling is enabled with MARKET_PROFILE=1)"""
+    return {
+        'analyzer': analyzer,
+        'backtester': backtester.analyzer,
+        'simulator': simulator.analyzer,
+        'live': live_monitor.analyzer,
+    }
+
+@router.get("/api/profiling")
+async def profiling_api():
+    """Per-step timing histograms of each analyzer (JSON)"""
+    return JSONResponse({
+        name: {'enabled': a.profiler.enabled, 'steps': a.profiler.snapshot()}
+        for name, a in profiled_analyzers().items()
+    })
+
+@router.post("/profiling/reset")
+async def profiling_reset():
+    """Clear collected timings"""
+    for a in profiled_analyzers().values():
+        a.profiler.reset()
+    return RedirectResponse(url='/profiling', status_code=303)
+
+@router.get("/profiling", response_class=HTMLResponse)
+async def profiling_page():
+    """Profiling page: where analyze_stock spends its time"""
+    cards = ""
+    for name, a in profiled_analyzers().items():
+        if not a.profiler.enabled:
+            body = "<p style='color: #94a3b8;'>Profilage désactivé (lancer avec MARKET_PROFILE=1)</p>"
+        else:
+            steps = a.profiler.snapshot()
+            rows = ''.join(
+                f"<tr><td><code>{step}</code></td><td>{s['count']:,}</td><td>{s['total_ms']:,.1f}</td>"
+                f"<td>{s['mean_ms']:.3f}</td><td>{s['p50_ms'] if s['p50_ms'] is not None else '-'}</td>"
+                f"<td>{s['p95_ms'] if s['p95_ms'] is not None else '-'}</td><td>{s['max_ms']:.3f}</td></tr>"
+                for step, s in steps.items()
+            )
+            body = f"""
+            <table>
+                <thead><tr><th>Étape</th><th>Appels</th><th>Total (ms)</th><th>Moyenne (ms)</th><th>p50 ≤ (ms)</th><th>p95 ≤ (ms)</th><th>Max (ms)</th></tr></thead>
+                <tbody>{rows}</tbody>
+            </table>
+            """ if steps else "<p style='color: #94a3b8;'>Aucune mesure pour l'instant</p>"
+        cards += f"""
+            <div class="card">
+                <div class="card-header">{name}</div>
+                {body}
+            </div>
+        """
+
+    return f"""
+    <!DOCTYPE html>
+    <html lang="fr">
+    <head>
+        <title>Profiling ⏱️</title>
+        {COMMON_HEAD}
+    </head>
+    <body>
+        <div class="container">
+            <header>
+                <h1>⏱️ Profiling</h1>
+                <p>Temps passé par étape d'analyse (<a href="/api/profiling" style="color: #60a5fa;">JSON</a>)</p>
+            </header>
+            {generate_nav('profiling')}
+            {cards}
+            <form method="post" action="/profiling/reset" style="padding: 0; background: none;">
+                <button type="submit" class="btn-secondary">🗑️ Réinitialiser</button>
+            </form>
+        </div>
+    </body>
+    </html>
+    """
+
+@router.get("/strategies", response_class=HTMLResponse)
+async def strategies_page(request: Request):
     """Strategies comparison page"""
-    
+    return cached_html(request, 'strategies', strategies_version(), render_strategies_page)
+
+def render_strategies_page():
+    strategies = get_strategies()
     strategies_html = ""
-    for name, config in STRATEGIES.items():
+    for name, config in strategies.items():
         strategies_html += f"""
         <div class="strategy-card">
             <div style="display: flex; justify-content: space-between; align-items: start; margin-bottom: 10px;">
@@ -259,7 +567,7 @@ async def strategies_page():
                         <input type="text" name="name" placeholder="Nom du portfolio" required />
                         <select name="strategy" required>
                             <option value="">Choisir une stratégie...</option>
-                            {"".join([f'<option value="{name}">{name}</option>' for name in STRATEGIES.keys()])}
+                            {"".join([f'<option value="{name}">{name}</option>' for name in strategies.keys()])}
                         </select>
                         <input type="number" name="capital" value="10000" min="1000" step="1000" required />
                         <input type="date" name="start_date" value="{datetime.now().strftime('%Y-%m-%d')}" required />
@@ -273,13 +581,14 @@ async def strategies_page():
     </html>
     """
 
-@app.get("/strategies/edit/{strategy_name}", response_class=HTMLResponse)
+@router.get("/strategies/edit/{strategy_name}", response_class=HTMLResponse)
 async def edit_strategy(strategy_name: str):
     """Edit strategy page"""
-    if strategy_name not in STRATEGIES:
+    strategies = get_strategies()
+    if strategy_name not in strategies:
         return RedirectResponse(url='/strategies', status_code=303)
     
-    config = STRATEGIES[strategy_name]
+    config = strategies[strategy_name]
     
     return f"""
     <!DOCTYPE html>
@@ -359,7 +668,7 @@ async def edit_strategy(strategy_name: str):
     </html>
     """
 
-@app.post("/strategies/save/{strategy_name}")
+@router.post("/strategies/save/{strategy_name}")
 async def save_strategy(
     strategy_name: str,
     description: str = Form(...),
@@ -374,8 +683,8 @@ async def save_strategy(
 ):
     """Save strategy modifications"""
     
-    # Update strategy in memory
-    STRATEGIES[strategy_name] = {
+    strategies = dict(get_strategies())
+    strategies[strategy_name] = {
         'description': description,
         'buy_threshold': buy_threshold,
         'sell_threshold': sell_threshold,
@@ -389,15 +698,11 @@ async def save_strategy(
         }
     }
     
-    # Save to file
-    import os
-    strategies_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'strategies.json')
-    with open(strategies_path, 'w') as f:
-        json.dump(STRATEGIES, f, indent=2)
+    save_strategies(strategies)
     
     return RedirectResponse(url='/strategies', status_code=303)
 
-@app.post("/simulator/create-with-strategy")
+@router.post("/simulator/create-with-strategy")
 async def create_with_strategy(
     name: str = Form(...),
     strategy: str = Form(...),
@@ -406,10 +711,11 @@ async def create_with_strategy(
     end_date: str = Form(None)
 ):
     """Create portfolio with predefined strategy"""
-    if strategy not in STRATEGIES:
+    strategies = get_strategies()
+    if strategy not in strategies:
         return RedirectResponse(url='/strategies', status_code=303)
     
-    config = STRATEGIES[strategy]
+    config = strategies[strategy]
     result = simulator.create_portfolio(name, capital, start_date, config=config)
     portfolio_id = result['portfolio_id']
     
@@ -418,17 +724,23 @@ async def create_with_strategy(
     
     return RedirectResponse(url=f'/simulator/{portfolio_id}', status_code=303)
 
-@app.get("/simulator", response_class=HTMLResponse)
-async def simulator_page():
+@router.get("/simulator", response_class=HTMLResponse)
+async def simulator_page(request: Request):
     """Portfolio simulator (reuse existing)"""
-    portfolios = simulator.list_portfolios()
+    return cached_html(request, 'simulator', simulator.portfolios_version(), render_simulator_page)
+
+def render_simulator_page():
+    portfolios = simulator.list_portfolio_summaries()
     
     portfolios_html = ""
     if portfolios:
         for p in portfolios:
-            portfolio_id, name, initial, current, start, end, mode = p
-            return_pct = ((current - initial) / initial) * 100
+            portfolio_id, name, initial, start, end = p['id'], p['name'], p['initial_capital'], p['start_date'], p['end_date']
+            current = p['final_value'] if p['final_value'] is not None else p['current_capital']
+            return_pct = p['return_pct'] if p['return_pct'] is not None else ((current - initial) / initial) * 100
             return_class = 'positive' if return_pct > 0 else 'negative'
+            max_dd = f"{p['max_drawdown_pct']:.1f}%" if p['max_drawdown_pct'] is not None else '-'
+            sharpe = f"{p['sharpe']:.2f}" if p['sharpe'] is not None else '-'
             status_badge = 'badge-open' if not end else 'badge-closed'
             status_text = 'En cours' if not end else 'Terminé'
             
@@ -438,6 +750,9 @@ async def simulator_page():
                 <td>${initial:,.0f}</td>
                 <td>${current:,.0f}</td>
                 <td class="{return_class}">{return_pct:+.2f}%</td>
+                <td>{max_dd}</td>
+                <td>{sharpe}</td>
+                <td>{p['num_trades'] if p['num_trades'] is not None else '-'}</td>
                 <td>{start}</td>
                 <td>{end or '-'}</td>
                 <td><span class="badge {status_badge}">{status_text}</span></td>
@@ -456,7 +771,7 @@ async def simulator_page():
             </tr>
             """
     else:
-        portfolios_html = '<tr><td colspan="8" style="text-align: center; color: #94a3b8;">Aucun portfolio créé</td></tr>'
+        portfolios_html = '<tr><td colspan="11" style="text-align: center; color: #94a3b8;">Aucun portfolio créé</td></tr>'
     
     return f"""
     <!DOCTYPE html>
@@ -486,6 +801,9 @@ async def simulator_page():
                             <th>Capital Initial</th>
                             <th>Valeur Actuelle</th>
                             <th>Return</th>
+                            <th>Max DD</th>
+                            <th>Sharpe</th>
+                            <th>Trades</th>
                             <th>Début</th>
                             <th>Fin</th>
                             <th>Statut</th>
@@ -502,13 +820,13 @@ async def simulator_page():
     </html>
     """
 
-@app.post("/simulator/run")
+@router.post("/simulator/run")
 async def run_simulation(portfolio_id: int = Form(...)):
     """Run portfolio simulation"""
     result = simulator.run_simulation(portfolio_id)
     return RedirectResponse(url=f'/simulator/{portfolio_id}', status_code=303)
 
-@app.post("/simulator/delete/{portfolio_id}")
+@router.post("/simulator/delete/{portfolio_id}")
 async def delete_portfolio(portfolio_id: int):
     """Delete a single portfolio"""
     import sqlite3
@@ -525,6 +843,7 @@ async def delete_portfolio(portfolio_id: int):
         
         # Delete snapshots
         cursor.execute('DELETE FROM snapshots WHERE portfolio_id = ?', (portfolio_id,))
+        cursor.execute('DELETE FROM portfolio_summary WHERE portfolio_id = ?', (portfolio_id,))
         
         # Delete portfolio
         cursor.execute('DELETE FROM portfolios WHERE id = ?', (portfolio_id,))
@@ -535,7 +854,7 @@ async def delete_portfolio(portfolio_id: int):
     
     return RedirectResponse(url='/simulator', status_code=303)
 
-@app.post("/simulator/delete-all")
+@router.post("/simulator/delete-all")
 async def delete_all_portfolios():
     """Delete all portfolios"""
     import sqlite3
@@ -552,6 +871,7 @@ async def delete_all_portfolios():
         
         # Delete all snapshots
         cursor.execute('DELETE FROM snapshots')
+        cursor.execute('DELETE FROM portfolio_summary')
         
         # Delete all portfolios
         cursor.execute('DELETE FROM portfolios')
@@ -562,16 +882,103 @@ async def delete_all_portfolios():
     
     return RedirectResponse(url='/simulator', status_code=303)
 
-@app.get("/simulator/{portfolio_id}", response_class=HTMLResponse)
-async def portfolio_details(portfolio_id: int):
+@router.get("/api/simulator/{portfolio_id}/equity")
+def api_equity_curve(request: Request, portfolio_id: int, points: int = 500, start: str = None, end: str = None):
+    """Equity curve as JSON, LTTB-downsampled to `points`, optionally restricted to [start, end]"""
+    points = max(3, min(points, 5000))
+    version = simulator.equity_version(portfolio_id)
+    if version is None:
+        return JSONResponse({'error': 'Portfolio not found'}, status_code=404)
+    
+    headers = {'ETag': make_etag(('equity', portfolio_id, points, start, end), version), 'Cache-Control': 'no-cache'}
+    if etag_matches(request.headers.get('if-none-match'), headers['ETag']):
+        return Response(status_code=304, headers=headers)
+    
+    dates, values, returns = simulator.get_equity_curve(portfolio_id, start, end)
+    keep = downsample_dates(dates, values, points) if dates else []
+    return JSONResponse({
+        'portfolio_id': portfolio_id,
+        'initial': version[3],
+        'total_points': len(dates),
+        'labels': [dates[i] for i in keep],
+        'values': [values[i] for i in keep],
+        'returns': [returns[i] for i in keep]
+    }, headers=headers)
+
+# URL segment -> listings.LISTINGS name
+SIM_LISTINGS = {'trades': 'sim_trades', 'positions': 'sim_positions'}
+LIVE_LISTINGS = {'trades': 'live_trades', 'positions': 'live_positions', 'signals': 'live_signals'}
+
+def listing_page(db_path, listing, scope_id=None, **params):
+    """Keyset page as JSON; 400 on a malformed cursor or date"""
+    try:
+        return JSONResponse(listings.page(db_path, listing, scope_id, **params))
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+def listing_export(db_path, listing, fmt, filename, scope_id=None, **filters):
+    """Stream a whole listing as CSV/NDJSON, rows written as they are read"""
+    if fmt not in listings.EXPORT_FORMATS:
+        return JSONResponse({'error': f'format must be one of {sorted(listings.EXPORT_FORMATS)}'}, status_code=400)
+    try:
+        chunks, media_type = listings.export(db_path, listing, fmt, scope_id=scope_id, **filters)
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+    return StreamingResponse(chunks, media_type=media_type,
+                             headers={'Content-Disposition': f'attachment; filename="{filename}.{fmt}"'})
+
+@router.get("/api/simulator/{portfolio_id}/{kind}")
+async def api_simulator_listing(portfolio_id: int, kind: str, start: str = None, end: str = None, after: str = None,
+                                limit: int = listings.DEFAULT_LIMIT, desc: bool = False, status: str = None):
+    """Trades or positions of a portfolio, keyset-paginated (pass next_cursor back as `after`)"""
+    if kind not in SIM_LISTINGS:
+        return JSONResponse({'error': f'Unknown listing: {kind}'}, status_code=404)
+    return listing_page(simulator.db_path, SIM_LISTINGS[kind], portfolio_id, start=start, end=end, after=after,
+                        limit=limit, desc=desc, status=status if kind == 'positions' else None)
+
+@router.get("/api/simulator/{portfolio_id}/{kind}/export")
+async def export_simulator_listing(portfolio_id: int, kind: str, format: str = 'csv', start: str = None,
+                                   end: str = None, desc: bool = False):
+    """Full trade or position history of a portfolio as streamed CSV/NDJSON"""
+    if kind not in SIM_LISTINGS:
+        return JSONResponse({'error': f'Unknown listing: {kind}'}, status_code=404)
+    return listing_export(simulator.db_path, SIM_LISTINGS[kind], format, f'portfolio_{portfolio_id}_{kind}',
+                          portfolio_id, start=start, end=end, desc=desc)
+
+@router.get("/api/live/{kind}")
+async def api_live_listing(kind: str, start: str = None, end: str = None, after: str = None,
+                           limit: int = listings.DEFAULT_LIMIT, desc: bool = True):
+    """Live trades, positions or signals, newest first by default"""
+    if kind not in LIVE_LISTINGS:
+        return JSONResponse({'error': f'Unknown listing: {kind}'}, status_code=404)
+    return listing_page(live_monitor.db_path, LIVE_LISTINGS[kind], start=start, end=end, after=after,
+                        limit=limit, desc=desc)
+
+@router.get("/api/live/{kind}/export")
+async def export_live_listing(kind: str, format: str = 'csv', start: str = None, end: str = None, desc: bool = True):
+    """Full live trade/position/signal history as streamed CSV/NDJSON"""
+    if kind not in LIVE_LISTINGS:
+        return JSONResponse({'error': f'Unknown listing: {kind}'}, status_code=404)
+    return listing_export(live_monitor.db_path, LIVE_LISTINGS[kind], format, f'live_{kind}',
+                          start=start, end=end, desc=desc)
+
+@router.get("/simulator/{portfolio_id}", response_class=HTMLResponse)
+async def portfolio_details(request: Request, portfolio_id: int):
     """Portfolio details with Chart.js"""
+    revision = simulator.portfolio_revision(portfolio_id)
+    if revision is None:
+        return HTMLResponse('<div class="error">Portfolio not found</div>', status_code=404)
+    return cached_html(request, f'simulator/{portfolio_id}', revision,
+                       lambda: render_portfolio_details(portfolio_id))
+
+def render_portfolio_details(portfolio_id):
     import sqlite3
     
     conn = sqlite3.connect(simulator.db_path)
     cursor = conn.cursor()
     
     # Get portfolio
-    cursor.execute('SELECT * FROM portfolios WHERE id = ?', (portfolio_id,))
+    cursor.execute(f'SELECT {PORTFOLIO_COLUMNS} FROM portfolios WHERE id = ?', (portfolio_id,))
     portfolio = cursor.fetchone()
     
     if not portfolio:
@@ -582,23 +989,26 @@ async def portfolio_details(portfolio_id: int):
     return_pct = ((current - initial) / initial) * 100
     return_class = 'positive' if return_pct > 0 else 'negative'
     
-    # Get snapshots for chart
-    cursor.execute('SELECT date, total_value, total_return_pct FROM snapshots WHERE portfolio_id = ? ORDER BY date', (portfolio_id,))
-    snapshots = cursor.fetchall()
-    
     conn.close()
     
-    # Prepare Chart.js data
-    chart_dates = [s[0] for s in snapshots]
-    chart_values = [s[1] for s in snapshots]
-    chart_returns = [s[2] for s in snapshots]
-    
-    chart_data_json = json.dumps({
-        'labels': chart_dates,
-        'values': chart_values,
-        'returns': chart_returns,
-        'initial': initial
-    })
+    # Bootstrap of the equity curve: computed once per portfolio revision (the page is cached)
+    mc = simulator.monte_carlo(portfolio_id, initial)
+    mc_html = ''
+    if mc:
+        r, dd = mc['return_pct'], mc['max_drawdown_pct']
+        mc_html = f"""
+                    <div class="metric">
+                        <div class="metric-label">Return IC {mc['confidence']:.0%}</div>
+                        <div class="metric-value">{r['low']:+.1f}% … {r['high']:+.1f}%</div>
+                    </div>
+                    <div class="metric">
+                        <div class="metric-label">Drawdown max IC {mc['confidence']:.0%}</div>
+                        <div class="metric-value negative">{dd['low']:.1f}% … {dd['high']:.1f}%</div>
+                    </div>
+                    <div class="metric">
+                        <div class="metric-label">Probabilité de perte</div>
+                        <div class="metric-value">{mc['prob_loss_pct']:.0f}%</div>
+                    </div>"""
     
     return f"""
     <!DOCTYPE html>
@@ -629,15 +1039,43 @@ async def portfolio_details(portfolio_id: int):
                     <div class="metric">
                         <div class="metric-label">Return Total</div>
                         <div class="metric-value {return_class}">{return_pct:+.2f}%</div>
-                    </div>
+                    </div>{mc_html}
                 </div>
+                {f'<div style="color: #94a3b8; font-size: 0.85em;">Monte Carlo : {mc["paths"]:,} trajectoires (bootstrap par blocs des rendements quotidiens)</div>' if mc else ''}
             </div>
             
             <div class="card">
-                <div class="card-header">📈 Courbe de performance</div>
+                <div class="card-header" style="display: flex; justify-content: space-between; align-items: center;">
+                    <span>📈 Courbe de performance</span>
+                    <span id="rangeButtons">
+                        <button class="btn-secondary" data-months="3">3M</button>
+                        <button class="btn-secondary" data-months="12">1A</button>
+                        <button class="btn-secondary" data-months="36">3A</button>
+                        <button class="btn-primary" data-months="0">Tout</button>
+                    </span>
+                </div>
                 <div class="chart-container">
                     <canvas id="performanceChart"></canvas>
                 </div>
+                <div id="chartInfo" style="color: #94a3b8; font-size: 0.85em;"></div>
+            </div>
+            
+            <div class="card">
+                <div class="card-header" style="display: flex; justify-content: space-between; align-items: center;">
+                    <span>📜 Trades</span>
+                    <span style="font-size: 0.6em;">
+                        <a href="/api/simulator/{portfolio_id}/trades/export?format=csv" style="color: #667eea;">⬇️ CSV</a>
+                        · <a href="/api/simulator/{portfolio_id}/trades/export?format=ndjson" style="color: #667eea;">NDJSON</a>
+                        · <a href="/api/simulator/{portfolio_id}/positions/export?format=csv" style="color: #667eea;">Positions CSV</a>
+                    </span>
+                </div>
+                <table>
+                    <thead><tr><th>Date</th><th>Action</th><th>Ticker</th><th>Prix</th><th>Shares</th><th>Valeur</th><th>Score</th></tr></thead>
+                    <tbody id="tradesBody"></tbody>
+                </table>
+                <div style="text-align: center; margin-top: 15px;">
+                    <button id="moreTrades" class="btn-secondary" style="display: none;">Plus de trades</button>
+                </div>
             </div>
             
             <div style="text-align: center; margin: 30px 0;">
@@ -646,116 +1084,294 @@ async def portfolio_details(portfolio_id: int):
         </div>
         
         <script>
-            const chartData = {chart_data_json};
             const ctx = document.getElementById('performanceChart');
             
-            new Chart(ctx, {{
-                type: 'line',
-                data: {{
-                    labels: chartData.labels,
-                    datasets: [{{
-                        label: 'Valeur du portfolio',
-                        data: chartData.values,
-                        borderColor: '#667eea',
-                        backgroundColor: '#667eea20',
-                        fill: true,
-                        tension: 0.4
-                    }}, {{
-                        label: 'Capital initial',
-                        data: Array(chartData.labels.length).fill(chartData.initial),
-                        borderColor: '#94a3b8',
-                        borderDash: [5, 5],
-                        fill: false,
-                        pointRadius: 0
-                    }}]
-                }},
-                options: {{
-                    responsive: true,
-                    maintainAspectRatio: false,
-                    plugins: {{
-                        legend: {{
-                            labels: {{ color: '#e2e8f0' }}
-                        }}
+            // Trades are fetched one keyset page at a time, newest first
+            let tradesCursor = null;
+            async function loadTrades() {{
+                const params = new URLSearchParams({{limit: 50, desc: true}});
+                if (tradesCursor) params.set('after', tradesCursor);
+                const response = await fetch('/api/simulator/{portfolio_id}/trades?' + params);
+                const page = await response.json();
+                const body = document.getElementById('tradesBody');
+                for (const t of page.items) {{
+                    const row = body.insertRow();
+                    const color = t.action === 'BUY' ? '#10b981' : '#ef4444';
+                    [t.date, t.action, t.ticker, '$' + t.price.toFixed(2), t.shares, '$' + t.value.toFixed(2),
+                     t.score == null ? '-' : t.score.toFixed(1)].forEach((value, i) => {{
+                        const cell = row.insertCell();
+                        cell.textContent = value;
+                        if (i === 1) cell.style.color = color;
+                    }});
+                }}
+                tradesCursor = page.next_cursor;
+                document.getElementById('moreTrades').style.display = tradesCursor ? '' : 'none';
+            }}
+            document.getElementById('moreTrades').addEventListener('click', loadTrades);
+            loadTrades();
+            let chart = null;
+            let lastDate = null;  // Ranges count back from the last simulated day, not from today
+            
+            // Series come from the JSON API, downsampled server-side to about one point per pixel
+            async function loadChart(months) {{
+                const params = new URLSearchParams({{points: Math.max(50, Math.min(2000, ctx.clientWidth || 800))}});
+                if (months > 0 && lastDate) {{
+                    const start = new Date(lastDate);
+                    start.setMonth(start.getMonth() - months);
+                    params.set('start', start.toISOString().slice(0, 10));
+                }}
+                const response = await fetch('/api/simulator/{portfolio_id}/equity?' + params);
+                const chartData = await response.json();
+                if (months === 0 && chartData.labels.length) lastDate = chartData.labels[chartData.labels.length - 1];
+                document.getElementById('chartInfo').textContent =
+                    chartData.labels.length + ' points affichés sur ' + chartData.total_points;
+                
+                if (chart) {{
+                    chart.data.labels = chartData.labels;
+                    chart.data.datasets[0].data = chartData.values;
+                    chart.data.datasets[1].data = Array(chartData.labels.length).fill(chartData.initial);
+                    chart.update();
+                    return;
+                }}
+                chart = new Chart(ctx, {{
+                    type: 'line',
+                    data: {{
+                        labels: chartData.labels,
+                        datasets: [{{
+                            label: 'Valeur du portfolio',
+                            data: chartData.values,
+                            borderColor: '#667eea',
+                            backgroundColor: '#667eea20',
+                            fill: true,
+                            tension: 0.4,
+                            pointRadius: 0
+                        }}, {{
+                            label: 'Capital initial',
+                            data: Array(chartData.labels.length).fill(chartData.initial),
+                            borderColor: '#94a3b8',
+                            borderDash: [5, 5],
+                            fill: false,
+                            pointRadius: 0
+                        }}]
                     }},
-                    scales: {{
-                        x: {{
-                            ticks: {{ color: '#94a3b8' }},
-                            grid: {{ color: '#334155' }}
+                    options: {{
+                        responsive: true,
+                        maintainAspectRatio: false,
+                        plugins: {{
+                            legend: {{
+                                labels: {{ color: '#e2e8f0' }}
+                            }}
                         }},
-                        y: {{
-                            ticks: {{ 
-                                color: '#94a3b8',
-                                callback: function(value) {{
-                                    return '$' + value.toLocaleString();
-                                }}
+                        scales: {{
+                            x: {{
+                                ticks: {{ color: '#94a3b8' }},
+                                grid: {{ color: '#334155' }}
                             }},
-                            grid: {{ color: '#334155' }}
+                            y: {{
+                                ticks: {{ 
+                                    color: '#94a3b8',
+                                    callback: function(value) {{
+                                        return '$' + value.toLocaleString();
+                                    }}
+                                }},
+                                grid: {{ color: '#334155' }}
+                            }}
                         }}
                     }}
-                }}
+                }});
+            }}
+            
+            document.querySelectorAll('#rangeButtons button').forEach(button => {{
+                button.addEventListener('click', () => {{
+                    document.querySelectorAll('#rangeButtons button').forEach(b => b.className = 'btn-secondary');
+                    button.className = 'btn-primary';
+                    loadChart(parseInt(button.dataset.months));
+                }});
             }});
+            loadChart(0);
         </script>
     </body>
     </html>
     """
 
-@app.get("/live", response_class=HTMLResponse)
-async def live_trading():
+COMPARE_COLORS = ['#667eea', '#10b981', '#f59e0b', '#ef4444', '#06b6d4', '#a855f7', '#84cc16', '#ec4899', '#94a3b8', '#f97316']
+
+@router.get("/compare", response_class=HTMLResponse)
+def compare_page(start: str = '', end: str = '', capital: float = 10000, points: int = 400):
+    """All strategies of strategies.json simulated side by side in one pass (sync: runs in the threadpool)"""
+    strategies = get_strategies()
+    results_html = "<p style='color: #94a3b8;'>Choisir une période pour comparer les stratégies</p>"
+    chart_js = ""
+    error = None
+    
+    if start:
+        try:
+            start_day = datetime.strptime(start, '%Y-%m-%d')
+            end_day = datetime.strptime(end, '%Y-%m-%d') if end else datetime.now()
+        except ValueError:
+            error = "Dates invalides (format attendu : AAAA-MM-JJ)"
+        else:
+            if start_day > end_day:
+                error = "La date de début est postérieure à la date de fin"
+            elif not 0 < capital < float('inf'):
+                error = "Le capital doit être strictement positif"
+    
+    if error:
+        results_html = f"<p style='color: #ef4444;'>{html_lib.escape(error)}</p>"
+    elif start:
+        started = time.perf_counter()
+        runs = simulator.simulate_strategies(strategies, start, end or None, initial_capital=capital, equity_curve=True)
+        elapsed = time.perf_counter() - started
+        if 'error' in runs:
+            results_html = f"<p style='color: #ef4444;'>{html_lib.escape(runs['error'])}</p>"
+        else:
+            ranked = sorted(runs.items(), key=lambda item: item[1]['return_pct'], reverse=True)
+            rows = []
+            for name, r in ranked:
+                return_class = 'positive' if r['return_pct'] > 0 else 'negative'
+                rows.append(f"""
+                <tr>
+                    <td><strong>{html_lib.escape(name)}</strong></td>
+                    <td>${r['final_value']:,.0f}</td>
+                    <td class="{return_class}">{r['return_pct']:+.2f}%</td>
+                    <td>{f"{r['cagr_pct']:+.2f}%" if r['cagr_pct'] is not None else '-'}</td>
+                    <td>{r['max_drawdown_pct']:.1f}%</td>
+                    <td>{f"{r['sharpe']:.2f}" if r['sharpe'] is not None else '-'}</td>
+                    <td>{r['trades_made']}</td>
+                    <td>{r['win_rate']:.1f}%</td>
+                </tr>
+                """)
+            results_html = f"""
+            <p style="color: #94a3b8;">{len(runs)} stratégies simulées en une passe ({elapsed:.1f}s)</p>
+            <table>
+                <thead><tr><th>Stratégie</th><th>Valeur finale</th><th>Return</th><th>CAGR</th><th>Max DD</th><th>Sharpe</th><th>Trades</th><th>Win rate</th></tr></thead>
+                <tbody>{''.join(rows)}</tbody>
+            </table>
+            """
+            
+            # All strategies share the same date index: keep the union of each curve's LTTB points
+            dates = [d for d, _ in ranked[0][1]['equity_curve']] if ranked else []
+            keep = set()
+            for _, r in ranked:
+                if dates:
+                    keep.update(downsample_dates(dates, [v for _, v in r['equity_curve']], max(3, points)).tolist())
+            keep = sorted(keep)
+            datasets = [{
+                'label': name,
+                'data': [r['equity_curve'][i][1] for i in keep],
+                'borderColor': COMPARE_COLORS[n % len(COMPARE_COLORS)],
+                'fill': False,
+                'tension': 0.2,
+                'pointRadius': 0
+            } for n, (name, r) in enumerate(ranked)]
+            chart_js = f"""
+            <script>
+                new Chart(document.getElementById('compareChart'), {{
+                    type: 'line',
+                    data: {{ labels: {json.dumps([dates[i] for i in keep])}, datasets: {json.dumps(datasets)} }},
+                    options: {{
+                        responsive: true,
+                        maintainAspectRatio: false,
+                        plugins: {{ legend: {{ labels: {{ color: '#e2e8f0' }} }} }},
+                        scales: {{
+                            x: {{ ticks: {{ color: '#94a3b8' }}, grid: {{ color: '#334155' }} }},
+                            y: {{ ticks: {{ color: '#94a3b8' }}, grid: {{ color: '#334155' }} }}
+                        }}
+                    }}
+                }});
+            </script>
+            """
+    
+    page = f"""
+    <!DOCTYPE html>
+    <html lang="fr">
+    <head>
+        <title>Comparer les stratégies 📈</title>
+        {COMMON_HEAD}
+    </head>
+    <body>
+        <div class="container">
+            <header>
+                <h1>📈 Comparaison des stratégies</h1>
+                <p>{len(strategies)} stratégies, mêmes données, une seule passe</p>
+            </header>
+            {generate_nav('compare')}
+            <div class="card">
+                <div class="card-header">Période</div>
+                <form method="get" action="/compare">
+                    <div class="input-group">
+                        <input type="date" name="start" value="{html_lib.escape(start)}" required />
+                        <input type="date" name="end" value="{html_lib.escape(end)}" />
+                        <input type="number" name="capital" value="{capital:.0f}" min="1000" step="1000" />
+                        <button type="submit" class="btn-primary">Comparer</button>
+                    </div>
+                </form>
+            </div>
+            <div class="card">
+                <div class="card-header">Résultats</div>
+                {results_html}
+                {'<div class="chart-container"><canvas id="compareChart"></canvas></div>' if chart_js else ''}
+            </div>
+        </div>
+        {chart_js}
+    </body>
+    </html>
+    """
+    return HTMLResponse(page, status_code=400 if error else 200)
+
+@router.get("/live", response_class=HTMLResponse)
+def live_trading():
     """Live trading dashboard"""
     try:
-        from live_monitor import LiveMonitor
-        import sqlite3
-        
         # Load config
         with open(CONFIG_PATH, 'r') as f:
             config = json.load(f)
         watchlist = config['watchlist']
         
-        # Get live portfolio state
-        monitor = LiveMonitor()
-        monitor.update_positions_prices(watchlist)
-        monitor.calculate_total_value()
-        state = monitor.get_portfolio_state()
+        # Get live portfolio state (warm frames: only new bars are downloaded)
+        monitor = live_monitor
+        with live_lock:
+            monitor.refresh_frames(watchlist)
+            monitor.update_positions_prices(watchlist)
+            monitor.calculate_total_value()
+            state = monitor.get_portfolio_state()
         
         initial = 10000
         pnl = state['total_value'] - initial
         pnl_pct = (pnl / initial) * 100
         
-        # Get recent trades
-        conn = sqlite3.connect(monitor.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT ticker, action, shares, price, reason, timestamp, pnl
-            FROM trades
-            ORDER BY timestamp DESC
-            LIMIT 10
-        ''')
-        recent_trades = cursor.fetchall()
-        conn.close()
+        # Recent trades: first keyset page, the rest via /api/live/trades and the export
+        recent_trades = listings.page(monitor.db_path, 'live_trades', limit=10, desc=True)['items']
         
         # Build trades table HTML
-        trades_html = ""
         if recent_trades:
-            trades_html = "<table><thead><tr><th>Date</th><th>Action</th><th>Ticker</th><th>Shares</th><th>Prix</th><th>Raison</th><th>P&L</th></tr></thead><tbody>"
+            rows = []
             for trade in recent_trades:
-                ticker, action, shares, price, reason, timestamp, pnl_trade = trade
+                action, pnl_trade = trade['action'], trade['pnl']
                 action_color = '#10b981' if action == 'BUY' else '#ef4444'
                 pnl_display = f"${pnl_trade:+.2f}" if pnl_trade else "-"
                 pnl_class = 'positive' if (pnl_trade and pnl_trade > 0) else 'negative' if pnl_trade else ''
-                date_str = datetime.fromisoformat(timestamp).strftime('%Y-%m-%d %H:%M')
+                date_str = datetime.fromisoformat(trade['timestamp']).strftime('%Y-%m-%d %H:%M')
                 
-                trades_html += f"""
+                rows.append(f"""
                 <tr>
                     <td>{date_str}</td>
                     <td style="color: {action_color}; font-weight: bold;">{action}</td>
-                    <td>{ticker}</td>
-                    <td>{shares}</td>
-                    <td>${price:.2f}</td>
-                    <td>{reason}</td>
+                    <td>{trade['ticker']}</td>
+                    <td>{trade['shares']}</td>
+                    <td>${trade['price']:.2f}</td>
+                    <td>{trade['reason']}</td>
                     <td class="{pnl_class}">{pnl_display}</td>
                 </tr>
-                """
-            trades_html += "</tbody></table>"
+                """)
+            trades_html = ("<table><thead><tr><th>Date</th><th>Action</th><th>Ticker</th><th>Shares</th><th>Prix</th>"
+                           "<th>Raison</th><th>P&L</th></tr></thead><tbody>" + ''.join(rows) + "</tbody></table>")
+            trades_html += """
+                <p style="margin-top: 15px; font-size: 0.9em;">
+                    <a href="/api/live/trades/export?format=csv" style="color: #667eea;">⬇️ Exporter tout (CSV)</a>
+                    · <a href="/api/live/trades/export?format=ndjson" style="color: #667eea;">NDJSON</a>
+                </p>
+            """
         else:
             trades_html = "<p>Aucun trade enregistré</p>"
         
@@ -783,7 +1399,8 @@ async def live_trading():
         # Analyze current signals
         signals_html = ""
         try:
-            signals = monitor.analyze_market(watchlist)
+            with live_lock:
+                signals = monitor.analyze_market(watchlist, config=config)
             if signals:
                 signals_html = "<table><thead><tr><th>Ticker</th><th>Action</th><th>Score</th><th>Prix</th><th>Raison</th></tr></thead><tbody>"
                 for sig in signals:
@@ -908,51 +1525,34 @@ async def live_trading():
     </html>
     """
 
-@app.post("/live/execute")
-async def execute_live_signals():
+@router.post("/live/execute")
+def execute_live_signals():
     """Execute current signals"""
     try:
-        from live_monitor import LiveMonitor
-        
         with open(CONFIG_PATH, 'r') as f:
             config = json.load(f)
-        watchlist = config['watchlist']
         
-        monitor = LiveMonitor()
-        monitor.update_positions_prices(watchlist)
-        signals = monitor.analyze_market(watchlist)
-        
-        results = []
-        for signal in signals:
-            result = monitor.execute_signal(signal)
-            results.append(result)
-        
-        monitor.calculate_total_value()
+        with live_lock:
+            live_monitor.run_cycle(config, execute=True)
         
         return RedirectResponse(url='/live', status_code=303)
     except Exception as e:
         return HTMLResponse(f"<html><body><h1>Erreur</h1><p>{str(e)}</p><a href='/live'>Retour</a></body></html>")
 
-@app.post("/live/reset")
-async def reset_live_portfolio():
+@router.post("/live/reset")
+def reset_live_portfolio():
     """Reset live portfolio"""
     try:
-        import os
-        from live_monitor import LiveMonitor
-        
-        monitor = LiveMonitor()
-        if os.path.exists(monitor.db_path):
-            os.remove(monitor.db_path)
-        
-        # Recreate empty portfolio
-        monitor = LiveMonitor()
+        with live_lock:
+            remove_database(live_monitor.db_path)
+            
+            # Recreate empty portfolio
+            live_monitor._init_db()
         
         return RedirectResponse(url='/live', status_code=303)
     except Exception as e:
         return HTMLResponse(f"<html><body><h1>Erreur</h1><p>{str(e)}</p><a href='/live'>Retour</a></body></html>")
 
-CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config.json')
-
 def load_config():
     with open(CONFIG_PATH, 'r') as f:
         return json.load(f)
@@ -961,7 +1561,7 @@ def save_config(config):
     with open(CONFIG_PATH, 'w') as f:
         json.dump(config, f, indent=2)
 
-@app.get("/settings/telegram", response_class=HTMLResponse)
+@router.get("/settings/telegram", response_class=HTMLResponse)
 async def telegram_settings():
     """Telegram configuration page"""
     config = load_config()
@@ -1135,7 +1735,7 @@ async def telegram_settings():
     </html>
     """
 
-@app.post("/settings/telegram/save")
+@router.post("/settings/telegram/save")
 async def save_telegram_settings(
     bot_token: str = Form(''),
     chat_id: str = Form(''),
@@ -1158,7 +1758,7 @@ async def save_telegram_settings(
     except Exception as e:
         return JSONResponse({'success': False, 'message': f'Erreur: {str(e)}'})
 
-@app.post("/settings/telegram/test")
+@router.post("/settings/telegram/test")
 async def test_telegram_notification(
     bot_token: str = Form(''),
     chat_id: str = Form('')
@@ -1199,18 +1799,21 @@ async def test_telegram_notification(
         return JSONResponse({'success': False, 'message': str(e)})
 
 
+app = create_app()
+
 def main():
     import argparse
     parser = argparse.ArgumentParser()
     parser.add_argument('--port', type=int, default=8080)
     parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--preload', action='store_true', help='Warm the watchlist before reporting ready')
     args = parser.parse_args()
     
     print(f"\n🚀 Starting Advanced Market Analyzer Dashboard...")
     print(f"📍 http://0.0.0.0:{args.port}")
     print(f"\n💡 Press Ctrl+C to stop\n")
     
-    uvicorn.run(app, host=args.host, port=args.port, log_level="info")
+    uvicorn.run(create_app(preload=args.preload or None), host=args.host, port=args.port, log_level="info")
 
 if __name__ == '__main__':
     main()
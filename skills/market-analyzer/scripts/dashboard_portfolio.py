@@ -8,7 +8,7 @@ from fastapi.responses import HTMLResponse, RedirectResponse
 import uvicorn
 from analyzer import MarketAnalyzer
 from backtest import Backtester
-from portfolio_sim import PortfolioSimulator
+from portfolio_sim import PortfolioSimulator, PORTFOLIO_COLUMNS
 import json
 from datetime import datetime, timedelta
 
@@ -228,7 +228,7 @@ async def portfolio_details(portfolio_id: int):
     cursor = conn.cursor()
     
     # Get portfolio
-    cursor.execute('SELECT * FROM portfolios WHERE id = ?', (portfolio_id,))
+    cursor.execute(f'SELECT {PORTFOLIO_COLUMNS} FROM portfolios WHERE id = ?', (portfolio_id,))
     portfolio = cursor.fetchone()
     
     if not portfolio:
@@ -277,9 +277,7 @@ async def portfolio_details(portfolio_id: int):
             
             # Get current price
             try:
-                import yfinance as yf
-                stock = yf.Ticker(ticker)
-                hist = stock.history(period='1d')
+                hist = simulator.provider.history(ticker, period='1d')
                 if not hist.empty:
                     current_price = hist['Close'].iloc[-1]
                     current_value = shares * current_price
@@ -3,17 +3,40 @@
 Data Cache - Local cache for Yahoo Finance data to avoid rate limits
 """
 
-import yfinance as yf
+import os
 import sqlite3
-import pandas as pd
 from datetime import datetime, timedelta
 import time
+import trading_calendar
+from telemetry import CACHE_REQUESTS, RATE_LIMIT_WAIT, SQLITE_QUERY_DURATION
+
+DEFAULT_DB = 'data_cache.db'
+# Providers serving real market data share DEFAULT_DB; synthetic or replayed bars get their own
+# file, so they are never mistaken for cached real prices by a later live run
+REAL_DATA_PROVIDERS = ('yfinance', 'record')
+COVERAGE_THRESHOLD = 0.9  # Share of the range's sessions that must be cached to skip a download
+
+
+def default_db_path(provider_name=None):
+    """Cache database of a provider (default: the one selected by MARKET_DATA_PROVIDER)"""
+    name = (provider_name or os.environ.get('MARKET_DATA_PROVIDER', 'yfinance')).lower()
+    return DEFAULT_DB if name in REAL_DATA_PROVIDERS else f'data_cache.{name}.db'
+
 
 class DataCache:
-    def __init__(self, db_path='data_cache.db'):
-        self.db_path = db_path
+    def __init__(self, db_path=None, provider=None):
+        self.db_path = db_path or default_db_path(provider.name if provider is not None else None)
+        self._provider = provider
         self.init_db()
     
+    @property
+    def provider(self):
+        """Market data provider, built on first download (keeps read-only commands light)"""
+        if self._provider is None:
+            from data_provider import get_provider
+            self._provider = get_provider()
+        return self._provider
+    
     def init_db(self):
         """Initialize cache database"""
         conn = sqlite3.connect(self.db_path)
@@ -46,63 +69,76 @@ class DataCache:
         conn.commit()
         conn.close()
     
-    def fetch_and_cache(self, ticker, start_date, end_date, force_refresh=False):
-        """Fetch data from Yahoo Finance and cache it"""
+    def fetch_and_cache(self, ticker, start_date, end_date, force_refresh=False, include_info=True):
+        """Fetch data from Yahoo Finance and cache it (include_info=False: prices only)"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
         try:
+            # Sessions the range can have bars for (none in the future)
+            expected_days = trading_calendar.count_sessions(start_date, min(end_date, datetime.now()))
+            if expected_days == 0:
+                # Market closed over the whole range: nothing to download
+                CACHE_REQUESTS.inc(kind='fetch', result='hit')
+                return True
+            
             # Check if we already have this data
             if not force_refresh:
-                cursor.execute('''
-                    SELECT COUNT(*) FROM price_history 
-                    WHERE ticker = ? AND date BETWEEN ? AND ?
-                ''', (ticker, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')))
-                
-                count = cursor.fetchone()[0]
-                expected_days = (end_date - start_date).days
+                with SQLITE_QUERY_DURATION.time(operation='coverage_check'):
+                    cursor.execute('''
+                        SELECT COUNT(*) FROM price_history 
+                        WHERE ticker = ? AND date BETWEEN ? AND ?
+                    ''', (ticker, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')))
+                    
+                    count = cursor.fetchone()[0]
                 
-                # If we have most of the data, skip download
-                if count > expected_days * 0.7:  # 70% threshold
+                # If we have most of the sessions, skip download
+                if count >= expected_days * COVERAGE_THRESHOLD:
+                    CACHE_REQUESTS.inc(kind='fetch', result='hit')
                     return True
             
+            CACHE_REQUESTS.inc(kind='fetch', result='miss')
+            
             # Download from Yahoo Finance
             print(f"  📥 Downloading {ticker}...")
-            stock = yf.Ticker(ticker)
-            hist = stock.history(start=start_date, end=end_date + timedelta(days=1))
+            hist = self.provider.history(ticker, start=start_date, end=end_date + timedelta(days=1))
             
             if hist.empty:
                 print(f"  ⚠️  No data for {ticker}")
                 return False
             
             # Insert into cache
-            for date, row in hist.iterrows():
-                cursor.execute('''
-                    INSERT OR REPLACE INTO price_history (ticker, date, open, high, low, close, volume)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    ticker,
-                    date.strftime('%Y-%m-%d'),
-                    float(row['Open']),
-                    float(row['High']),
-                    float(row['Low']),
-                    float(row['Close']),
-                    int(row['Volume'])
-                ))
+            with SQLITE_QUERY_DURATION.time(operation='insert_history'):
+                for date, row in hist.iterrows():
+                    cursor.execute('''
+                        INSERT OR REPLACE INTO price_history (ticker, date, open, high, low, close, volume)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ''', (
+                        ticker,
+                        date.strftime('%Y-%m-%d'),
+                        float(row['Open']),
+                        float(row['High']),
+                        float(row['Low']),
+                        float(row['Close']),
+                        int(row['Volume'])
+                    ))
             
             # Cache stock info
-            info = stock.info
-            import json
-            cursor.execute('''
-                INSERT OR REPLACE INTO stock_info (ticker, info_json)
-                VALUES (?, ?)
-            ''', (ticker, json.dumps(info)))
+            if include_info:
+                info = self.provider.info(ticker)
+                import json
+                cursor.execute('''
+                    INSERT OR REPLACE INTO stock_info (ticker, info_json)
+                    VALUES (?, ?)
+                ''', (ticker, json.dumps(info)))
             
             conn.commit()
             print(f"  ✅ {ticker} cached ({len(hist)} days)")
             
             # Rate limit protection
-            time.sleep(0.5)  # 500ms between requests
+            if self.provider.request_delay:
+                time.sleep(self.provider.request_delay)  # 500ms between Yahoo requests
+                RATE_LIMIT_WAIT.inc(self.provider.request_delay)
             
             return True
             
@@ -114,6 +150,7 @@ class DataCache:
     
     def get_cached_data(self, ticker, start_date, end_date):
         """Get cached historical data"""
+        import pandas as pd
         conn = sqlite3.connect(self.db_path)
         
         try:
@@ -124,21 +161,23 @@ class DataCache:
                 ORDER BY date
             '''
             
-            df = pd.read_sql_query(
-                query,
-                conn,
-                params=(ticker, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
-            )
+            with SQLITE_QUERY_DURATION.time(operation='get_cached_data'):
+                df = pd.read_sql_query(
+                    query,
+                    conn,
+                    params=(ticker, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
+                )
+            CACHE_REQUESTS.inc(kind='history', result='miss' if df.empty else 'hit')
             
-            if df.empty:
-                # If we have a last close before/on start_date, likely weekend/holiday → skip API (avoids "No data" spam)
+            # Only a range with sessions can be missing data (weekends and holidays have no bars)
+            if df.empty and trading_calendar.count_sessions(start_date, end_date):
                 last_date, _ = self.get_last_close_before_or_on(ticker, start_date)
                 if last_date is None:
                     # No data at all, try API
                     if self.fetch_and_cache(ticker, start_date, end_date):
                         df = pd.read_sql_query(query, conn, params=(ticker, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')))
                 else:
-                    # We have history; missing date is probably non-trading day, don't call API
+                    # We have history; the ticker simply has no bar on this session, don't call API
                     pass
             
             if not df.empty:
@@ -151,10 +190,44 @@ class DataCache:
         finally:
             conn.close()
     
+    def get_cached_panel(self, tickers, start_date, end_date):
+        """
+        Get cached OHLCV for many tickers in one query, aligned on a common date index.
+        Returns {'Open', 'High', 'Low', 'Close', 'Volume'} -> DataFrame (dates x tickers);
+        tickers without cached data are absent from the columns.
+        """
+        import pandas as pd
+        conn = sqlite3.connect(self.db_path)
+        
+        try:
+            placeholders = ','.join('?' * len(tickers))
+            with SQLITE_QUERY_DURATION.time(operation='get_cached_panel'):
+                df = pd.read_sql_query(f'''
+                    SELECT ticker, date, open, high, low, close, volume
+                    FROM price_history
+                    WHERE ticker IN ({placeholders}) AND date BETWEEN ? AND ?
+                    ORDER BY date
+                ''', conn, params=(*tickers, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')))
+            
+            df['date'] = pd.to_datetime(df['date'])
+            if df.empty:
+                empty = pd.DataFrame(index=pd.DatetimeIndex([], name='date'), columns=pd.Index([], name='ticker'), dtype=float)
+                return {name: empty.copy() for name in ('Open', 'High', 'Low', 'Close', 'Volume')}
+            wide = df.pivot(index='date', columns='ticker')
+            present = [t for t in tickers if t in set(df['ticker'])]
+            
+            return {
+                name: wide[column].reindex(columns=present).astype(float)
+                for name, column in (('Open', 'open'), ('High', 'high'), ('Low', 'low'),
+                                     ('Close', 'close'), ('Volume', 'volume'))
+            }
+        finally:
+            conn.close()
+    
     def get_last_close_before_or_on(self, ticker, as_of_date):
         """
-        Return (date_str, close_price) for the last trading day on or before as_of_date.
-        Used when market is closed (weekend, holiday) to avoid valuing positions at 0.
+        Return (date_str, close_price) for the last cached bar on or before as_of_date.
+        Used when a ticker has no bar on a session (halt, late listing) to avoid valuing positions at 0.
         """
         conn = sqlite3.connect(self.db_path)
         try:
@@ -179,8 +252,10 @@ class DataCache:
         cursor = conn.cursor()
         
         try:
-            cursor.execute('SELECT info_json FROM stock_info WHERE ticker = ?', (ticker,))
-            row = cursor.fetchone()
+            with SQLITE_QUERY_DURATION.time(operation='get_cached_info'):
+                cursor.execute('SELECT info_json FROM stock_info WHERE ticker = ?', (ticker,))
+                row = cursor.fetchone()
+            CACHE_REQUESTS.inc(kind='info', result='hit' if row else 'miss')
             
             if row:
                 import json
@@ -189,8 +264,7 @@ class DataCache:
                 # Try to fetch from API
                 # FIX BUG-5: Catch specific Exception instead of bare except
                 try:
-                    stock = yf.Ticker(ticker)
-                    info = stock.info
+                    info = self.provider.info(ticker)
                     cursor.execute('''
                         INSERT OR REPLACE INTO stock_info (ticker, info_json)
                         VALUES (?, ?)
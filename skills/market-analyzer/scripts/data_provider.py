@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Data Provider - Pluggable source of market data (live, recorded, replayed or synthetic)
+
+Every engine fetches prices and fundamentals through a provider instead of calling
+yfinance directly, so runs can be recorded once and replayed offline, or benchmarked
+deterministically on synthetic universes of any size.
+
+Select the provider with environment variables:
+    MARKET_DATA_PROVIDER = yfinance (default) | record | replay | synthetic
+    MARKET_DATA_DIR      = recordings directory for record/replay (default: market_data)
+    MARKET_DATA_SEED     = seed for the synthetic provider (default: 42)
+"""
+
+import os
+import re
+import json
+import zlib
+from abc import ABC, abstractmethod
+import pandas as pd
+import numpy as np
+from datetime import datetime, timedelta
+from telemetry import PROVIDER_REQUESTS
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+DEFAULT_RECORDINGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'market_data')
+
+
+def period_to_start(period, end_date):
+    """Convert a yfinance-style period ('5d', '6mo', '2y', 'max') to a start date"""
+    if period == 'max':
+        return datetime(1970, 1, 1)
+    match = re.fullmatch(r'(\d+)(d|wk|mo|y)', period)
+    if not match:
+        raise ValueError(f"Unsupported period: {period}")
+    count, unit = int(match.group(1)), match.group(2)
+    days = {'d': 1, 'wk': 7, 'mo': 31, 'y': 366}[unit] * count
+    return end_date - timedelta(days=days)
+
+
+def _window(start=None, end=None, period=None):
+    """Resolve history() arguments to a [start, end) window of naive timestamps"""
+    if end is None:
+        end = pd.Timestamp.now().normalize() + timedelta(days=1)
+    end = pd.Timestamp(end).tz_localize(None)
+    if start is None:
+        start = period_to_start(period or '1mo', end.to_pydatetime())
+    return pd.Timestamp(start).tz_localize(None).normalize(), end
+
+
+class DataProvider(ABC):
+    """Base interface: same call shapes as yfinance (end date is exclusive)"""
+    name = 'base'
+    request_delay = 0  # Seconds to wait between downloads (rate limiting)
+
+    @abstractmethod
+    def history(self, ticker, start=None, end=None, period=None):
+        """Daily OHLCV DataFrame indexed by date"""
+
+    @abstractmethod
+    def info(self, ticker):
+        """Fundamentals dict (yfinance `info` keys)"""
+
+    def last_price(self, ticker):
+        """Latest known price, or None"""
+        hist = self.history(ticker, period='5d')
+        return float(hist['Close'].iloc[-1]) if not hist.empty else None
+
+
+class YFinanceProvider(DataProvider):
+    """Live data from Yahoo Finance"""
+    name = 'yfinance'
+    request_delay = 0.5
+
+    @property
+    def yf(self):
+        import yfinance as yf  # Only loaded when actually going to the network
+        return yf
+
+    def history(self, ticker, start=None, end=None, period=None):
+        PROVIDER_REQUESTS.inc(provider=self.name, call='history')
+        stock = self.yf.Ticker(ticker)
+        if start is not None:
+            return stock.history(start=start, end=end)
+        return stock.history(period=period or '1mo')
+
+    def info(self, ticker):
+        PROVIDER_REQUESTS.inc(provider=self.name, call='info')
+        return self.yf.Ticker(ticker).info
+
+    def last_price(self, ticker):
+        PROVIDER_REQUESTS.inc(provider=self.name, call='last_price')
+        return float(self.yf.Ticker(ticker).fast_info.last_price)
+
+
+class RecordingProvider(DataProvider):
+    """Wraps another provider and saves every response under a local directory"""
+    name = 'record'
+
+    def __init__(self, inner, directory=DEFAULT_RECORDINGS_DIR):
+        self.inner = inner
+        self.directory = directory
+        self.request_delay = inner.request_delay
+        os.makedirs(os.path.join(directory, 'history'), exist_ok=True)
+        os.makedirs(os.path.join(directory, 'info'), exist_ok=True)
+
+    def history(self, ticker, start=None, end=None, period=None):
+        hist = self.inner.history(ticker, start=start, end=end, period=period)
+        if not hist.empty:
+            recorded = hist[[c for c in OHLCV_COLUMNS if c in hist.columns]].copy()
+            if recorded.index.tz is not None:
+                recorded.index = recorded.index.tz_localize(None)
+            recorded.index = recorded.index.normalize()
+
+            # Merge with earlier recordings so overlapping windows accumulate in one file
+            path = _history_path(self.directory, ticker)
+            if os.path.exists(path):
+                recorded = recorded.combine_first(_read_history(path))
+            recorded.sort_index().to_csv(path, index_label='Date')
+        return hist
+
+    def info(self, ticker):
+        info = self.inner.info(ticker)
+        with open(_info_path(self.directory, ticker), 'w') as f:
+            json.dump(info, f, default=str)
+        return info
+
+    def last_price(self, ticker):
+        return self.inner.last_price(ticker)
+
+
+class ReplayProvider(DataProvider):
+    """Serves previously recorded responses; never touches the network"""
+    name = 'replay'
+
+    def __init__(self, directory=DEFAULT_RECORDINGS_DIR):
+        self.directory = directory
+        self._frames = {}
+
+    def history(self, ticker, start=None, end=None, period=None):
+        PROVIDER_REQUESTS.inc(provider=self.name, call='history')
+        if ticker not in self._frames:
+            path = _history_path(self.directory, ticker)
+            self._frames[ticker] = _read_history(path) if os.path.exists(path) else _empty_history()
+        hist = self._frames[ticker]
+
+        if start is None and end is None and not hist.empty:
+            # Periods are relative to the end of the recording, not to today
+            end = hist.index[-1] + timedelta(days=1)
+        start, end = _window(start, end, period)
+        return hist[(hist.index >= start) & (hist.index < end)].copy()
+
+    def info(self, ticker):
+        PROVIDER_REQUESTS.inc(provider=self.name, call='info')
+        path = _info_path(self.directory, ticker)
+        if not os.path.exists(path):
+            return {}
+        with open(path, 'r') as f:
+            return json.load(f)
+
+
+class SyntheticProvider(DataProvider):
+    """
+    Deterministic fake market: one geometric Brownian motion path per ticker on a fixed
+    business-day calendar, seeded by (seed, ticker). Same inputs always give the same data.
+    """
+    name = 'synthetic'
+    CALENDAR = pd.bdate_range('2000-01-03', '2035-12-31')
+
+    def __init__(self, seed=42):
+        self.seed = seed
+        self._frames = {}
+
+    def _rng(self, ticker, stream):
+        return np.random.default_rng([self.seed, zlib.crc32(ticker.encode()), stream])
+
+    def _path(self, ticker):
+        if ticker not in self._frames:
+            rng = self._rng(ticker, 0)
+            n = len(self.CALENDAR)
+            drift = rng.uniform(-0.05, 0.25) / 252
+            vol = rng.uniform(0.15, 0.60) / np.sqrt(252)
+
+            log_returns = rng.normal(drift - vol ** 2 / 2, vol, n)
+            close = rng.uniform(10, 500) * np.exp(np.cumsum(log_returns))
+            prev_close = np.concatenate([[close[0]], close[:-1]])
+            open_ = prev_close * np.exp(rng.normal(0, vol / 4, n))
+            wick = np.abs(rng.normal(0, vol / 2, (2, n)))
+            high = np.maximum(open_, close) * (1 + wick[0])
+            low = np.minimum(open_, close) * (1 - wick[1])
+            volume = rng.lognormal(np.log(rng.uniform(2e5, 5e7)), 0.4, n).astype(np.int64)
+
+            self._frames[ticker] = pd.DataFrame(
+                {'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume},
+                index=self.CALENDAR.rename('Date')
+            )
+        return self._frames[ticker]
+
+    def history(self, ticker, start=None, end=None, period=None):
+        PROVIDER_REQUESTS.inc(provider=self.name, call='history')
+        return self._slice(ticker, start, end, period)
+
+    def _slice(self, ticker, start=None, end=None, period=None):
+        hist = self._path(ticker)
+        start, end = _window(start, end, period)
+        end = min(end, pd.Timestamp.now().normalize() + timedelta(days=1))  # No bars from the future
+        return hist[(hist.index >= start) & (hist.index < end)].copy()
+
+    def info(self, ticker):
+        PROVIDER_REQUESTS.inc(provider=self.name, call='info')
+        rng = self._rng(ticker, 1)
+        year = self._slice(ticker, period='1y')
+        price = float(year['Close'].iloc[-1]) if not year.empty else None
+        revenue = float(rng.uniform(1e8, 2e11))
+        return {
+            'symbol': ticker,
+            'shortName': f'{ticker} Synthetic Corp',
+            'sector': ['Technology', 'Healthcare', 'Financial Services', 'Energy',
+                       'Consumer Cyclical', 'Industrials'][int(rng.integers(6))],
+            'currentPrice': price,
+            'regularMarketPrice': price,
+            'marketCap': float(rng.uniform(1e9, 2e12)),
+            'trailingPE': float(rng.uniform(5, 60)),
+            'priceToBook': float(rng.uniform(0.5, 15)),
+            'profitMargins': float(rng.uniform(-0.1, 0.4)),
+            'debtToEquity': float(rng.uniform(0, 250)),
+            'revenueGrowth': float(rng.uniform(-0.15, 0.5)),
+            'returnOnEquity': float(rng.uniform(-0.1, 0.5)),
+            'totalRevenue': revenue,
+            'freeCashflow': revenue * float(rng.uniform(-0.05, 0.3)),
+            'currentRatio': float(rng.uniform(0.5, 3.5)),
+            'fiftyTwoWeekHigh': float(year['High'].max()) if not year.empty else None,
+            'fiftyTwoWeekLow': float(year['Low'].min()) if not year.empty else None,
+        }
+
+
+def _safe_name(ticker):
+    return re.sub(r'[^A-Za-z0-9._-]', '_', ticker)
+
+
+def _history_path(directory, ticker):
+    return os.path.join(directory, 'history', f'{_safe_name(ticker)}.csv')
+
+
+def _info_path(directory, ticker):
+    return os.path.join(directory, 'info', f'{_safe_name(ticker)}.json')
+
+
+def _empty_history():
+    return pd.DataFrame(columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([], name='Date'), dtype=float)
+
+
+def _read_history(path):
+    return pd.read_csv(path, index_col='Date', parse_dates=['Date'])
+
+
+def get_provider(name=None):
+    """Build the provider selected by `name` or the MARKET_DATA_PROVIDER environment variable"""
+    name = (name or os.environ.get('MARKET_DATA_PROVIDER', 'yfinance')).lower()
+    directory = os.environ.get('MARKET_DATA_DIR', DEFAULT_RECORDINGS_DIR)
+
+    if name == 'yfinance':
+        return YFinanceProvider()
+    if name == 'record':
+        return RecordingProvider(YFinanceProvider(), directory)
+    if name == 'replay':
+        return ReplayProvider(directory)
+    if name == 'synthetic':
+        return SyntheticProvider(int(os.environ.get('MARKET_DATA_SEED', 42)))
+    raise ValueError(f"Unknown data provider: {name}")
+
+
+def main():
+    """CLI: record tickers for offline replay, or preview provider output"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Market Data Provider')
+    parser.add_argument('command', choices=['record', 'show'], help='Command')
+    parser.add_argument('tickers', nargs='+', help='Ticker symbols')
+    parser.add_argument('--period', default='2y', help='History period (default: 2y)')
+    parser.add_argument('--provider', help='Provider for show (default: MARKET_DATA_PROVIDER)')
+    parser.add_argument('--dir', default=os.environ.get('MARKET_DATA_DIR', DEFAULT_RECORDINGS_DIR),
+                        help='Recordings directory')
+
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        provider = RecordingProvider(YFinanceProvider(), args.dir)
+        print(f"\n🎙️  Recording {len(args.tickers)} tickers into {args.dir}...\n")
+        for ticker in args.tickers:
+            try:
+                hist = provider.history(ticker.upper(), period=args.period)
+                provider.info(ticker.upper())
+                print(f"  ✅ {ticker.upper()} ({len(hist)} days)")
+            except Exception as e:
+                print(f"  ❌ {ticker.upper()}: {e}")
+
+    elif args.command == 'show':
+        provider = get_provider(args.provider)
+        for ticker in args.tickers:
+            hist = provider.history(ticker.upper(), period=args.period)
+            print(f"\n📊 {ticker.upper()} [{provider.name}] - {len(hist)} days")
+            print(hist.tail())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+"""
+DB Migrations - Versioned schema upgrades for portfolio_sim.db and live_portfolio.db
+
+Each database stores its schema version in PRAGMA user_version. A migration is a list of
+steps (SQL strings or callables taking the connection) applied in one transaction, after
+which user_version is bumped. Databases created before versioning report version 0; the
+first migration only uses IF NOT EXISTS / column checks, so they upgrade in place.
+
+Usage:
+    python3 db_migrations.py status portfolio_sim.db
+    python3 db_migrations.py migrate portfolio_sim.db live_portfolio.db
+    python3 db_migrations.py migrate new.db --schema live      # schema is detected from the tables otherwise
+    python3 db_migrations.py bench --snapshots 1000000
+"""
+
+import os
+import time
+import sqlite3
+import argparse
+import tempfile
+
+
+def add_column(conn, table, column, declaration):
+    """ALTER TABLE ADD COLUMN unless the column already exists"""
+    columns = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+    if column not in columns:
+        conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {declaration}')
+
+
+def backfill_summaries(conn):
+    """portfolio_summary rows for simulated portfolios completed before summaries were written"""
+    portfolios = conn.execute('''
+        SELECT id, initial_capital FROM portfolios
+        WHERE end_date IS NOT NULL AND id NOT IN (SELECT portfolio_id FROM portfolio_summary)
+    ''').fetchall()
+    if portfolios:
+        from portfolio_sim import write_summary  # Lazy: portfolio_sim imports this module
+        for portfolio_id, initial_capital in portfolios:
+            write_summary(conn, portfolio_id, initial_capital)
+
+
+PORTFOLIO_SIM_MIGRATIONS = [
+    (1, 'initial schema', [
+        '''
+        CREATE TABLE IF NOT EXISTS portfolios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL,
+            initial_capital REAL NOT NULL,
+            current_capital REAL NOT NULL,
+            start_date TEXT NOT NULL,
+            end_date TEXT,
+            mode TEXT NOT NULL,
+            config TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS positions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            portfolio_id INTEGER NOT NULL,
+            ticker TEXT NOT NULL,
+            entry_date TEXT NOT NULL,
+            entry_price REAL NOT NULL,
+            shares INTEGER NOT NULL,
+            capital_invested REAL NOT NULL,
+            exit_date TEXT,
+            exit_price REAL,
+            exit_reason TEXT,
+            pnl REAL,
+            pnl_pct REAL,
+            status TEXT DEFAULT 'open',
+            FOREIGN KEY (portfolio_id) REFERENCES portfolios (id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS snapshots (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            portfolio_id INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            total_value REAL NOT NULL,
+            cash REAL NOT NULL,
+            positions_value REAL NOT NULL,
+            num_positions INTEGER NOT NULL,
+            daily_return_pct REAL,
+            total_return_pct REAL,
+            FOREIGN KEY (portfolio_id) REFERENCES portfolios (id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS trades_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            portfolio_id INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            action TEXT NOT NULL,
+            ticker TEXT NOT NULL,
+            price REAL NOT NULL,
+            shares INTEGER NOT NULL,
+            value REAL NOT NULL,
+            score REAL,
+            signal TEXT,
+            FOREIGN KEY (portfolio_id) REFERENCES portfolios (id)
+        )
+        ''',
+    ]),
+    (2, 'simulation checkpoints', [
+        lambda conn: add_column(conn, 'portfolios', 'cash', 'REAL'),
+        lambda conn: add_column(conn, 'portfolios', 'last_processed_date', 'TEXT'),
+    ]),
+    (3, 'indexes', [
+        # Equity chart (/simulator/{id}): covering, rows come out already sorted by date
+        'CREATE INDEX IF NOT EXISTS idx_snapshots_portfolio_date '
+        'ON snapshots (portfolio_id, date, total_value, total_return_pct)',
+        'CREATE INDEX IF NOT EXISTS idx_positions_portfolio_status ON positions (portfolio_id, status)',
+        # Per-portfolio trade counts (compare_versions.py) and recent trades
+        'CREATE INDEX IF NOT EXISTS idx_trades_log_portfolio_date ON trades_log (portfolio_id, date)',
+    ]),
+    (4, 'portfolio summary', [
+        # Written by run_simulation at completion: list/compare views never aggregate snapshots or trades
+        '''
+        CREATE TABLE IF NOT EXISTS portfolio_summary (
+            portfolio_id INTEGER PRIMARY KEY,
+            days INTEGER NOT NULL,
+            final_value REAL NOT NULL,
+            return_pct REAL NOT NULL,
+            cagr_pct REAL,
+            max_drawdown_pct REAL NOT NULL,
+            sharpe REAL,
+            num_trades INTEGER NOT NULL,
+            num_closed INTEGER NOT NULL,
+            win_rate REAL NOT NULL,
+            updated_at TEXT NOT NULL,
+            FOREIGN KEY (portfolio_id) REFERENCES portfolios (id)
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_portfolio_summary_return ON portfolio_summary (return_pct)',
+        'CREATE INDEX IF NOT EXISTS idx_portfolios_start_name ON portfolios (start_date, name)',
+    ]),
+    (5, 'listing indexes', [
+        # Keyset pages of positions (listings.py): (portfolio_id, entry_date, rowid) seek
+        'CREATE INDEX IF NOT EXISTS idx_positions_portfolio_entry ON positions (portfolio_id, entry_date)',
+    ]),
+    (6, 'portfolio revisions', [
+        # Bumped on every write to a portfolio row or its summary: the dashboard's page cache
+        # version. A counter, unlike a timestamp, cannot repeat within one clock tick.
+        lambda conn: add_column(conn, 'portfolios', 'revision', 'INTEGER NOT NULL DEFAULT 0'),
+        '''
+        CREATE TRIGGER IF NOT EXISTS portfolios_revision AFTER UPDATE OF
+            name, initial_capital, current_capital, start_date, end_date, mode, config, cash, last_processed_date
+        ON portfolios
+        BEGIN
+            UPDATE portfolios SET revision = revision + 1 WHERE id = NEW.id;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS portfolio_summary_insert_revision AFTER INSERT ON portfolio_summary
+        BEGIN
+            UPDATE portfolios SET revision = revision + 1 WHERE id = NEW.portfolio_id;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS portfolio_summary_delete_revision AFTER DELETE ON portfolio_summary
+        BEGIN
+            UPDATE portfolios SET revision = revision + 1 WHERE id = OLD.portfolio_id;
+        END
+        ''',
+    ]),
+    (7, 'portfolio summary backfill', [
+        # Once per database: simulators and reports no longer backfill summaries when opened
+        backfill_summaries,
+    ]),
+]
+
+LIVE_PORTFOLIO_MIGRATIONS = [
+    (1, 'initial schema', [
+        '''
+        CREATE TABLE IF NOT EXISTS portfolio (
+            id INTEGER PRIMARY KEY,
+            cash REAL NOT NULL,
+            total_value REAL NOT NULL,
+            last_updated TEXT NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS positions (
+            ticker TEXT PRIMARY KEY,
+            shares INTEGER NOT NULL,
+            avg_price REAL NOT NULL,
+            current_price REAL,
+            entry_date TEXT NOT NULL,
+            entry_score REAL,
+            stop_loss REAL,
+            take_profit REAL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS trades (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ticker TEXT NOT NULL,
+            action TEXT NOT NULL,
+            shares INTEGER NOT NULL,
+            price REAL NOT NULL,
+            score REAL,
+            reason TEXT,
+            timestamp TEXT NOT NULL,
+            pnl REAL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS signals (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ticker TEXT NOT NULL,
+            action TEXT NOT NULL,
+            score REAL NOT NULL,
+            price REAL NOT NULL,
+            timestamp TEXT NOT NULL,
+            executed BOOLEAN DEFAULT 0
+        )
+        ''',
+        # Last analysis per ticker and the bar it was computed on (skip unchanged tickers)
+        '''
+        CREATE TABLE IF NOT EXISTS analysis_state (
+            ticker TEXT PRIMARY KEY,
+            bar_date TEXT NOT NULL,
+            bar_close REAL NOT NULL,
+            analysis_json TEXT NOT NULL,
+            analyzed_at TEXT NOT NULL
+        )
+        ''',
+    ]),
+    (2, 'indexes', [
+        # Trade history pages (ORDER BY timestamp DESC LIMIT n)
+        'CREATE INDEX IF NOT EXISTS idx_trades_timestamp ON trades (timestamp)',
+        # Stop-loss cooldown lookup before each buy signal
+        'CREATE INDEX IF NOT EXISTS idx_trades_ticker_action ON trades (ticker, action, timestamp)',
+        'CREATE INDEX IF NOT EXISTS idx_signals_ticker_timestamp ON signals (ticker, timestamp)',
+    ]),
+    (3, 'listing indexes', [
+        # Keyset pages of signal history (listings.py)
+        'CREATE INDEX IF NOT EXISTS idx_signals_timestamp ON signals (timestamp)',
+    ]),
+]
+
+
+def schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(db_path, migrations, target=None, wal=True):
+    """
+    Bring db_path up to `target` (default: latest) version. Returns the list of
+    (version, description) applied. Each migration commits atomically with its version bump.
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)  # Explicit transactions below
+    applied = []
+    try:
+        if wal and db_path != ':memory:':
+            conn.execute('PRAGMA journal_mode=WAL')  # Readers (dashboard) no longer block the writer
+
+        current = schema_version(conn)
+        for version, description, steps in migrations:
+            if version <= current or (target is not None and version > target):
+                continue
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                for step in steps:
+                    if callable(step):
+                        step(conn)
+                    else:
+                        conn.execute(step)
+                conn.execute(f'PRAGMA user_version = {int(version)}')
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            applied.append((version, description))
+            current = version
+    finally:
+        conn.close()
+    return applied
+
+
+def pending_migrations(db_path, migrations):
+    """Versions not yet applied to db_path, read without creating or writing the file"""
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    try:
+        current = schema_version(conn)
+    finally:
+        conn.close()
+    return [version for version, _, _ in migrations if version > current]
+
+
+def remove_database(db_path):
+    """Delete a database together with its WAL sidecar files"""
+    for path in (db_path, db_path + '-wal', db_path + '-shm'):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+# Schema name -> (migrations, marker table only that schema creates)
+SCHEMAS = {
+    'sim': (PORTFOLIO_SIM_MIGRATIONS, 'portfolios'),
+    'live': (LIVE_PORTFOLIO_MIGRATIONS, 'portfolio'),
+}
+
+
+def migrations_for(db_path):
+    """Migration list of an existing database, detected from its marker table (None if unknown)"""
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    try:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    finally:
+        conn.close()
+    found = [migrations for migrations, marker in SCHEMAS.values() if marker in tables]
+    return found[0] if len(found) == 1 else None
+
+
+# --- query benchmark ---
+
+# Queries issued by /simulator/{id} and compare_versions.py
+SIMULATOR_PAGE_QUERIES = [
+    'SELECT id, name, initial_capital, current_capital, start_date, end_date, mode, config, created_at '
+    'FROM portfolios WHERE id = ?',
+    'SELECT date, total_value, total_return_pct FROM snapshots WHERE portfolio_id = ? ORDER BY date',
+]
+COMPARE_VERSIONS_QUERY = '''
+    SELECT id, name, initial_capital, current_capital, start_date, end_date,
+           (SELECT COUNT(*) FROM trades_log WHERE portfolio_id = p.id) as num_trades
+    FROM portfolios p
+    ORDER BY start_date, name
+'''
+
+
+def _fill(db_path, n_snapshots, days_per_portfolio, trades_per_portfolio):
+    """Synthetic simulator database with n_snapshots rows, portfolios interleaved like concurrent runs"""
+    import numpy as np
+    import pandas as pd
+
+    n_portfolios = max(1, n_snapshots // days_per_portfolio)
+    dates = [d.strftime('%Y-%m-%d') for d in pd.bdate_range('2015-01-02', periods=days_per_portfolio)]
+    rng = np.random.default_rng(0)
+
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        'INSERT INTO portfolios (id, name, initial_capital, current_capital, start_date, mode) VALUES (?, ?, ?, ?, ?, ?)',
+        [(p, f'bench_{p}', 10000, 10000 * (1 + rng.normal(0, 0.2)), dates[0], 'historical')
+         for p in range(1, n_portfolios + 1)]
+    )
+    # Day-major insertion order: each portfolio's rows are scattered across the table
+    for d, date in enumerate(dates):
+        values = 10000 * (1 + rng.normal(0, 0.1, n_portfolios))
+        conn.executemany(
+            'INSERT INTO snapshots (portfolio_id, date, total_value, cash, positions_value, num_positions, total_return_pct) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [(p + 1, date, float(v), float(v) / 2, float(v) / 2, 3, float(v) / 100 - 100) for p, v in enumerate(values)]
+        )
+    conn.executemany(
+        'INSERT INTO trades_log (portfolio_id, date, action, ticker, price, shares, value) VALUES (?, ?, ?, ?, ?, ?, ?)',
+        [(p, dates[t % len(dates)], 'BUY', 'SYN', 100.0, 10, 1000.0)
+         for p in range(1, n_portfolios + 1) for t in range(trades_per_portfolio)]
+    )
+    conn.commit()
+    conn.close()
+    return n_portfolios
+
+
+def _time_queries(db_path, n_portfolios, repeat):
+    conn = sqlite3.connect(db_path)
+    ids = [1 + (i * 7919) % n_portfolios for i in range(repeat)]  # Spread over the table
+
+    start = time.perf_counter()
+    for pid in ids:
+        for query in SIMULATOR_PAGE_QUERIES:
+            conn.execute(query, (pid,)).fetchall()
+    page_ms = (time.perf_counter() - start) / repeat * 1000
+
+    start = time.perf_counter()
+    conn.execute(COMPARE_VERSIONS_QUERY).fetchall()
+    compare_ms = (time.perf_counter() - start) * 1000
+
+    plan = ' | '.join(row[-1] for row in conn.execute('EXPLAIN QUERY PLAN ' + SIMULATOR_PAGE_QUERIES[1], (1,)))
+    conn.close()
+    return page_ms, compare_ms, plan
+
+
+def bench(n_snapshots=1_000_000, days_per_portfolio=2500, trades_per_portfolio=50, repeat=20):
+    """Simulator page and compare_versions latency before (v1 schema) and after the index migration"""
+    workdir = tempfile.mkdtemp(prefix='market_dbbench_')
+    db_path = os.path.join(workdir, 'portfolio_sim.db')
+    try:
+        migrate(db_path, PORTFOLIO_SIM_MIGRATIONS, target=2)
+        print(f"📦 Filling {n_snapshots:,} snapshot rows...")
+        n_portfolios = _fill(db_path, n_snapshots, days_per_portfolio, trades_per_portfolio)
+
+        results = {}
+        for label in ('before', 'after'):
+            if label == 'after':
+                start = time.perf_counter()
+                migrate(db_path, PORTFOLIO_SIM_MIGRATIONS)
+                print(f"🔧 Index migration: {time.perf_counter() - start:.2f}s")
+            page_ms, compare_ms, plan = _time_queries(db_path, n_portfolios, repeat)
+            results[label] = {'simulator_page_ms': round(page_ms, 2), 'compare_versions_ms': round(compare_ms, 2),
+                              'snapshot_plan': plan}
+            print(f"  {label:<7} /simulator/{{id}}: {page_ms:8.2f} ms | compare_versions: {compare_ms:8.2f} ms | {plan}")
+        return results
+    finally:
+        remove_database(db_path)
+        os.rmdir(workdir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Database schema migrations')
+    parser.add_argument('command', choices=['status', 'migrate', 'bench'], help='Command')
+    parser.add_argument('databases', nargs='*', default=['portfolio_sim.db', 'live_portfolio.db'],
+                        help='Database files (default: portfolio_sim.db live_portfolio.db)')
+    parser.add_argument('--schema', choices=sorted(SCHEMAS),
+                        help='status/migrate: schema of the databases (default: detected from their tables)')
+    parser.add_argument('--snapshots', type=int, default=1_000_000, help='bench: snapshot rows')
+    parser.add_argument('--repeat', type=int, default=20, help='bench: simulator page loads to average')
+    args = parser.parse_intermixed_args()  # --schema may come between the command and the files
+
+    if args.command == 'bench':
+        print(f"\n⏱️  Query benchmark ({args.snapshots:,} snapshots)\n")
+        bench(args.snapshots, repeat=args.repeat)
+        return
+
+    for db_path in args.databases:
+        if not os.path.exists(db_path):
+            print(f"⚠️  {db_path}: not found")
+            continue
+        migrations = SCHEMAS[args.schema][0] if args.schema else migrations_for(db_path)
+        if migrations is None:
+            print(f"⚠️  {db_path}: unknown schema, pass --schema {'/'.join(sorted(SCHEMAS))}")
+            continue
+        latest = migrations[-1][0]
+        if args.command == 'status':
+            conn = sqlite3.connect(db_path)
+            version = schema_version(conn)
+            mode = conn.execute('PRAGMA journal_mode').fetchone()[0]
+            conn.close()
+            print(f"📋 {db_path}: version {version}/{latest}, journal {mode}")
+        else:
+            applied = migrate(db_path, migrations)
+            for version, description in applied:
+                print(f"✅ {db_path}: applied {version} ({description})")
+            if not applied:
+                print(f"✅ {db_path}: up to date (version {latest})")
+
+
+if __name__ == '__main__':
+    main()
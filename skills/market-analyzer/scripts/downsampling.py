@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Downsampling - Largest-Triangle-Three-Buckets (LTTB) for chart series
+
+Keeps the first and last points and, in each of the (threshold - 2) buckets in between,
+the point forming the largest triangle with the previously kept point and the average of
+the next bucket. Peaks and drawdowns survive, flat stretches collapse.
+"""
+
+import numpy as np
+
+
+def lttb(x, y, threshold):
+    """Indices of the `threshold` points kept from the series (all indices if it is already small enough)"""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if threshold >= n or n < 3:
+        return np.arange(n)
+    if threshold < 3:
+        raise ValueError("threshold must be at least 3")
+
+    # Bucket k covers [bounds[k], bounds[k + 1]) over the n - 2 inner points; the final
+    # "bucket" is the last point alone, so every bucket has a next-bucket average
+    buckets = threshold - 2
+    bounds = 1 + (np.arange(buckets + 1) * (n - 2)) // buckets
+    counts = np.diff(np.append(bounds, n))
+    avg_x = np.add.reduceat(x, bounds) / counts
+    avg_y = np.add.reduceat(y, bounds) / counts
+
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for k in range(buckets):
+        lo, hi = bounds[k], bounds[k + 1]
+        # Twice the triangle area (constant factor does not change the argmax)
+        area = np.abs((x[a] - avg_x[k + 1]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y[k + 1] - y[a]))
+        a = lo + int(area.argmax())
+        keep[k + 1] = a
+    return keep
+
+
+def downsample_dates(dates, values, threshold):
+    """LTTB indices for a series keyed by 'YYYY-MM-DD' strings (x = calendar days, so gaps count)"""
+    days = np.array(dates, dtype='datetime64[D]').astype(np.int64)
+    return lttb(days, values, threshold)
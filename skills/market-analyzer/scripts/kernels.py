@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Trading Kernels - Vectorized selection and exit logic shared by the simulators
+"""
+
+import numpy as np
+
+
+def select_top_k(scores, k=None, threshold=None, eligible=None):
+    """
+    Cross-sectional selection for one day.
+    scores: 1-D array of scores for the whole universe (NaN = no score)
+    k: max number of picks (None = every candidate)
+    threshold: minimum score to be a candidate
+    eligible: optional boolean mask (e.g. not already held)
+    Returns candidate indices ordered by score descending (ties keep universe order).
+    """
+    scores = np.asarray(scores, dtype=float)
+    mask = ~np.isnan(scores)
+    if threshold is not None:
+        mask &= scores >= threshold
+    if eligible is not None:
+        mask &= np.asarray(eligible, dtype=bool)
+
+    candidates = np.flatnonzero(mask)
+    if k is not None:
+        if k <= 0:
+            return candidates[:0]
+        if k < len(candidates):
+            # Partial sort: O(n) to find the k-th best score, then order only the candidates at or
+            # above it (a tie straddling k is kept whole so universe order decides, not argpartition)
+            kth = -np.partition(-scores[candidates], k - 1)[k - 1]
+            candidates = candidates[scores[candidates] >= kth]
+
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order] if k is None else candidates[order][:k]
+
+
+# Exit reason codes returned by find_exits
+EXIT_NONE, EXIT_STOP_LOSS, EXIT_TAKE_PROFIT, EXIT_SELL_SIGNAL = 0, 1, 2, 3
+EXIT_REASONS = {
+    EXIT_NONE: 'END_OF_PERIOD',
+    EXIT_STOP_LOSS: 'STOP_LOSS',
+    EXIT_TAKE_PROFIT: 'TAKE_PROFIT',
+    EXIT_SELL_SIGNAL: 'SELL_SIGNAL',
+}
+
+_MAX_WINDOW_CELLS = 4_000_000  # entries x bars evaluated per chunk (bounds memory)
+
+
+def find_exits(entry_idx, close, stop_loss, take_profit, sell_mask=None,
+               entry_price=None, high=None, low=None, open_=None):
+    """
+    First-hit exit search for many entries at once.
+    entry_idx: bar index of each entry; exits are searched from the next bar on
+    close / high / low / open_: 1-D price arrays for one ticker
+    stop_loss / take_profit: fractions (0.05 = 5%)
+    sell_mask: boolean array, True where the score-based sell condition holds
+    entry_price: defaults to close[entry_idx]
+    With high/low, SL and TP trigger intrabar and fill at the stop/target level
+    (or at the open when the bar gaps through it); otherwise they trigger on close.
+    On a bar where several conditions hold, priority is SL, then TP, then sell signal.
+    Returns (exit_idx, exit_price, reason) arrays; exit_idx is -1 and reason EXIT_NONE
+    when nothing triggers before the end of the data.
+    """
+    close = np.asarray(close, dtype=float)
+    entry_idx = np.asarray(entry_idx, dtype=np.int64)
+    n_bars, n_entries = len(close), len(entry_idx)
+    intrabar = high is not None and low is not None
+
+    if entry_price is None:
+        entry_price = close[entry_idx]
+    entry_price = np.asarray(entry_price, dtype=float)
+    stop_price = entry_price * (1 - stop_loss)
+    target_price = entry_price * (1 + take_profit)
+    if intrabar:
+        high, low = np.asarray(high, dtype=float), np.asarray(low, dtype=float)
+    if open_ is not None:
+        open_ = np.asarray(open_, dtype=float)
+    if sell_mask is not None:
+        sell_mask = np.asarray(sell_mask, dtype=bool)
+
+    exit_idx = np.full(n_entries, -1, dtype=np.int64)
+    exit_price = np.full(n_entries, np.nan)
+    reason = np.full(n_entries, EXIT_NONE, dtype=np.int8)
+    if n_entries == 0:
+        return exit_idx, exit_price, reason
+
+    order = np.argsort(entry_idx, kind='stable')
+    start = 0
+    while start < n_entries:
+        # Chunk entries so the (entries x horizon) window stays within the memory budget
+        horizon = max(1, n_bars - 1 - int(entry_idx[order[start]]))
+        size = max(1, _MAX_WINDOW_CELLS // horizon)
+        chunk = order[start:start + size]
+        start += size
+
+        bars = entry_idx[chunk, None] + 1 + np.arange(horizon)
+        valid = bars < n_bars
+        bars = np.minimum(bars, n_bars - 1)
+
+        if intrabar:
+            sl_hit = low[bars] <= stop_price[chunk, None]
+            tp_hit = high[bars] >= target_price[chunk, None]
+        else:
+            sl_hit = close[bars] <= stop_price[chunk, None]
+            tp_hit = close[bars] >= target_price[chunk, None]
+        sl_hit &= valid
+        tp_hit &= valid
+        hit = sl_hit | tp_hit
+        if sell_mask is not None:
+            hit |= sell_mask[bars] & valid
+
+        first = hit.argmax(axis=1)
+        rows = np.arange(len(chunk))
+        found = hit[rows, first]
+        chunk, first, rows = chunk[found], first[found], rows[found]
+        bar = bars[rows, first]
+
+        code = np.where(sl_hit[rows, first], EXIT_STOP_LOSS,
+                        np.where(tp_hit[rows, first], EXIT_TAKE_PROFIT, EXIT_SELL_SIGNAL))
+        price = close[bar].copy()
+        if intrabar:
+            sl, tp = code == EXIT_STOP_LOSS, code == EXIT_TAKE_PROFIT
+            price[sl] = stop_price[chunk[sl]]
+            price[tp] = target_price[chunk[tp]]
+            if open_ is not None:
+                price[sl] = np.minimum(price[sl], open_[bar[sl]])
+                price[tp] = np.maximum(price[tp], open_[bar[tp]])
+
+        exit_idx[chunk] = bar
+        exit_price[chunk] = price
+        reason[chunk] = code
+
+    return exit_idx, exit_price, reason
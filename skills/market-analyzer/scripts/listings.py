@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Listings - Keyset-paginated and streamed trade/position/signal history
+
+Pages are fetched with `WHERE (key, rowid) > (last key, last rowid) ORDER BY key, rowid LIMIT n`
+instead of OFFSET, so page 1000 costs the same index seek as page 1. The cursor handed back to
+clients is that (key, rowid) pair, opaque and URL-safe. Exports iterate one query with
+fetchmany and write rows as they are read: memory stays flat whatever the history length.
+
+Standard library only, so `live_trade trades` keeps starting fast.
+
+Usage:
+    python3 listings.py export sim_trades --db portfolio_sim.db --portfolio 3 --format csv > trades.csv
+    python3 listings.py export live_trades --db live_portfolio.db --format ndjson --start 2026-01-01
+"""
+
+import io
+import csv
+import sys
+import json
+import base64
+import sqlite3
+import argparse
+from datetime import date, timedelta
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+FETCH_BATCH = 1000
+CHUNK_BYTES = 64 * 1024  # Export chunk size: large enough to amortize per-chunk overhead
+
+# name -> table, sort key (date or ISO timestamp), columns, scope column (portfolio_id) or None,
+# and whether rows can be filtered on a status column
+LISTINGS = {
+    'sim_trades': {
+        'table': 'trades_log', 'key': 'date', 'scope': 'portfolio_id',
+        'columns': ('id', 'date', 'action', 'ticker', 'price', 'shares', 'value', 'score', 'signal'),
+    },
+    'sim_positions': {
+        'table': 'positions', 'key': 'entry_date', 'scope': 'portfolio_id', 'status': True,
+        'columns': ('id', 'ticker', 'entry_date', 'entry_price', 'shares', 'capital_invested',
+                    'exit_date', 'exit_price', 'exit_reason', 'pnl', 'pnl_pct', 'status'),
+    },
+    'live_trades': {
+        'table': 'trades', 'key': 'timestamp', 'scope': None,
+        'columns': ('id', 'timestamp', 'action', 'ticker', 'shares', 'price', 'score', 'reason', 'pnl'),
+    },
+    'live_positions': {
+        'table': 'positions', 'key': 'entry_date', 'scope': None,
+        'columns': ('ticker', 'entry_date', 'shares', 'avg_price', 'current_price', 'entry_score',
+                    'stop_loss', 'take_profit'),
+    },
+    'live_signals': {
+        'table': 'signals', 'key': 'timestamp', 'scope': None,
+        'columns': ('id', 'timestamp', 'ticker', 'action', 'score', 'price', 'executed'),
+    },
+}
+
+
+def encode_cursor(key, rowid):
+    return base64.urlsafe_b64encode(json.dumps([key, rowid]).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(key, rowid) from a cursor string; ValueError if it was not produced by encode_cursor"""
+    try:
+        key, rowid = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except Exception:
+        raise ValueError(f"invalid cursor: {cursor!r}")
+    if not isinstance(rowid, int):
+        raise ValueError(f"invalid cursor: {cursor!r}")
+    return key, rowid
+
+
+def _where(spec, scope_id, start, end, status):
+    """WHERE clauses and parameters shared by pages and exports"""
+    clauses, params = [], []
+    if spec['scope']:
+        clauses.append(f"{spec['scope']} = ?")
+        params.append(scope_id)
+    if start:
+        clauses.append(f"{spec['key']} >= ?")
+        params.append(date.fromisoformat(start[:10]).isoformat())
+    if end:
+        # Inclusive end day, also for timestamps: compare against the next day's midnight
+        clauses.append(f"{spec['key']} < ?")
+        params.append((date.fromisoformat(end[:10]) + timedelta(days=1)).isoformat())
+    if status:
+        if not spec.get('status'):
+            with_status = ', '.join(name for name, other in LISTINGS.items() if other.get('status'))
+            raise ValueError(f"status filter is only available for {with_status}")
+        clauses.append('status = ?')
+        params.append(status)
+    return clauses, params
+
+
+def _query(spec, clauses, desc, limit=False):
+    direction = 'DESC' if desc else 'ASC'
+    query = f"SELECT {', '.join(spec['columns'])}, {spec['key']}, rowid FROM {spec['table']}"
+    if clauses:
+        query += ' WHERE ' + ' AND '.join(clauses)
+    query += f" ORDER BY {spec['key']} {direction}, rowid {direction}"
+    if limit:
+        query += ' LIMIT ?'
+    return query
+
+
+def page(db_path, listing, scope_id=None, start=None, end=None, after=None, limit=DEFAULT_LIMIT,
+         desc=False, status=None):
+    """
+    One page of `listing`: {'items': [row dicts], 'next_cursor': cursor or None}.
+    Pass the previous page's next_cursor as `after` to continue in the same direction.
+    """
+    spec = LISTINGS[listing]
+    limit = max(1, min(int(limit), MAX_LIMIT))
+    clauses, params = _where(spec, scope_id, start, end, status)
+    if after:
+        clauses.append(f"({spec['key']}, rowid) {'<' if desc else '>'} (?, ?)")
+        params.extend(decode_cursor(after))
+
+    conn = sqlite3.connect(db_path)
+    try:
+        # One extra row tells whether another page exists without a COUNT(*)
+        rows = conn.execute(_query(spec, clauses, desc, limit=True), params + [limit + 1]).fetchall()
+    finally:
+        conn.close()
+
+    more = len(rows) > limit
+    rows = rows[:limit]
+    n = len(spec['columns'])
+    return {
+        'items': [dict(zip(spec['columns'], row[:n])) for row in rows],
+        'next_cursor': encode_cursor(rows[-1][n], rows[-1][n + 1]) if more else None,
+    }
+
+
+def iter_rows(db_path, listing, scope_id=None, start=None, end=None, desc=False, status=None, batch=FETCH_BATCH):
+    """
+    Iterator over every matching row as a tuple of the listing's columns, `batch` rows in memory
+    at a time. Filters are validated here (ValueError), before the first row is read.
+    """
+    spec = LISTINGS[listing]
+    clauses, params = _where(spec, scope_id, start, end, status)
+    query = _query(spec, clauses, desc)
+    n = len(spec['columns'])
+
+    def rows():
+        conn = sqlite3.connect(db_path)
+        try:
+            cursor = conn.execute(query, params)
+            while True:
+                fetched = cursor.fetchmany(batch)
+                if not fetched:
+                    break
+                for row in fetched:
+                    yield row[:n]
+        finally:
+            conn.close()
+
+    return rows()
+
+
+def stream_csv(listing, rows):
+    """CSV text (header first) in chunks of about CHUNK_BYTES"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(LISTINGS[listing]['columns'])
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= CHUNK_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def stream_ndjson(listing, rows):
+    """One JSON object per line, in chunks of about CHUNK_BYTES"""
+    columns = LISTINGS[listing]['columns']
+    lines, size = [], 0
+    for row in rows:
+        line = json.dumps(dict(zip(columns, row))) + '\n'
+        lines.append(line)
+        size += len(line)
+        if size >= CHUNK_BYTES:
+            yield ''.join(lines)
+            lines, size = [], 0
+    yield ''.join(lines)
+
+
+EXPORT_FORMATS = {
+    'csv': (stream_csv, 'text/csv'),
+    'ndjson': (stream_ndjson, 'application/x-ndjson'),
+}
+
+
+def export(db_path, listing, fmt='csv', **filters):
+    """(chunk generator, media type) for a full export of `listing` in `fmt`"""
+    writer, media_type = EXPORT_FORMATS[fmt]
+    return writer(listing, iter_rows(db_path, listing, **filters)), media_type
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export trade/position/signal history')
+    parser.add_argument('command', choices=['export'], help='Command')
+    parser.add_argument('listing', choices=sorted(LISTINGS), help='What to export')
+    parser.add_argument('--db', required=True, help='portfolio_sim.db or live_portfolio.db')
+    parser.add_argument('--portfolio', type=int, help='Portfolio ID (sim_* listings)')
+    parser.add_argument('--start', help='First day (YYYY-MM-DD)')
+    parser.add_argument('--end', help='Last day, inclusive (YYYY-MM-DD)')
+    parser.add_argument('--status', choices=['open', 'closed'], help='sim_positions: filter by status')
+    parser.add_argument('--desc', action='store_true', help='Newest first')
+    parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv', help='Output format')
+    args = parser.parse_args()
+
+    if LISTINGS[args.listing]['scope'] and args.portfolio is None:
+        parser.error(f'--portfolio is required for {args.listing}')
+    if args.status and not LISTINGS[args.listing].get('status'):
+        parser.error(f'--status is not available for {args.listing}')
+
+    chunks, _ = export(args.db, args.listing, args.format, scope_id=args.portfolio, start=args.start,
+                       end=args.end, desc=args.desc, status=args.status)
+    for chunk in chunks:
+        sys.stdout.write(chunk)
+
+
+if __name__ == '__main__':
+    main()
@@ -10,77 +10,102 @@ sys.path.insert(0, os.path.dirname(__file__))
 
 from analyzer import MarketAnalyzer
 from data_cache import DataCache
+from data_provider import get_provider
+from telemetry import timed
+from db_migrations import migrate, remove_database, LIVE_PORTFOLIO_MIGRATIONS
+import live_state
+import trading_calendar
 import sqlite3
 import json
+import time
+import signal as signal_lib
 from datetime import datetime, timedelta
 import argparse
+import pandas as pd
 
 _CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.json')
 
+HISTORY_DAYS = 365  # Same window as MarketAnalyzer.analyze_stock
+
+
+class ConfigWatcher:
+    """Keeps config.json in memory and reloads it only when its mtime changes"""
+    def __init__(self, path=None):
+        self.path = path or _CONFIG_PATH
+        self._mtime = None
+        self._config = None
+    
+    def get(self):
+        mtime = os.stat(self.path).st_mtime
+        if mtime != self._mtime:
+            with open(self.path, 'r') as f:
+                self._config = json.load(f)
+            if self._mtime is not None:
+                print(f"🔄 Config reloaded ({self.path})")
+            self._mtime = mtime
+        return self._config
+
+
+class MarketScheduler:
+    """US market hours (NYSE sessions 9:30-16:00 New York time, 13:00 on early closes): when to run the next check"""
+    TZ = trading_calendar.TZ
+    
+    def __init__(self, interval_minutes=15, market_hours_only=True):
+        self.interval = timedelta(minutes=interval_minutes)
+        self.market_hours_only = market_hours_only
+    
+    def _session(self, day):
+        """(open, close) datetimes for a date, or None on weekends and exchange holidays"""
+        return trading_calendar.session_hours(day)
+    
+    def is_open(self, now=None):
+        now = (now or datetime.now(self.TZ)).astimezone(self.TZ)
+        session = self._session(now.date())
+        return session is not None and session[0] <= now < session[1]
+    
+    def should_run(self, now=None):
+        """True during the session and in the short window after the close (final bar)"""
+        if not self.market_hours_only:
+            return True
+        now = (now or datetime.now(self.TZ)).astimezone(self.TZ)
+        session = self._session(now.date())
+        return session is not None and session[0] <= now < session[1] + timedelta(minutes=15)
+    
+    def next_run(self, now=None):
+        """Next check time: now + interval during the session, else the next open.
+        One extra check runs just after the close to pick up the final daily bar."""
+        now = (now or datetime.now(self.TZ)).astimezone(self.TZ)
+        if not self.market_hours_only:
+            return now + self.interval
+        
+        session = self._session(now.date())
+        if session and now < session[0]:
+            return session[0]
+        if session and now < session[1]:
+            return min(now + self.interval, session[1] + timedelta(minutes=5))
+        
+        return self._session(trading_calendar.next_session(now.date()))[0]
+
+
 class LiveMonitor:
-    def __init__(self, db_path="live_portfolio.db"):
+    def __init__(self, db_path="live_portfolio.db", provider=None):
         self.db_path = db_path
-        self.analyzer = MarketAnalyzer(use_cache=True)
-        self.cache = DataCache()
+        self.provider = provider or get_provider()
+        self.analyzer = MarketAnalyzer(use_cache=True, provider=self.provider)
+        self.cache = DataCache(provider=self.provider)
+        self.frames = {}  # ticker -> warm 1y OHLCV frame (daemon mode)
+        self.infos = {}  # ticker -> fundamentals, refreshed once a day (daemon mode)
+        self._infos_day = None
+        self.last_analysis_stats = {'recomputed': 0, 'reused': 0}
         self._init_db()
         
     def _init_db(self):
-        """Initialize live portfolio database"""
+        """Initialize live portfolio database (schema upgrades live in db_migrations.py)"""
+        migrate(self.db_path, LIVE_PORTFOLIO_MIGRATIONS)
+        
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
-        # Portfolio state
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS portfolio (
-                id INTEGER PRIMARY KEY,
-                cash REAL NOT NULL,
-                total_value REAL NOT NULL,
-                last_updated TEXT NOT NULL
-            )
-        ''')
-        
-        # Current positions
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS positions (
-                ticker TEXT PRIMARY KEY,
-                shares INTEGER NOT NULL,
-                avg_price REAL NOT NULL,
-                current_price REAL,
-                entry_date TEXT NOT NULL,
-                entry_score REAL,
-                stop_loss REAL,
-                take_profit REAL
-            )
-        ''')
-        
-        # Trade history
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS trades (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                ticker TEXT NOT NULL,
-                action TEXT NOT NULL,
-                shares INTEGER NOT NULL,
-                price REAL NOT NULL,
-                score REAL,
-                reason TEXT,
-                timestamp TEXT NOT NULL,
-                pnl REAL
-            )
-        ''')
-        
-        # Signals log (for review)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS signals (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                ticker TEXT NOT NULL,
-                action TEXT NOT NULL,
-                score REAL NOT NULL,
-                price REAL NOT NULL,
-                timestamp TEXT NOT NULL,
-                executed BOOLEAN DEFAULT 0
-            )
-        ''')
-        
         # Initialize portfolio if empty
         cursor.execute('SELECT COUNT(*) FROM portfolio')
         if cursor.fetchone()[0] == 0:
@@ -94,59 +119,77 @@ class LiveMonitor:
         
     def get_portfolio_state(self):
         """Get current portfolio state"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        return live_state.get_portfolio_state(self.db_path)
+    
+    @timed('live_refresh')
+    def refresh_frames(self, watchlist):
+        """
+        Incremental update of the in-memory price frames: only bars since the last one held
+        are downloaded and appended. Returns the tickers whose frame changed.
+        """
+        end_date = datetime.now()
+        changed = []
+        
+        today = end_date.date()
+        if self._infos_day != today:
+            self.infos = {}  # Fundamentals change slowly: reload once a day
+            self._infos_day = today
         
-        cursor.execute('SELECT cash, total_value, last_updated FROM portfolio WHERE id = 1')
-        cash, total_value, last_updated = cursor.fetchone()
-        
-        cursor.execute('SELECT ticker, shares, avg_price, current_price, entry_date, stop_loss, take_profit FROM positions')
-        positions = []
-        for row in cursor.fetchall():
-            positions.append({
-                'ticker': row[0],
-                'shares': row[1],
-                'avg_price': row[2],
-                'current_price': row[3],
-                'entry_date': row[4],
-                'stop_loss': row[5],
-                'take_profit': row[6],
-                'value': (row[3] or row[2]) * row[1],
-                'pnl_pct': ((row[3] or row[2]) - row[2]) / row[2] * 100 if row[2] > 0 else 0
-            })
+        for ticker in watchlist:
+            frame = self.frames.get(ticker)
+            if frame is None or frame.empty:
+                start_date = end_date - timedelta(days=HISTORY_DAYS)
+                self.cache.fetch_and_cache(ticker, start_date, end_date)
+                new = self.cache.get_cached_data(ticker, start_date, end_date)
+                if new.empty:
+                    continue
+                frame = new
+            else:
+                # Re-download from the last held bar: today's bar is still moving during the session
+                start_date = frame.index[-1].to_pydatetime()
+                self.cache.fetch_and_cache(ticker, start_date, end_date, force_refresh=True, include_info=False)
+                new = self.cache.get_cached_data(ticker, start_date, end_date)
+                if new.empty or new.equals(frame.loc[new.index[0]:]):
+                    continue
+                frame = pd.concat([frame[frame.index < new.index[0]], new])
+                frame = frame[frame.index >= pd.Timestamp(end_date - timedelta(days=HISTORY_DAYS)).normalize()]
+            
+            self.frames[ticker] = frame
+            changed.append(ticker)
         
-        conn.close()
+        for ticker in list(self.frames):
+            if ticker not in watchlist:
+                del self.frames[ticker]
         
-        return {
-            'cash': cash,
-            'total_value': total_value,
-            'positions': positions,
-            'last_updated': last_updated
-        }
+        return changed
     
+    @timed('live_price_update')
     def update_positions_prices(self, watchlist):
         """Update current prices for all positions"""
-        import yfinance as yf
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
         for ticker in watchlist:
-            # First try: force-refresh cache for the last 5 days to get fresh data
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=5)
-            self.cache.fetch_and_cache(ticker, start_date, end_date, force_refresh=True)
-            data = self.cache.get_cached_data(ticker, end_date - timedelta(days=2), end_date)
+            if ticker in self.frames:
+                # Daemon mode: refresh_frames() already pulled the latest bar
+                data = self.frames[ticker]
+            else:
+                # First try: force-refresh cache from the previous session to get fresh data
+                end_date = datetime.now()
+                start_date = datetime.combine(trading_calendar.previous_session(end_date), datetime.min.time())
+                self.cache.fetch_and_cache(ticker, start_date, end_date, force_refresh=True)
+                data = self.cache.get_cached_data(ticker, start_date, end_date)
             
             if not data.empty:
                 current_price = float(data['Close'].iloc[-1])
             else:
-                # Fallback: fetch current price directly from yfinance
+                # Fallback: fetch current price directly from the provider
                 try:
-                    stock = yf.Ticker(ticker)
-                    info = stock.fast_info
-                    current_price = float(info.last_price)
+                    current_price = self.provider.last_price(ticker)
                 except Exception:
                     continue
+                if current_price is None:
+                    continue
             
             cursor.execute('''
                 UPDATE positions 
@@ -157,19 +200,80 @@ class LiveMonitor:
         conn.commit()
         conn.close()
     
-    def analyze_market(self, watchlist, config_path=None):
-        """Analyze all stocks and generate signals"""
+    def _latest_bar(self, ticker):
+        """(date, close) of the newest bar available for ticker"""
+        frame = self.frames.get(ticker)
+        if frame is not None and not frame.empty:
+            return frame.index[-1].strftime('%Y-%m-%d'), float(frame['Close'].iloc[-1])
+        return self.cache.get_last_close_before_or_on(ticker, datetime.now())
+    
+    def _analyze_ticker(self, ticker):
+        if ticker in self.frames:
+            # Daemon mode: analyze the warm frame, fundamentals cached for the day
+            if ticker not in self.infos:
+                self.infos[ticker] = self.cache.get_cached_info(ticker)
+            return self.analyzer.analyze_stock(ticker, hist=self.frames[ticker], info=self.infos[ticker])
+        return self.analyzer.analyze_stock(ticker)
+    
+    def get_analyses(self, watchlist, force=False):
+        """
+        Analysis per ticker, recomputed only when a new bar (or a new close for today's bar)
+        arrived since the last run, or on a new day (fundamentals). Results persist in
+        analysis_state so separate runs share them. Sets last_analysis_stats.
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        placeholders = ','.join('?' * len(watchlist))
+        cursor.execute(f'''
+            SELECT ticker, bar_date, bar_close, analysis_json, analyzed_at
+            FROM analysis_state WHERE ticker IN ({placeholders})
+        ''', list(watchlist))
+        state = {row[0]: row[1:] for row in cursor.fetchall()}
+        today = datetime.now().strftime('%Y-%m-%d')
+        
+        analyses = {}
+        recomputed = 0
+        for ticker in watchlist:
+            bar_date, bar_close = self._latest_bar(ticker)
+            previous = state.get(ticker)
+            if (not force and previous and bar_date is not None
+                    and previous[0] == bar_date and previous[1] == bar_close and previous[3][:10] == today):
+                analyses[ticker] = json.loads(previous[2])
+                continue
+            
+            analysis = self._analyze_ticker(ticker)
+            analyses[ticker] = analysis
+            recomputed += 1
+            
+            if 'error' not in analysis and bar_date is not None:
+                cursor.execute('''
+                    INSERT OR REPLACE INTO analysis_state (ticker, bar_date, bar_close, analysis_json, analyzed_at)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (ticker, bar_date, bar_close, json.dumps(analysis, default=float), datetime.now().isoformat()))
+        
+        conn.commit()
+        conn.close()
+        
+        self.last_analysis_stats = {'recomputed': recomputed, 'reused': len(watchlist) - recomputed}
+        return analyses
+    
+    @timed('live_analysis')
+    def analyze_market(self, watchlist, config_path=None, config=None, force=False):
+        """Analyze all stocks and generate signals (unchanged tickers reuse their last analysis)"""
         # Load config
-        with open(config_path or _CONFIG_PATH, 'r') as f:
-            config = json.load(f)
+        if config is None:
+            with open(config_path or _CONFIG_PATH, 'r') as f:
+                config = json.load(f)
         
         buy_threshold = config['thresholds']['buy']
         sell_threshold = config['thresholds']['sell']
         
         signals = []
+        analyses = self.get_analyses(watchlist, force)
         
         for ticker in watchlist:
-            analysis = self.analyzer.analyze_stock(ticker)
+            analysis = analyses[ticker]
             
             if 'error' in analysis:
                 continue
@@ -250,11 +354,12 @@ class LiveMonitor:
         
         return signals
     
-    def execute_signal(self, signal, config_path=None):
+    def execute_signal(self, signal, config_path=None, config=None):
         """Execute a trading signal (paper trading)"""
         # Load config
-        with open(config_path or _CONFIG_PATH, 'r') as f:
-            config = json.load(f)
+        if config is None:
+            with open(config_path or _CONFIG_PATH, 'r') as f:
+                config = json.load(f)
         
         position_size = config['backtest']['position_size']
         stop_loss_pct = config['backtest']['stop_loss']
@@ -364,6 +469,64 @@ class LiveMonitor:
         conn.close()
         
         return total_value
+    
+    def run_cycle(self, config, execute=False):
+        """One incremental check: new bars -> prices -> signals (-> trades)"""
+        watchlist = config['watchlist']
+        changed = self.refresh_frames(watchlist)
+        self.update_positions_prices(watchlist)
+        signals = self.analyze_market(watchlist, config=config)
+        
+        results = []
+        if execute:
+            results = [self.execute_signal(signal, config=config) for signal in signals]
+        self.calculate_total_value()
+        
+        return {'changed': changed, 'signals': signals, 'executed': results, **self.last_analysis_stats}
+    
+    def run_daemon(self, interval_minutes=15, execute=False, market_hours_only=True, config_path=None):
+        """
+        Long-running mode: keeps frames, fundamentals and config in memory between checks
+        and runs a check every interval during market hours (SIGTERM/Ctrl+C to stop).
+        """
+        watcher = ConfigWatcher(config_path)
+        scheduler = MarketScheduler(interval_minutes, market_hours_only)
+        stopping = []
+        signal_lib.signal(signal_lib.SIGTERM, lambda *_: stopping.append(True))
+        
+        print(f"🟢 Live monitor daemon started (every {interval_minutes} min"
+              f"{', market hours only' if market_hours_only else ''}{', auto-execute' if execute else ''})")
+        
+        try:
+            while not stopping:
+                # Always run once at startup so frames are warm before the next open
+                if scheduler.should_run() or not self.frames:
+                    started = time.perf_counter()
+                    cycle = self.run_cycle(watcher.get(), execute)
+                    elapsed = time.perf_counter() - started
+                    
+                    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] ✅ Check done in {elapsed:.2f}s - "
+                          f"{len(cycle['changed'])} updated, {cycle['recomputed']} re-analyzed, "
+                          f"{len(cycle['signals'])} signal(s)")
+                    for signal in cycle['signals']:
+                        print(f"   {'🟢' if signal['action'] == 'BUY' else '🔴'} {signal['action']} {signal['ticker']} "
+                              f"@ ${signal['price']:.2f} (score {signal['score']:.1f}, {signal['reason']})")
+                    for result in cycle['executed']:
+                        print(f"   {result}")
+                
+                next_run = scheduler.next_run()
+                print(f"💤 Next check: {next_run.strftime('%Y-%m-%d %H:%M %Z')}")
+                
+                # Sleep in short steps so SIGTERM is handled promptly
+                while not stopping:
+                    remaining = (next_run - datetime.now(MarketScheduler.TZ)).total_seconds()
+                    if remaining <= 0:
+                        break
+                    time.sleep(min(remaining, 5))
+        except KeyboardInterrupt:
+            pass
+        
+        print("🛑 Live monitor daemon stopped")
 
 def main():
     parser = argparse.ArgumentParser(description='Live Market Monitor')
@@ -371,10 +534,22 @@ def main():
     parser.add_argument('--execute', action='store_true', help='Execute signals automatically')
     parser.add_argument('--status', action='store_true', help='Show portfolio status')
     parser.add_argument('--reset', action='store_true', help='Reset portfolio to $10,000')
+    parser.add_argument('--force', action='store_true', help='Re-analyze every ticker even without new data')
+    parser.add_argument('--daemon', action='store_true', help='Run continuously with warm data (use with --execute to trade)')
+    parser.add_argument('--interval', type=int, default=15, help='Daemon: minutes between checks (default: 15)')
+    parser.add_argument('--always', action='store_true', help='Daemon: also run outside market hours')
+    parser.add_argument('--metrics-port', type=int, help='Daemon: serve Prometheus metrics on this port')
     args = parser.parse_args()
     
     monitor = LiveMonitor()
     
+    if args.daemon:
+        if args.metrics_port:
+            from telemetry import start_http_server
+            start_http_server(args.metrics_port)
+        monitor.run_daemon(args.interval, execute=args.execute, market_hours_only=not args.always)
+        return
+    
     # Load watchlist
     with open(_CONFIG_PATH, 'r') as f:
         config = json.load(f)
@@ -382,7 +557,7 @@ def main():
     
     if args.reset:
         print("🔄 Resetting portfolio...")
-        os.remove(monitor.db_path)
+        remove_database(monitor.db_path)
         monitor = LiveMonitor()
         print("✅ Portfolio reset to $10,000")
         return
@@ -393,33 +568,16 @@ def main():
         monitor.calculate_total_value()
         state = monitor.get_portfolio_state()
         
-        print(f"\n💼 Portfolio Status")
-        print(f"{'='*60}")
-        print(f"💰 Cash: ${state['cash']:,.2f}")
-        print(f"📊 Total Value: ${state['total_value']:,.2f}")
-        initial = 10000
-        pnl = state['total_value'] - initial
-        pnl_pct = (pnl / initial) * 100
-        print(f"📈 P&L: ${pnl:+,.2f} ({pnl_pct:+.2f}%)")
-        print(f"🕐 Last Updated: {state['last_updated']}")
-        
-        if state['positions']:
-            print(f"\n📍 Positions:")
-            print(f"{'Ticker':<8} {'Shares':<8} {'Entry':<10} {'Current':<10} {'P&L %':<10} {'Value':<12}")
-            print("-" * 60)
-            for pos in state['positions']:
-                print(f"{pos['ticker']:<8} {pos['shares']:<8} ${pos['avg_price']:<9.2f} "
-                      f"${pos['current_price'] or pos['avg_price']:<9.2f} "
-                      f"{pos['pnl_pct']:>+8.2f}% ${pos['value']:>10.2f}")
-        else:
-            print("\n📍 No open positions")
+        live_state.print_status(state)
         
         return
     
     if args.analyze:
         print(f"\n🔍 Analyzing {len(watchlist)} stocks...")
         monitor.update_positions_prices(watchlist)
-        signals = monitor.analyze_market(watchlist)
+        signals = monitor.analyze_market(watchlist, force=args.force)
+        stats = monitor.last_analysis_stats
+        print(f"🔁 {stats['recomputed']}/{len(watchlist)} re-analyzed ({stats['reused']} unchanged since last run)")
         
         if signals:
             print(f"\n🚨 {len(signals)} Signal(s) Found:\n")
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Live State - Read-only view of the paper trading portfolio
+
+Standard library only (no pandas/numpy/yfinance), so `live_trade status` and
+`live_trade trades` start in a few tens of milliseconds. Prices shown are the ones
+stored by the last analysis run (daemon, cron or `live_trade analyze`).
+"""
+
+import os
+import sys
+import sqlite3
+import argparse
+import listings
+
+DEFAULT_DB = 'live_portfolio.db'
+INITIAL_CAPITAL = 10000
+
+
+def get_portfolio_state(db_path=DEFAULT_DB):
+    """Cash, total value and open positions as stored in the live portfolio DB"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    cursor.execute('SELECT cash, total_value, last_updated FROM portfolio WHERE id = 1')
+    cash, total_value, last_updated = cursor.fetchone()
+
+    cursor.execute('SELECT ticker, shares, avg_price, current_price, entry_date, stop_loss, take_profit FROM positions')
+    positions = []
+    for row in cursor.fetchall():
+        positions.append({
+            'ticker': row[0],
+            'shares': row[1],
+            'avg_price': row[2],
+            'current_price': row[3],
+            'entry_date': row[4],
+            'stop_loss': row[5],
+            'take_profit': row[6],
+            'value': (row[3] or row[2]) * row[1],
+            'pnl_pct': ((row[3] or row[2]) - row[2]) / row[2] * 100 if row[2] > 0 else 0
+        })
+
+    conn.close()
+
+    return {
+        'cash': cash,
+        'total_value': total_value,
+        'positions': positions,
+        'last_updated': last_updated
+    }
+
+
+def get_trades(db_path=DEFAULT_DB, limit=20, before=None):
+    """One page of trades, newest first: {'items': [...], 'next_cursor': ...} (pass next_cursor as before)"""
+    return listings.page(db_path, 'live_trades', after=before, limit=limit, desc=True)
+
+
+def print_status(state):
+    print(f"\n💼 Portfolio Status")
+    print(f"{'='*60}")
+    print(f"💰 Cash: ${state['cash']:,.2f}")
+    print(f"📊 Total Value: ${state['total_value']:,.2f}")
+    pnl = state['total_value'] - INITIAL_CAPITAL
+    pnl_pct = (pnl / INITIAL_CAPITAL) * 100
+    print(f"📈 P&L: ${pnl:+,.2f} ({pnl_pct:+.2f}%)")
+    print(f"🕐 Last Updated: {state['last_updated']}")
+
+    if state['positions']:
+        print(f"\n📍 Positions:")
+        print(f"{'Ticker':<8} {'Shares':<8} {'Entry':<10} {'Current':<10} {'P&L %':<10} {'Value':<12}")
+        print("-" * 60)
+        for pos in state['positions']:
+            print(f"{pos['ticker']:<8} {pos['shares']:<8} ${pos['avg_price']:<9.2f} "
+                  f"${pos['current_price'] or pos['avg_price']:<9.2f} "
+                  f"{pos['pnl_pct']:>+8.2f}% ${pos['value']:>10.2f}")
+    else:
+        print("\n📍 No open positions")
+
+
+def print_trades(trades):
+    rows = trades['items']
+    if not rows:
+        print('No trades yet.')
+        return
+    print(f"\n📋 Trade History ({len(rows)} trades)")
+    print('='*80)
+    print(f"{'Date':<20} {'Action':<6} {'Ticker':<8} {'Shares':<7} {'Price':<10} {'Reason':<12} {'P&L'}")
+    print('-'*80)
+    for trade in rows:
+        ticker, action, shares, price, reason, ts, pnl = (trade[c] for c in (
+            'ticker', 'action', 'shares', 'price', 'reason', 'timestamp', 'pnl'))
+        pnl_str = f'${pnl:+.2f}' if pnl else '-'
+        date_str = ts[:16] if ts else '-'
+        emoji = '🟢' if action == 'BUY' else '🔴'
+        print(f"{date_str:<20} {emoji}{action:<5} {ticker:<8} {shares:<7} ${price:<9.2f} {reason or '-':<12} {pnl_str}")
+    if trades['next_cursor']:
+        print(f"\nOlder trades: --before {trades['next_cursor']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Live portfolio state (read-only)')
+    parser.add_argument('command', choices=['status', 'trades'], help='Command')
+    parser.add_argument('--limit', type=int, default=20, help='trades: number of trades to show')
+    parser.add_argument('--before', help='trades: cursor printed at the end of the previous page')
+    parser.add_argument('--format', choices=sorted(listings.EXPORT_FORMATS),
+                        help='trades: stream the full history as csv/ndjson instead of a page')
+    parser.add_argument('--db', default=DEFAULT_DB, help='Live portfolio database')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print("No live portfolio yet (run ./live_trade analyze first).")
+        return
+
+    if args.command == 'status':
+        print_status(get_portfolio_state(args.db))
+    elif args.format:
+        chunks, _ = listings.export(args.db, 'live_trades', args.format, desc=True)
+        for chunk in chunks:
+            sys.stdout.write(chunk)
+    else:
+        print_trades(get_trades(args.db, args.limit, args.before))
+
+
+if __name__ == '__main__':
+    main()
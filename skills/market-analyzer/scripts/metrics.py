@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Performance Metrics - Vectorized risk/return statistics over equity curves and trades
+
+Every function reduces along the last axis, so the same call scores one curve (1-D array,
+returns a 0-d array) or thousands of them at once (curves x days, returns one value per
+curve). Curves of different lengths can be stacked by padding their end with NaN.
+
+Conventions: returns are simple daily returns, annualization uses TRADING_DAYS periods
+per year, percentages are returned as percentages (12.5 = 12.5%), drawdowns are negative.
+"""
+
+import warnings
+from contextlib import contextmanager
+
+import numpy as np
+
+TRADING_DAYS = 252
+
+
+@contextmanager
+def _quiet():
+    """Silence division and empty-slice warnings: those cases yield NaN/inf by design"""
+    with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        yield
+
+
+def prepend_initial(equity, initial=None):
+    """float array (..., days), optionally with the initial capital prepended as day 0"""
+    equity = np.asarray(equity, dtype=float)
+    if initial is not None:
+        initial = np.broadcast_to(np.asarray(initial, dtype=float), equity.shape[:-1])
+        equity = np.concatenate([initial[..., None], equity], axis=-1)
+    return equity
+
+
+def returns(equity):
+    """Daily simple returns (..., days - 1); NaN after a curve ends"""
+    equity = np.asarray(equity, dtype=float)
+    with _quiet():
+        return np.diff(equity, axis=-1) / equity[..., :-1]
+
+
+def final_value(equity):
+    """Last non-NaN value of each curve"""
+    equity = np.asarray(equity, dtype=float)
+    last = np.maximum((~np.isnan(equity)).sum(axis=-1) - 1, 0)
+    return np.take_along_axis(equity, last[..., None], axis=-1)[..., 0]
+
+
+def total_return(equity):
+    """Total return % from the first to the last value"""
+    equity = np.asarray(equity, dtype=float)
+    return (final_value(equity) / equity[..., 0] - 1) * 100
+
+
+def cagr(equity, years=None, periods_per_year=TRADING_DAYS):
+    """Compound annual growth rate %; years defaults to the number of returns / periods_per_year"""
+    equity = np.asarray(equity, dtype=float)
+    if years is None:
+        years = ((~np.isnan(equity)).sum(axis=-1) - 1) / periods_per_year
+    years = np.asarray(years, dtype=float)
+    growth = final_value(equity) / equity[..., 0]
+    with _quiet():
+        return np.where((years > 0) & (growth > 0), (growth ** (1 / years) - 1) * 100, np.nan)
+
+
+def volatility(equity, periods_per_year=TRADING_DAYS):
+    """Annualized standard deviation of daily returns, %"""
+    r = returns(equity)
+    with _quiet():
+        return np.nanstd(r, axis=-1, ddof=1) * np.sqrt(periods_per_year) * 100
+
+
+def sharpe(equity, risk_free=0.0, periods_per_year=TRADING_DAYS):
+    """Annualized Sharpe ratio (risk_free: annual rate as a fraction); NaN for flat curves"""
+    r = returns(equity) - risk_free / periods_per_year
+    with _quiet():
+        std = np.nanstd(r, axis=-1, ddof=1)
+        return np.where(std > 0, np.nanmean(r, axis=-1) / std * np.sqrt(periods_per_year), np.nan)
+
+
+def sortino(equity, target=0.0, periods_per_year=TRADING_DAYS):
+    """Annualized Sortino ratio: mean excess return over downside deviation below `target` (daily)"""
+    excess = returns(equity) - target
+    with _quiet():
+        downside = np.sqrt(np.nanmean(np.minimum(excess, 0) ** 2, axis=-1))
+        return np.where(downside > 0, np.nanmean(excess, axis=-1) / downside * np.sqrt(periods_per_year), np.nan)
+
+
+def drawdown(equity):
+    """Drawdown from the running peak at every point, as a fraction (0 at new highs, negative below)"""
+    equity = np.asarray(equity, dtype=float)
+    with _quiet():
+        return equity / np.fmax.accumulate(equity, axis=-1) - 1
+
+
+def max_drawdown(equity):
+    """Deepest drawdown %, negative"""
+    with _quiet():
+        return np.nanmin(drawdown(equity), axis=-1) * 100
+
+
+def max_drawdown_duration(equity):
+    """Longest stretch of consecutive days spent below a previous peak"""
+    underwater = drawdown(equity) < 0
+    index = np.broadcast_to(np.arange(underwater.shape[-1]), underwater.shape)
+    last_peak = np.maximum.accumulate(np.where(underwater, 0, index), axis=-1)
+    return (index - last_peak).max(axis=-1)
+
+
+def calmar(equity, years=None, periods_per_year=TRADING_DAYS):
+    """CAGR over the absolute max drawdown"""
+    with _quiet():
+        depth = -max_drawdown(equity)
+        return np.where(depth > 0, cagr(equity, years, periods_per_year) / depth, np.nan)
+
+
+def exposure(positions_value, equity):
+    """Average fraction of equity invested, %"""
+    with _quiet():
+        return np.nanmean(np.asarray(positions_value, dtype=float) / np.asarray(equity, dtype=float), axis=-1) * 100
+
+
+def turnover(traded_value, equity, periods_per_year=TRADING_DAYS):
+    """
+    Annualized turnover: one-way traded value (buys + sells, halved) over average equity, per year.
+    traded_value: total traded value per curve
+    """
+    equity = np.asarray(equity, dtype=float)
+    years = (~np.isnan(equity)).sum(axis=-1) / periods_per_year
+    with _quiet():
+        return np.asarray(traded_value, dtype=float) / 2 / np.nanmean(equity, axis=-1) / years
+
+
+def profit_factor(pnl):
+    """Gross profit over gross loss of closed trades (inf without losing trades, NaN without trades)"""
+    pnl = np.asarray(pnl, dtype=float)
+    gains = np.nansum(np.where(pnl > 0, pnl, 0), axis=-1)
+    losses = -np.nansum(np.where(pnl < 0, pnl, 0), axis=-1)
+    with _quiet():
+        return np.where(losses > 0, gains / losses, np.where(gains > 0, np.inf, np.nan))
+
+
+def win_rate(pnl):
+    """Share of winning trades, % (NaN without trades)"""
+    pnl = np.asarray(pnl, dtype=float)
+    count = (~np.isnan(pnl)).sum(axis=-1)
+    with _quiet():
+        return np.where(count > 0, (pnl > 0).sum(axis=-1) / count * 100, np.nan)
+
+
+# Metrics that rank curves (higher is better), for optimizers
+RANKING_METRICS = {
+    'return': total_return,
+    'cagr': cagr,
+    'sharpe': sharpe,
+    'sortino': sortino,
+    'calmar': calmar,
+    'max_drawdown': max_drawdown,
+}
+
+
+def stack(curves, initial=None):
+    """(curves x days) array from value sequences of possibly different lengths, NaN-padded at the end"""
+    width = max((len(c) for c in curves), default=0)
+    equity = np.full((len(curves), width), np.nan)
+    for i, curve in enumerate(curves):
+        equity[i, :len(curve)] = curve
+    return prepend_initial(equity, initial)
+
+
+def rank(equity, metric='sharpe'):
+    """(curve indices from best to worst under `metric`, scores); NaN scores rank last"""
+    scores = np.asarray(RANKING_METRICS[metric](equity), dtype=float)
+    return np.argsort(np.where(np.isnan(scores), np.inf, -scores), kind='stable'), scores
+
+
+def summary(equity, initial=None, years=None, pnl=None, positions_value=None, traded_value=None,
+            periods_per_year=TRADING_DAYS):
+    """
+    Every applicable metric as {name: array}. initial is prepended to the curves as day 0;
+    trade metrics need pnl, exposure needs positions_value, turnover needs traded_value.
+    """
+    curves = prepend_initial(equity, initial)
+    result = {
+        'final_value': final_value(curves),
+        'return_pct': total_return(curves),
+        'cagr_pct': cagr(curves, years, periods_per_year),
+        'volatility_pct': volatility(curves, periods_per_year),
+        'sharpe': sharpe(curves, periods_per_year=periods_per_year),
+        'sortino': sortino(curves, periods_per_year=periods_per_year),
+        'max_drawdown_pct': max_drawdown(curves),
+        'max_drawdown_days': max_drawdown_duration(curves),
+        'calmar': calmar(curves, years, periods_per_year),
+    }
+    if pnl is not None:
+        result['profit_factor'] = profit_factor(pnl)
+        result['win_rate'] = win_rate(pnl)
+    if positions_value is not None:
+        result['exposure_pct'] = exposure(positions_value, equity)
+    if traded_value is not None:
+        result['turnover'] = turnover(traded_value, equity, periods_per_year)
+    return result
+
+
+def scalar(value):
+    """Python float from a 0-d metric, None when undefined (NaN) or unbounded (inf), for JSON and SQLite"""
+    value = float(value)
+    return value if np.isfinite(value) else None
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo Bootstrap - Confidence intervals around single-path backtest results
+
+A backtest produces one path: one ordering of its trades, one sequence of daily returns.
+Resampling them with replacement gives thousands of equally plausible paths, and the spread
+of their outcomes says how much of the reported return and drawdown is luck of the ordering.
+
+- Trades: each trade's return on equity is drawn independently (trades are taken one after
+  another, so their order is what the bootstrap shuffles).
+- Daily returns: circular block bootstrap, blocks of BLOCK_DAYS consecutive days, so
+  volatility clustering and short-term autocorrelation survive the resampling.
+
+Paths are drawn as one (paths x steps) index matrix and compounded with cumprod; drawdowns
+come from metrics.py on the same 2-D array. Long histories are processed in slices of paths
+(PATH_CHUNK_CELLS cells at a time) so memory stays bounded.
+"""
+
+import numpy as np
+
+import metrics
+
+DEFAULT_PATHS = 10000
+BLOCK_DAYS = 20
+CONFIDENCE = 0.90
+PATH_CHUNK_CELLS = 4_000_000  # ~32 MB of float64 per slice
+
+
+def _outcomes(returns, draw, n_paths, seed):
+    """
+    Final return % and max drawdown % of n_paths resampled paths, as long as `returns`.
+    draw(rng, paths) -> (paths x len(returns)) indices into `returns`.
+    """
+    rng = np.random.default_rng(seed)
+    chunk = max(1, PATH_CHUNK_CELLS // max(len(returns), 1))
+    final, drawdown = np.empty(n_paths), np.empty(n_paths)
+    for lo in range(0, n_paths, chunk):
+        hi = min(lo + chunk, n_paths)
+        growth = np.cumprod(1 + returns[draw(rng, hi - lo)], axis=1)
+        equity = metrics.prepend_initial(growth, 1.0)
+        final[lo:hi] = (growth[:, -1] - 1) * 100
+        drawdown[lo:hi] = metrics.max_drawdown(equity)
+    return {'return_pct': final, 'max_drawdown_pct': drawdown}
+
+
+def bootstrap_trades(trade_returns, n_paths=DEFAULT_PATHS, seed=None):
+    """
+    Resample whole trades with replacement. trade_returns: each trade's P&L as a fraction of
+    the equity it was taken with. Drawdowns are measured trade to trade (not intra-trade).
+    """
+    trade_returns = np.asarray(trade_returns, dtype=float)
+    n = len(trade_returns)
+    return _outcomes(trade_returns, lambda rng, paths: rng.integers(0, n, size=(paths, n)), n_paths, seed)
+
+
+def block_bootstrap(daily_returns, n_paths=DEFAULT_PATHS, block=BLOCK_DAYS, seed=None):
+    """Circular block bootstrap of daily returns: paths as long as the history, built from random blocks"""
+    daily_returns = np.asarray(daily_returns, dtype=float)
+    n = len(daily_returns)
+    block = max(1, min(block, n))
+    n_blocks = -(-n // block)
+    offsets = np.arange(block)
+
+    def draw(rng, paths):
+        starts = rng.integers(0, n, size=(paths, n_blocks, 1))
+        return ((starts + offsets) % n).reshape(paths, n_blocks * block)[:, :n]
+
+    return _outcomes(daily_returns, draw, n_paths, seed)
+
+
+def confidence_interval(samples, confidence=CONFIDENCE):
+    """{'low', 'median', 'high', 'mean'} of samples for a two-sided interval"""
+    tail = (1 - confidence) / 2 * 100
+    low, median, high = np.percentile(samples, [tail, 50, 100 - tail])
+    return {'low': float(low), 'median': float(median), 'high': float(high), 'mean': float(np.mean(samples))}
+
+
+def report(outcomes, method, confidence=CONFIDENCE):
+    """JSON-ready summary of bootstrap outcomes"""
+    returns = outcomes['return_pct']
+    return {
+        'method': method,
+        'paths': len(returns),
+        'confidence': confidence,
+        'return_pct': confidence_interval(returns, confidence),
+        'max_drawdown_pct': confidence_interval(outcomes['max_drawdown_pct'], confidence),
+        'prob_loss_pct': float((returns < 0).mean() * 100),
+    }
+
+
+def from_trades(pnl, initial_capital, n_paths=DEFAULT_PATHS, seed=None, confidence=CONFIDENCE):
+    """Trade bootstrap of a sequential trade list (P&L amounts, in order); None with fewer than 2 trades"""
+    pnl = np.asarray(pnl, dtype=float)
+    if len(pnl) < 2 or n_paths <= 0:
+        return None
+    capital_before = initial_capital + np.concatenate([[0.0], np.cumsum(pnl)[:-1]])
+    return report(bootstrap_trades(pnl / capital_before, n_paths, seed), 'trades', confidence)
+
+
+def from_equity(equity, initial_capital, n_paths=DEFAULT_PATHS, block=BLOCK_DAYS, seed=None, confidence=CONFIDENCE):
+    """Block bootstrap of a daily equity curve; None with fewer than 2 days"""
+    equity = np.asarray(equity, dtype=float)
+    if len(equity) < 2 or n_paths <= 0:
+        return None
+    daily = metrics.returns(metrics.prepend_initial(equity, initial_capital))
+    return report(block_bootstrap(daily, n_paths, block, seed), 'block', confidence)
+
+
+def format_report(mc):
+    """Text lines for CLI output"""
+    r, dd = mc['return_pct'], mc['max_drawdown_pct']
+    return [
+        f"Monte Carlo ({mc['paths']:,} {mc['method']} paths, {mc['confidence']:.0%} interval):",
+        f"  Return:           {r['low']:+.2f}% … {r['high']:+.2f}% (median {r['median']:+.2f}%)",
+        f"  Max Drawdown:     {dd['low']:.2f}% … {dd['high']:.2f}% (median {dd['median']:.2f}%)",
+        f"  Probability of loss: {mc['prob_loss_pct']:.1f}%",
+    ]
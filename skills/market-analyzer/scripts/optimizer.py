@@ -7,12 +7,20 @@ import pandas as pd
 import numpy as np
 from itertools import product
 from backtest import Backtester
+from portfolio_sim import PortfolioSimulator
+from data_provider import period_to_start
 from datetime import datetime
+import io
+import os
 import json
+import contextlib
+
+STRATEGIES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'strategies.json')
 
 class StrategyOptimizer:
     def __init__(self):
         self.backtester = Backtester()
+        self.simulator = None  # Built on first compare (creates portfolio_sim.db)
     
     def optimize_thresholds(self, ticker, period='2y', 
                            buy_range=(5.0, 7.5, 0.5),
@@ -109,81 +117,50 @@ class StrategyOptimizer:
         
         return results[0] if results else None
     
-    def compare_strategies(self, tickers, period='1y'):
-        """Compare multiple pre-defined strategies"""
-        
-        strategies = {
-            'Conservative': {
-                'buy_threshold': 7.0,
-                'sell_threshold': 4.0,
-                'weights': {'technical': 0.3, 'fundamental': 0.5, 'sentiment': 0.2},
-                'stop_loss': 0.05,
-                'take_profit': 0.10
-            },
-            'Balanced': {
-                'buy_threshold': 6.0,
-                'sell_threshold': 4.5,
-                'weights': {'technical': 0.4, 'fundamental': 0.4, 'sentiment': 0.2},
-                'stop_loss': 0.05,
-                'take_profit': 0.15
-            },
-            'Aggressive': {
-                'buy_threshold': 5.5,
-                'sell_threshold': 5.0,
-                'weights': {'technical': 0.6, 'fundamental': 0.3, 'sentiment': 0.1},
-                'stop_loss': 0.07,
-                'take_profit': 0.20
-            },
-            'Momentum': {
-                'buy_threshold': 6.5,
-                'sell_threshold': 4.0,
-                'weights': {'technical': 0.7, 'fundamental': 0.2, 'sentiment': 0.1},
-                'stop_loss': 0.04,
-                'take_profit': 0.12
-            }
-        }
-        
+    def compare_strategies(self, tickers, period='1y', strategies=None):
+        """Compare strategies (default: strategies.json) on the same universe and period, in one simulation pass"""
+        if strategies is None:
+            with open(STRATEGIES_PATH, 'r') as f:
+                strategies = json.load(f)
+        
+        end = datetime.now()
+        start = period_to_start(period, end)
         print(f"\n📊 Comparing {len(strategies)} strategies on {len(tickers)} stocks over {period}\n")
         
-        results = {}
-        
         for strategy_name, config in strategies.items():
-            print(f"\n{'='*60}")
-            print(f"Strategy: {strategy_name}")
-            print(f"{'='*60}")
-            print(f"BUY: {config['buy_threshold']:.1f} | SELL: {config['sell_threshold']:.1f}")
-            print(f"Weights: Tech={config['weights']['technical']:.0%}, "
-                  f"Fund={config['weights']['fundamental']:.0%}, "
-                  f"Sent={config['weights']['sentiment']:.0%}")
-            print(f"Stop-loss: {config['stop_loss']:.0%} | Take-profit: {config['take_profit']:.0%}")
-            
-            strategy_results = {
-                'config': config,
-                'stocks': {},
-                'avg_return': 0,
-                'avg_win_rate': 0,
-                'total_trades': 0
+            weights = config.get('weights', {})
+            print(f"{strategy_name:15s} BUY: {config['buy_threshold']:.1f} | SELL: {config['sell_threshold']:.1f} | "
+                  f"Weights: Tech={weights.get('technical', 0):.0%}, Fund={weights.get('fundamental', 0):.0%}, "
+                  f"Sent={weights.get('sentiment', 0):.0%} | "
+                  f"SL: {config['stop_loss']:.0%} TP: {config['take_profit']:.0%}")
+        
+        if self.simulator is None:
+            self.simulator = PortfolioSimulator()
+        with contextlib.redirect_stdout(io.StringIO()):  # Silence per-trade logs
+            runs = self.simulator.simulate_strategies(strategies, start.strftime('%Y-%m-%d'),
+                                                      end.strftime('%Y-%m-%d'), universe=tickers)
+        
+        results = {
+            strategy_name: {
+                'config': strategies[strategy_name],
+                'return_pct': run['return_pct'],
+                'max_drawdown_pct': run['max_drawdown_pct'],
+                'sharpe': run['sharpe'],
+                'win_rate': run['win_rate'],
+                'total_trades': run['trades_made']
             }
-            
-            # Would test each ticker
-            for ticker in tickers:
-                # Placeholder
-                strategy_results['stocks'][ticker] = {
-                    'return_pct': 0,
-                    'win_rate': 0,
-                    'num_trades': 0
-                }
-            
-            results[strategy_name] = strategy_results
+            for strategy_name, run in runs.items()
+        }
         
         # Summary
         print(f"\n{'='*60}")
         print("📈 STRATEGY COMPARISON SUMMARY")
         print(f"{'='*60}\n")
         
-        for strategy_name, data in results.items():
-            print(f"{strategy_name:15s} → Avg Return: {data['avg_return']:+.2f}% | "
-                  f"Avg Win Rate: {data['avg_win_rate']:.1f}% | "
+        for strategy_name, data in sorted(results.items(), key=lambda item: item[1]['return_pct'], reverse=True):
+            print(f"{strategy_name:15s} → Return: {data['return_pct']:+.2f}% | "
+                  f"Max DD: {data['max_drawdown_pct']:.1f}% | "
+                  f"Win Rate: {data['win_rate']:.1f}% | "
                   f"Total Trades: {data['total_trades']}")
         
         return results
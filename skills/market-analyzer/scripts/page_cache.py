@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Page Cache - Rendered dashboard pages keyed on the version of the data behind them
+
+A page is stored once per (key, version) as UTF-8 and gzip bytes. The ETag is derived from
+(key, version) alone, so a matching If-None-Match is answered with a 304 before the page is
+looked up or rendered. Versions are cheap fingerprints chosen by the caller (file mtime,
+portfolio revision counters, ...): when the data changes, the version changes and the stale
+entry simply stops being requested until LRU eviction drops it.
+"""
+
+import gzip
+import uuid
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+
+import telemetry
+
+CachedPage = namedtuple('CachedPage', 'etag body gzipped')
+
+GZIP_LEVEL = 6
+# ETags of a previous process must not validate pages rendered by a newer build
+_PROCESS_TOKEN = uuid.uuid4().hex
+
+
+def make_etag(key, version):
+    """Weak ETag: the same validator covers the gzip and identity encodings of a page"""
+    digest = hashlib.sha1(repr((_PROCESS_TOKEN, key, version)).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match header (possibly a list, possibly weak) against our weak ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag[2:]
+    return any(candidate.strip().removeprefix('W/') == opaque for candidate in if_none_match.split(','))
+
+
+class PageCache:
+    """Thread-safe LRU of rendered pages, one entry per key (a new version replaces the old one)"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._pages = OrderedDict()  # key -> (version, CachedPage)
+        self._lock = threading.Lock()
+
+    def get(self, key, version, render):
+        """The cached page for (key, version), calling render() -> str on a miss"""
+        with self._lock:
+            cached = self._pages.get(key)
+            if cached is not None and cached[0] == version:
+                self._pages.move_to_end(key)
+                telemetry.CACHE_REQUESTS.inc(kind='page', result='hit')
+                return cached[1]
+        telemetry.CACHE_REQUESTS.inc(kind='page', result='miss')
+
+        # Render outside the lock: two concurrent misses both render, the last one is kept
+        body = render().encode('utf-8')
+        page = CachedPage(make_etag(key, version), body, gzip.compress(body, GZIP_LEVEL))
+        with self._lock:
+            self._pages[key] = (version, page)
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.max_entries:
+                self._pages.popitem(last=False)
+        return page
+
+    def invalidate(self, key=None):
+        """Drop one page, or every page"""
+        with self._lock:
+            if key is None:
+                self._pages.clear()
+            else:
+                self._pages.pop(key, None)
+
+    def __len__(self):
+        return len(self._pages)
@@ -3,14 +3,35 @@
 Portfolio Simulator - Simulate trading strategy with virtual capital
 """
 
-import yfinance as yf
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import sqlite3
 import json
 import argparse
+from array import array
 from analyzer import MarketAnalyzer
+import metrics
+import montecarlo
+import trading_calendar
+from kernels import select_top_k
+from data_provider import get_provider
+from telemetry import timed
+from db_migrations import migrate, PORTFOLIO_SIM_MIGRATIONS
+
+PORTFOLIO_COLUMNS = 'id, name, initial_capital, current_capital, start_date, end_date, mode, config, created_at'
+CHECKPOINT_EVERY = 20  # Simulated days between commits
+
+# portfolio_summary columns after portfolio_id
+SUMMARY_COLUMNS = ('days', 'final_value', 'return_pct', 'cagr_pct', 'max_drawdown_pct', 'sharpe',
+                   'num_trades', 'num_closed', 'win_rate', 'updated_at')
+SUMMARY_ORDER = {
+    'start_date': 'p.start_date, p.name',
+    'return': 's.return_pct DESC',
+    'sharpe': 's.sharpe DESC',
+    'drawdown': 's.max_drawdown_pct DESC',
+    'id': 'p.id',
+}
 
 # Import cache
 try:
@@ -20,87 +41,278 @@ except ImportError:
     USE_CACHE = False
     print("⚠️  Warning: data_cache not available, will use direct API calls")
 
+
+def equity_metrics(dates, equity, initial_capital):
+    """Final value, return, CAGR, volatility, drawdown and risk-adjusted ratios of a daily equity curve"""
+    if len(equity) == 0:
+        return {'days': 0, 'final_value': initial_capital, 'return_pct': 0.0, 'cagr_pct': None,
+                'max_drawdown_pct': 0.0, 'sharpe': None, 'volatility_pct': None, 'sortino': None,
+                'max_drawdown_days': 0}
+    
+    years = (datetime.strptime(dates[-1], '%Y-%m-%d') - datetime.strptime(dates[0], '%Y-%m-%d')).days / 365.25
+    m = metrics.summary(equity, initial=initial_capital, years=years)
+    return {
+        'days': len(equity),
+        'final_value': float(m['final_value']),
+        'return_pct': float(m['return_pct']),
+        'cagr_pct': metrics.scalar(m['cagr_pct']),
+        'max_drawdown_pct': float(m['max_drawdown_pct']),
+        'sharpe': metrics.scalar(m['sharpe']),
+        'volatility_pct': metrics.scalar(m['volatility_pct']),
+        'sortino': metrics.scalar(m['sortino']),
+        'max_drawdown_days': int(m['max_drawdown_days']),
+    }
+
+
+def write_summary(conn, portfolio_id, initial_capital):
+    """Materialize a portfolio's metrics into portfolio_summary (caller commits)"""
+    rows = conn.execute('SELECT date, total_value FROM snapshots WHERE portfolio_id = ? ORDER BY date',
+                        (portfolio_id,)).fetchall()
+    num_trades = conn.execute('SELECT COUNT(*) FROM trades_log WHERE portfolio_id = ?', (portfolio_id,)).fetchone()[0]
+    num_closed, wins = conn.execute('''
+        SELECT COUNT(*), COALESCE(SUM(pnl > 0), 0) FROM positions WHERE portfolio_id = ? AND status = 'closed'
+    ''', (portfolio_id,)).fetchone()
+    
+    summary = equity_metrics([r[0] for r in rows], [r[1] for r in rows], initial_capital)
+    summary.update({
+        'num_trades': num_trades,
+        'num_closed': num_closed,
+        'win_rate': wins / num_closed * 100 if num_closed else 0.0,
+        'updated_at': datetime.now().isoformat()
+    })
+    conn.execute(f'''
+        INSERT OR REPLACE INTO portfolio_summary (portfolio_id, {', '.join(SUMMARY_COLUMNS)})
+        VALUES (?, {', '.join('?' * len(SUMMARY_COLUMNS))})
+    ''', (portfolio_id, *(summary[c] for c in SUMMARY_COLUMNS)))
+    return summary
+
+
+def refresh_summaries(db_path, missing_only=True):
+    """Backfill portfolio_summary for simulated portfolios (all of them if missing_only=False)"""
+    conn = sqlite3.connect(db_path)
+    query = 'SELECT id, initial_capital FROM portfolios WHERE end_date IS NOT NULL'
+    if missing_only:
+        query += ' AND id NOT IN (SELECT portfolio_id FROM portfolio_summary)'
+    portfolios = conn.execute(query).fetchall()
+    for portfolio_id, initial_capital in portfolios:
+        write_summary(conn, portfolio_id, initial_capital)
+    conn.commit()
+    conn.close()
+    return len(portfolios)
+
+
+def list_portfolio_summaries(db_path, order_by='start_date', limit=None):
+    """Portfolios joined with their materialized metrics (None until the first completed run)"""
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    query = f'''
+        SELECT p.id, p.name, p.initial_capital, p.current_capital, p.start_date, p.end_date, p.mode,
+               {', '.join('s.' + c for c in SUMMARY_COLUMNS)}
+        FROM portfolios p LEFT JOIN portfolio_summary s ON s.portfolio_id = p.id
+        ORDER BY {SUMMARY_ORDER[order_by]}
+    '''
+    params = ()
+    if limit:
+        query += ' LIMIT ?'
+        params = (limit,)
+    rows = [dict(row) for row in conn.execute(query, params)]
+    conn.close()
+    return rows
+
+
+class SqliteLedger:
+    """Simulation ledger backed by portfolio_sim.db, committed at periodic checkpoints"""
+    
+    def __init__(self, db_path, portfolio_id, checkpoint_every=CHECKPOINT_EVERY):
+        self.conn = sqlite3.connect(db_path)
+        self.portfolio_id = portfolio_id
+        self.checkpoint_every = checkpoint_every
+        self._pending_days = 0
+        self._last = None  # (date, cash, total value) of the latest snapshot
+    
+    def open_positions(self):
+        rows = self.conn.execute('''
+            SELECT ticker, id, entry_price, shares, capital_invested
+            FROM positions WHERE portfolio_id = ? AND status = 'open'
+        ''', (self.portfolio_id,)).fetchall()
+        return {row[0]: row[1:] for row in rows}
+    
+    def buy(self, date_str, ticker, price, shares, value, score):
+        cursor = self.conn.execute('''
+            INSERT INTO positions (portfolio_id, ticker, entry_date, entry_price, shares, capital_invested, status)
+            VALUES (?, ?, ?, ?, ?, ?, 'open')
+        ''', (self.portfolio_id, ticker, date_str, price, shares, value))
+        self.conn.execute('''
+            INSERT INTO trades_log (portfolio_id, date, action, ticker, price, shares, value, score, signal)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (self.portfolio_id, date_str, 'BUY', ticker, price, shares, value, score, 'BUY'))
+        return cursor.lastrowid
+    
+    def sell(self, position_id, date_str, ticker, price, shares, value, reason, pnl, pnl_pct):
+        self.conn.execute('''
+            UPDATE positions
+            SET exit_date = ?, exit_price = ?, exit_reason = ?, pnl = ?, pnl_pct = ?, status = 'closed'
+            WHERE id = ?
+        ''', (date_str, price, reason, pnl, pnl_pct, position_id))
+        self.conn.execute('''
+            INSERT INTO trades_log (portfolio_id, date, action, ticker, price, shares, value, signal)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (self.portfolio_id, date_str, 'SELL', ticker, price, shares, value, reason))
+    
+    def snapshot(self, date_str, total_value, cash, positions_value, num_positions, total_return_pct):
+        self.conn.execute('''
+            INSERT INTO snapshots (portfolio_id, date, total_value, cash, positions_value, num_positions, total_return_pct)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (self.portfolio_id, date_str, total_value, cash, positions_value, num_positions, total_return_pct))
+        self._last = (date_str, cash, total_value)
+        self._pending_days += 1
+        if self._pending_days >= self.checkpoint_every:
+            self.checkpoint()
+    
+    def checkpoint(self):
+        """Persist cash and progress, then commit everything simulated so far (positions, trades, snapshots)"""
+        if self._last:
+            date_str, cash, total_value = self._last
+            self.conn.execute('''
+                UPDATE portfolios
+                SET cash = ?, current_capital = ?, last_processed_date = ?
+                WHERE id = ?
+            ''', (cash, total_value, date_str, self.portfolio_id))
+        self.conn.commit()
+        self._pending_days = 0
+    
+    def finish(self, end_date, initial_capital):
+        self.conn.execute('UPDATE portfolios SET end_date = ? WHERE id = ?', (end_date, self.portfolio_id))
+        write_summary(self.conn, self.portfolio_id, initial_capital)
+        self.checkpoint()
+    
+    def close(self):
+        self.conn.close()  # Days simulated since the last checkpoint are rolled back
+
+
+class MemoryLedger:
+    """Simulation ledger kept in compact in-memory arrays (nothing is written to disk)"""
+    
+    def __init__(self):
+        self.buys = 0
+        self.dates = []
+        self.equity = array('d')
+        self.invested = array('d')
+        self.closed_pnl = array('d')
+        self.closed_pnl_pct = array('d')
+        self.traded_value = 0.0
+    
+    def open_positions(self):
+        return {}
+    
+    def buy(self, date_str, ticker, price, shares, value, score):
+        self.buys += 1
+        self.traded_value += value
+        return self.buys  # Position id
+    
+    def sell(self, position_id, date_str, ticker, price, shares, value, reason, pnl, pnl_pct):
+        self.traded_value += value
+        self.closed_pnl.append(pnl)
+        self.closed_pnl_pct.append(pnl_pct)
+    
+    def snapshot(self, date_str, total_value, cash, positions_value, num_positions, total_return_pct):
+        self.dates.append(date_str)
+        self.equity.append(total_value)
+        self.invested.append(positions_value)
+    
+    def summary(self, initial_capital):
+        """Same metrics as portfolio_summary, plus trade statistics, exposure and turnover"""
+        equity = np.frombuffer(self.equity, dtype=np.float64) if self.equity else np.array([])
+        closed = np.frombuffer(self.closed_pnl_pct, dtype=np.float64) if self.closed_pnl_pct else np.array([])
+        result = equity_metrics(self.dates, equity, initial_capital)
+        result.update({
+            'success': True,
+            'num_buys': self.buys,
+            'num_closed': len(closed),
+            'win_rate': float((closed > 0).mean()) * 100 if len(closed) else 0.0,
+            'avg_trade_pct': float(closed.mean()) if len(closed) else 0.0,
+            'profit_factor': metrics.scalar(metrics.profit_factor(self.closed_pnl)) if len(closed) else None,
+            'exposure_pct': metrics.scalar(metrics.exposure(self.invested, equity)) if len(equity) else 0.0,
+            'turnover': metrics.scalar(metrics.turnover(self.traded_value, equity)) if len(equity) else 0.0,
+        })
+        return result
+    
+    def equity_curve(self):
+        """[(date, total value), ...]"""
+        return list(zip(self.dates, self.equity))
+
+
+class DayMarket:
+    """Prices and analysis sub-scores for one simulated day, computed once and shared by every strategy"""
+    
+    def __init__(self, day, price_for_date, analyzer):
+        self.day = day
+        self._price_for_date = price_for_date
+        self.analyzer = analyzer
+        self._prices = {}
+        self._scores = {}
+    
+    def price(self, ticker):
+        if ticker not in self._prices:
+            self._prices[ticker] = self._price_for_date(ticker, self.day)
+        return self._prices[ticker]
+    
+    def scores(self, ticker):
+        """analysis['scores'] (total, technical, fundamental, sentiment), None if the ticker cannot be analyzed"""
+        if ticker not in self._scores:
+            try:
+                analysis = self.analyzer.analyze_stock(ticker, as_of=self.day)
+                self._scores[ticker] = None if 'error' in analysis else analysis['scores']
+            except Exception as e:
+                print(f"⚠️  Error analyzing {ticker}: {e}")
+                self._scores[ticker] = None
+        return self._scores[ticker]
+
+
+class StrategyBook:
+    """One strategy's state during a simulation: settings, ledger, cash and open positions"""
+    
+    def __init__(self, settings, ledger, universe, initial_capital, cash, name=None, default_weights=None):
+        self.settings = settings
+        self.ledger = ledger
+        self.universe = universe
+        self.initial_capital = initial_capital
+        self.cash = cash
+        self.name = name
+        # Open positions: ticker -> (position id, entry price, shares, capital invested)
+        self.open_positions = ledger.open_positions()
+        self.trades_made = 0
+        self.total_value = cash
+        # Re-weighting is only needed when the strategy's weights differ from the analyzer's
+        weights = settings.get('weights')
+        self.weights = weights if weights and weights != default_weights else None
+    
+    def score(self, scores):
+        """Total score under this strategy's weights (the analyzer's own total when they match)"""
+        if scores is None:
+            return None
+        if self.weights is None:
+            return scores['total']
+        return round(sum(scores[k] * self.weights.get(k, 0) for k in ('technical', 'fundamental', 'sentiment')), 2)
+
+
 class PortfolioSimulator:
-    def __init__(self, db_path='portfolio_sim.db'):
+    def __init__(self, db_path='portfolio_sim.db', provider=None):
         self.db_path = db_path
-        self.analyzer = MarketAnalyzer()
+        self.provider = provider or get_provider()
+        self.analyzer = MarketAnalyzer(provider=self.provider)
         self.init_database()
     
     def init_database(self):
-        """Initialize SQLite database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Portfolios table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS portfolios (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT UNIQUE NOT NULL,
-                initial_capital REAL NOT NULL,
-                current_capital REAL NOT NULL,
-                start_date TEXT NOT NULL,
-                end_date TEXT,
-                mode TEXT NOT NULL,
-                config TEXT,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Positions table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS positions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                portfolio_id INTEGER NOT NULL,
-                ticker TEXT NOT NULL,
-                entry_date TEXT NOT NULL,
-                entry_price REAL NOT NULL,
-                shares INTEGER NOT NULL,
-                capital_invested REAL NOT NULL,
-                exit_date TEXT,
-                exit_price REAL,
-                exit_reason TEXT,
-                pnl REAL,
-                pnl_pct REAL,
-                status TEXT DEFAULT 'open',
-                FOREIGN KEY (portfolio_id) REFERENCES portfolios (id)
-            )
-        ''')
-        
-        # Daily snapshots table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS snapshots (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                portfolio_id INTEGER NOT NULL,
-                date TEXT NOT NULL,
-                total_value REAL NOT NULL,
-                cash REAL NOT NULL,
-                positions_value REAL NOT NULL,
-                num_positions INTEGER NOT NULL,
-                daily_return_pct REAL,
-                total_return_pct REAL,
-                FOREIGN KEY (portfolio_id) REFERENCES portfolios (id)
-            )
-        ''')
-        
-        # Trades log
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS trades_log (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                portfolio_id INTEGER NOT NULL,
-                date TEXT NOT NULL,
-                action TEXT NOT NULL,
-                ticker TEXT NOT NULL,
-                price REAL NOT NULL,
-                shares INTEGER NOT NULL,
-                value REAL NOT NULL,
-                score REAL,
-                signal TEXT,
-                FOREIGN KEY (portfolio_id) REFERENCES portfolios (id)
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        """Create or upgrade the SQLite schema (see db_migrations.py)"""
+        migrate(self.db_path, PORTFOLIO_SIM_MIGRATIONS)
+    
+    def refresh_summaries(self, missing_only=True):
+        """
+        Backfill portfolio_summary for simulated portfolios (all of them if missing_only=False).
+        Explicit only (`portfolio_sim.py summaries`): migration 7 already backfilled old databases.
+        """
+        return refresh_summaries(self.db_path, missing_only)
     
     def create_portfolio(self, name, initial_capital, start_date, mode='historical', config=None):
         """Create a new portfolio simulation"""
@@ -109,9 +321,9 @@ class PortfolioSimulator:
         
         try:
             cursor.execute('''
-                INSERT INTO portfolios (name, initial_capital, current_capital, start_date, mode, config)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (name, initial_capital, initial_capital, start_date, mode, json.dumps(config or {})))
+                INSERT INTO portfolios (name, initial_capital, current_capital, cash, start_date, mode, config)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (name, initial_capital, initial_capital, initial_capital, start_date, mode, json.dumps(config or {})))
             
             portfolio_id = cursor.lastrowid
             conn.commit()
@@ -128,27 +340,24 @@ class PortfolioSimulator:
         finally:
             conn.close()
     
-    def run_simulation(self, portfolio_id, end_date=None, universe=None):
-        """Run portfolio simulation"""
+    def reset_simulation(self, portfolio_id):
+        """Drop a portfolio's simulated history so the next run starts again from start_date"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
-        
-        # Get portfolio
-        cursor.execute('SELECT * FROM portfolios WHERE id = ?', (portfolio_id,))
-        portfolio = cursor.fetchone()
-        
-        if not portfolio:
-            conn.close()
-            return {'error': 'Portfolio not found'}
-        
-        portfolio_id, name, initial_capital, current_capital, start_date, _, mode, config_str, _ = portfolio
-        config = json.loads(config_str) if config_str else {}
-        
-        # Default config
-        position_size = config.get('position_size', 0.2)
-        stop_loss = config.get('stop_loss', 0.05)
-        take_profit = config.get('take_profit', 0.15)
-        # Load global config if not specified in portfolio config
+        cursor.execute('DELETE FROM trades_log WHERE portfolio_id = ?', (portfolio_id,))
+        cursor.execute('DELETE FROM positions WHERE portfolio_id = ?', (portfolio_id,))
+        cursor.execute('DELETE FROM snapshots WHERE portfolio_id = ?', (portfolio_id,))
+        cursor.execute('DELETE FROM portfolio_summary WHERE portfolio_id = ?', (portfolio_id,))
+        cursor.execute('''
+            UPDATE portfolios
+            SET current_capital = initial_capital, cash = initial_capital, end_date = NULL, last_processed_date = NULL
+            WHERE id = ?
+        ''', (portfolio_id,))
+        conn.commit()
+        conn.close()
+    
+    def _settings(self, config):
+        """Strategy parameters from a portfolio config, falling back to config.json thresholds"""
         global_config = {}
         try:
             import os
@@ -158,238 +367,329 @@ class PortfolioSimulator:
         except:
             pass
         
-        buy_threshold = config.get('buy_threshold', global_config.get('thresholds', {}).get('buy', 5.5))
-        sell_threshold = config.get('sell_threshold', global_config.get('thresholds', {}).get('sell', 4.5))
+        return {
+            'position_size': config.get('position_size', 0.2),
+            'stop_loss': config.get('stop_loss', 0.05),
+            'take_profit': config.get('take_profit', 0.15),
+            'buy_threshold': config.get('buy_threshold', global_config.get('thresholds', {}).get('buy', 5.5)),
+            'sell_threshold': config.get('sell_threshold', global_config.get('thresholds', {}).get('sell', 4.5)),
+            'max_positions': config.get('max_positions'),  # None = limited by cash only
+            'weights': config.get('weights'),  # None = analyzer weights
+            'universe': config.get('universe', ['AAPL', 'MSFT', 'GOOGL', 'NVDA', 'TSLA', 'AMZN', 'META'])
+        }
+    
+    def _preload(self, universe, start, end):
+        if USE_CACHE:
+            cache = DataCache(provider=self.provider)
+            print(f"📥 Préchargement des données pour {len(universe)} actions...")
+            success, failed = cache.preload_universe(universe, start, end)
+            if failed:
+                print(f"⚠️  Échec pour: {', '.join(failed)}")
+    
+    @timed('simulation')
+    def run_simulation(self, portfolio_id, end_date=None, universe=None, resume=True, checkpoint_every=CHECKPOINT_EVERY,
+                       mc_paths=0):
+        """
+        Run portfolio simulation up to end_date (default: today).
+        
+        Progress is committed every `checkpoint_every` simulated days. With resume=True a
+        portfolio that was already simulated (or interrupted) continues from the day after
+        its last checkpoint; resume=False replays it from start_date.
+        With mc_paths > 0 the result includes a block-bootstrap Monte Carlo of the whole
+        equity curve (off by default; the CLI turns it on with --mc-paths).
+        """
+        if not resume:
+            self.reset_simulation(portfolio_id)
+        
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        # Get portfolio
+        cursor.execute(f'SELECT {PORTFOLIO_COLUMNS}, cash, last_processed_date FROM portfolios WHERE id = ?', (portfolio_id,))
+        portfolio = cursor.fetchone()
+        conn.close()
         
-        # Default universe
+        if not portfolio:
+            return {'error': 'Portfolio not found'}
+        
+        portfolio_id, name, initial_capital, current_capital, start_date, _, mode, config_str, _, cash, last_processed = portfolio
+        settings = self._settings(json.loads(config_str) if config_str else {})
         if universe is None:
-            universe = config.get('universe', ['AAPL', 'MSFT', 'GOOGL', 'NVDA', 'TSLA', 'AMZN', 'META'])
+            universe = settings['universe']
         
-        # Determine date range
+        # Determine date range (resume the day after the last checkpoint)
         start = datetime.strptime(start_date, '%Y-%m-%d')
         end = datetime.strptime(end_date, '%Y-%m-%d') if end_date else datetime.now()
+        if last_processed:
+            start = datetime.combine(trading_calendar.next_session(date.fromisoformat(last_processed)), datetime.min.time())
         
-        # Preload data if cache is available
-        if USE_CACHE:
-            cache = DataCache()
-            print(f"📥 Préchargement des données pour {len(universe)} actions...")
-            success, failed = cache.preload_universe(universe, start, end)
-            if failed:
-                print(f"⚠️  Échec pour: {', '.join(failed)}")
+        if start > end:
+            print(f"✅ Portfolio '{name}' already simulated up to {last_processed}")
+            return {
+                'success': True,
+                'portfolio_id': portfolio_id,
+                'trades_made': 0,
+                'final_value': current_capital,
+                'return_pct': ((current_capital - initial_capital) / initial_capital) * 100,
+                'resumed_from': last_processed
+            }
         
-        # Load existing positions
-        cursor.execute('SELECT * FROM positions WHERE portfolio_id = ? AND status = "open"', (portfolio_id,))
-        open_positions = {row[2]: row for row in cursor.fetchall()}  # ticker -> position data
-        
-        cash = current_capital
-        
-        # Iterate through dates
-        current_date = start
-        trades_made = []
-        
-        def get_price_for_date(ticker, d):
-            """Get closing price for ticker on date d. If no data (holiday/weekend), use last known close (forward-fill)."""
-            if USE_CACHE:
-                cache = DataCache()
-                hist = cache.get_cached_data(ticker, d, d + timedelta(days=1))
-                if not hist.empty:
-                    return hist['Close'].iloc[0]
-                _, close = cache.get_last_close_before_or_on(ticker, d)
-                return close
-            else:
-                stock = yf.Ticker(ticker)
-                hist = stock.history(start=d - timedelta(days=10), end=d + timedelta(days=1))
-                if hist.empty:
-                    return None
-                # Last available close on or before d (handles holidays/weekends)
-                cut = pd.Timestamp(d).normalize()
-                on_or_before = hist[hist.index.normalize() <= cut]
-                if on_or_before.empty:
-                    return None
-                return float(on_or_before['Close'].iloc[-1])
+        self._preload(universe, start, end)
+        
+        if cash is None:  # Portfolio created before checkpoints were stored
+            cash = current_capital
         
         print(f"\n🔄 Running simulation for portfolio '{name}'...")
-        print(f"📅 Period: {start_date} → {end_date or 'today'}")
+        print(f"📅 Period: {start.strftime('%Y-%m-%d')} → {end_date or 'today'}"
+              + (f" (resuming after {last_processed})" if last_processed else ''))
         print(f"💰 Initial capital: ${initial_capital:,.2f}")
         print(f"🎯 Universe: {', '.join(universe)}\n")
         
-        while current_date <= end:
-            date_str = current_date.strftime('%Y-%m-%d')
+        ledger = SqliteLedger(self.db_path, portfolio_id, checkpoint_every)
+        try:
+            trades_made, total_value = self._run_days(ledger, settings, universe, initial_capital, cash, start, end)
+            ledger.finish(end_date or datetime.now().strftime('%Y-%m-%d'), initial_capital)
+        finally:
+            ledger.close()
+        
+        return {
+            'success': True,
+            'portfolio_id': portfolio_id,
+            'trades_made': trades_made,
+            'final_value': total_value,
+            'return_pct': ((total_value - initial_capital) / initial_capital) * 100,
+            'resumed_from': last_processed,
+            'monte_carlo': self.monte_carlo(portfolio_id, initial_capital, mc_paths)
+        }
+    
+    def monte_carlo(self, portfolio_id, initial_capital, n_paths=montecarlo.DEFAULT_PATHS):
+        """Block-bootstrap confidence intervals of a portfolio's snapshots (None if too short)"""
+        _, values, _ = self.get_equity_curve(portfolio_id)
+        return montecarlo.from_equity(values, initial_capital, n_paths)
+    
+    @timed('simulation_ephemeral')
+    def simulate_config(self, config, start_date, end_date=None, initial_capital=10000, universe=None,
+                        equity_curve=False):
+        """
+        Simulate a config without touching the database (parameter sweeps).
+        
+        Returns summary metrics, plus the daily equity curve if equity_curve=True. Keep a
+        configuration with save_simulation() once it is worth a permanent portfolio.
+        """
+        settings = self._settings(config)
+        if universe is None:
+            universe = settings['universe']
+        
+        start = datetime.strptime(start_date, '%Y-%m-%d')
+        end = datetime.strptime(end_date, '%Y-%m-%d') if end_date else datetime.now()
+        if start > end:
+            return {'error': 'Start date is after end date'}
+        
+        self._preload(universe, start, end)
+        
+        ledger = MemoryLedger()
+        trades_made, total_value = self._run_days(ledger, settings, universe, initial_capital, initial_capital, start, end)
+        
+        result = ledger.summary(initial_capital)
+        result['trades_made'] = trades_made
+        if equity_curve:
+            result['equity_curve'] = ledger.equity_curve()
+        return result
+    
+    @timed('simulation_multi')
+    def simulate_strategies(self, configs, start_date, end_date=None, initial_capital=10000, universe=None,
+                            equity_curve=False):
+        """
+        Simulate several configs ({name: config}) in one pass, in memory.
+        
+        Every strategy's ledger advances over the same days; each (ticker, day) is priced and
+        scored once and re-weighted per strategy, so comparing N strategies costs about one run.
+        Returns {name: simulate_config-style result}.
+        """
+        start = datetime.strptime(start_date, '%Y-%m-%d')
+        end = datetime.strptime(end_date, '%Y-%m-%d') if end_date else datetime.now()
+        if start > end:
+            return {'error': 'Start date is after end date'}
+        
+        books = []
+        for name, config in configs.items():
+            settings = self._settings(config)
+            books.append(StrategyBook(settings, MemoryLedger(), universe or settings['universe'], initial_capital,
+                                      initial_capital, name=name, default_weights=self.analyzer.weights))
+        
+        # Union of the universes, in first-seen order
+        self._preload(list(dict.fromkeys(t for book in books for t in book.universe)), start, end)
+        self._run_books(books, start, end)
+        
+        results = {}
+        for book in books:
+            result = book.ledger.summary(initial_capital)
+            result['trades_made'] = book.trades_made
+            if equity_curve:
+                result['equity_curve'] = book.ledger.equity_curve()
+            results[book.name] = result
+        return results
+    
+    def save_simulation(self, name, config, start_date, end_date=None, initial_capital=10000, universe=None):
+        """Persist a configuration found by simulate_config as a regular portfolio (replayed into the DB)"""
+        config = dict(config)
+        if universe is not None:
+            config['universe'] = universe
+        result = self.create_portfolio(name, initial_capital, start_date, config=config)
+        if not result['success']:
+            return result
+        return self.run_simulation(result['portfolio_id'], end_date=end_date)
+    
+    def _run_days(self, ledger, settings, universe, initial_capital, cash, start, end):
+        """Walk trading sessions from start to end, recording trades and snapshots in the ledger"""
+        book = StrategyBook(settings, ledger, universe, initial_capital, cash, default_weights=self.analyzer.weights)
+        self._run_books([book], start, end)
+        return book.trades_made, book.total_value
+    
+    def _price_for_date(self, cache, ticker, d):
+        """Closing price for ticker on session d. If the ticker has no bar that day (halt), use its last known close."""
+        if cache is not None:
+            hist = cache.get_cached_data(ticker, d, d)
+            if not hist.empty:
+                return hist['Close'].iloc[0]
+            _, close = cache.get_last_close_before_or_on(ticker, d)
+            return close
+        hist = self.provider.history(ticker, start=d - timedelta(days=10), end=d + timedelta(days=1))
+        if hist.empty:
+            return None
+        # Last available close on or before d (handles holidays/weekends)
+        cut = pd.Timestamp(d).normalize()
+        on_or_before = hist[hist.index.normalize() <= cut]
+        if on_or_before.empty:
+            return None
+        return float(on_or_before['Close'].iloc[-1])
+    
+    def _run_books(self, books, start, end):
+        """
+        Advance every book over the same trading sessions (weekends and exchange holidays are
+        skipped, see trading_calendar.py). Prices and analyses are computed once per
+        (ticker, day) and shared, so N strategies cost about one strategy's data work.
+        """
+        cache = DataCache(provider=self.provider) if USE_CACHE else None
+        
+        for session in trading_calendar.sessions(start, end):
+            current_date = datetime.combine(session, datetime.min.time())
+            date_str = session.isoformat()
+            day = DayMarket(current_date, lambda ticker, d: self._price_for_date(cache, ticker, d), self.analyzer)
             
-            # Check existing positions for exits
-            for ticker, position_data in list(open_positions.items()):
-                pos_id, _, _, entry_date, entry_price, shares, capital_invested, _, _, _, _, _, status = position_data
+            for book in books:
+                self._step_book(book, day, date_str)
+    
+    def _step_book(self, book, day, date_str):
+        """One day of one strategy: exits, ranked buys, snapshot"""
+        settings = book.settings
+        open_positions = book.open_positions
+        tag = f"[{book.name}] " if book.name else ''
+        
+        # Check existing positions for exits
+        for ticker, (pos_id, entry_price, shares, capital_invested) in list(open_positions.items()):
+            try:
+                current_price = day.price(ticker)
+                if current_price is None:
+                    continue
+                pnl_pct = (current_price - entry_price) / entry_price
                 
-                try:
-                    current_price = get_price_for_date(ticker, current_date)
-                    if current_price is None:
-                        continue
-                    pnl_pct = (current_price - entry_price) / entry_price
-                    
-                    # Check exit conditions
-                    should_exit = False
-                    exit_reason = None
-                    
-                    # Stop loss / take profit
-                    if pnl_pct <= -stop_loss:
-                        should_exit = True
-                        exit_reason = 'STOP_LOSS'
-                    elif pnl_pct >= take_profit:
-                        should_exit = True
-                        exit_reason = 'TAKE_PROFIT'
-                    else:
-                        # Check score for sell signal
-                        analysis = self.analyzer.analyze_stock(ticker)
-                        if 'error' not in analysis and analysis['scores']['total'] <= sell_threshold:
-                            should_exit = True
-                            exit_reason = 'SELL_SIGNAL'
-                    
-                    if should_exit:
-                        # Exit position
-                        exit_value = shares * current_price
-                        cash += exit_value
-                        pnl = exit_value - capital_invested
-                        pnl_pct_val = (pnl / capital_invested) * 100
-                        
-                        # Update position
-                        cursor.execute('''
-                            UPDATE positions
-                            SET exit_date = ?, exit_price = ?, exit_reason = ?, pnl = ?, pnl_pct = ?, status = 'closed'
-                            WHERE id = ?
-                        ''', (date_str, current_price, exit_reason, pnl, pnl_pct_val, pos_id))
-                        
-                        # Log trade
-                        cursor.execute('''
-                            INSERT INTO trades_log (portfolio_id, date, action, ticker, price, shares, value, signal)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                        ''', (portfolio_id, date_str, 'SELL', ticker, current_price, shares, exit_value, exit_reason))
-                        
-                        del open_positions[ticker]
-                        trades_made.append({
-                            'date': date_str,
-                            'action': 'SELL',
-                            'ticker': ticker,
-                            'price': current_price,
-                            'shares': shares,
-                            'pnl_pct': pnl_pct_val,
-                            'reason': exit_reason
-                        })
-                        
-                        print(f"📉 {date_str} SELL {ticker} @ ${current_price:.2f} ({exit_reason}) → PnL: {pnl_pct_val:+.2f}%")
+                # Check exit conditions
+                should_exit = False
+                exit_reason = None
                 
-                except Exception as e:
-                    print(f"⚠️  Error checking {ticker}: {e}")
-                    continue
-            
-            # Scan universe for new opportunities
-            for ticker in universe:
-                # Skip if already have position
-                if ticker in open_positions:
-                    continue
+                # Stop loss / take profit
+                if pnl_pct <= -settings['stop_loss']:
+                    should_exit = True
+                    exit_reason = 'STOP_LOSS'
+                elif pnl_pct >= settings['take_profit']:
+                    should_exit = True
+                    exit_reason = 'TAKE_PROFIT'
+                else:
+                    # Check score for sell signal
+                    score = book.score(day.scores(ticker))
+                    if score is not None and score <= settings['sell_threshold']:
+                        should_exit = True
+                        exit_reason = 'SELL_SIGNAL'
                 
-                try:
-                    analysis = self.analyzer.analyze_stock(ticker)
-                    
-                    if 'error' in analysis:
-                        continue
+                if should_exit:
+                    # Exit position
+                    exit_value = shares * current_price
+                    book.cash += exit_value
+                    pnl = exit_value - capital_invested
+                    pnl_pct_val = (pnl / capital_invested) * 100
                     
-                    score = analysis['scores']['total']
+                    book.ledger.sell(pos_id, date_str, ticker, current_price, shares, exit_value, exit_reason, pnl, pnl_pct_val)
+                    del open_positions[ticker]
+                    book.trades_made += 1
                     
-                    # Check buy signal
-                    if score >= buy_threshold:
-                        # Calculate position size
-                        capital_to_invest = cash * position_size
-                        
-                        if capital_to_invest < 100:  # Minimum investment
-                            continue
-                        
-                        # Get current price (forward-fill if market closed)
-                        current_price = get_price_for_date(ticker, current_date)
-                        if current_price is None:
-                            continue
-                        shares = int(capital_to_invest / current_price)
-                        
-                        if shares == 0:
-                            continue
-                        
-                        actual_investment = shares * current_price
-                        cash -= actual_investment
-                        
-                        # Create position
-                        cursor.execute('''
-                            INSERT INTO positions (portfolio_id, ticker, entry_date, entry_price, shares, capital_invested, status)
-                            VALUES (?, ?, ?, ?, ?, ?, 'open')
-                        ''', (portfolio_id, ticker, date_str, current_price, shares, actual_investment))
-                        
-                        position_id = cursor.lastrowid
-                        
-                        # Log trade
-                        cursor.execute('''
-                            INSERT INTO trades_log (portfolio_id, date, action, ticker, price, shares, value, score, signal)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        ''', (portfolio_id, date_str, 'BUY', ticker, current_price, shares, actual_investment, score, 'BUY'))
-                        
-                        # Update open positions
-                        cursor.execute('SELECT * FROM positions WHERE id = ?', (position_id,))
-                        open_positions[ticker] = cursor.fetchone()
-                        
-                        trades_made.append({
-                            'date': date_str,
-                            'action': 'BUY',
-                            'ticker': ticker,
-                            'price': current_price,
-                            'shares': shares,
-                            'score': score
-                        })
-                        
-                        print(f"📈 {date_str} BUY {ticker} @ ${current_price:.2f} (Score: {score:.1f}) → {shares} shares")
-                
-                except Exception as e:
-                    print(f"⚠️  Error analyzing {ticker}: {e}")
-                    continue
+                    print(f"📉 {tag}{date_str} SELL {ticker} @ ${current_price:.2f} ({exit_reason}) → PnL: {pnl_pct_val:+.2f}%")
             
-            # Calculate daily snapshot (use last known close if no data for this date → avoids fake drops on holidays)
-            positions_value = 0
-            for ticker, position_data in open_positions.items():
-                try:
-                    current_price = get_price_for_date(ticker, current_date)
-                    if current_price is not None:
-                        shares = position_data[5]
-                        positions_value += shares * current_price
-                except Exception:
-                    pass
+            except Exception as e:
+                print(f"⚠️  Error checking {ticker}: {e}")
+                continue
+        
+        # Score the whole universe for the day, then buy the strongest signals first
+        universe = book.universe
+        scores = np.full(len(universe), np.nan)
+        for i, ticker in enumerate(universe):
+            if ticker in open_positions:
+                continue
+            score = book.score(day.scores(ticker))
+            if score is not None:
+                scores[i] = score
+        
+        max_positions = settings['max_positions']
+        # Full ranked list: a candidate skipped below (no price, 0 shares) hands its slot to the next one
+        for i in select_top_k(scores, threshold=settings['buy_threshold']):
+            if max_positions is not None and len(open_positions) >= max_positions:
+                break
+            ticker = universe[i]
+            score = float(scores[i])
             
-            total_value = cash + positions_value
-            total_return_pct = ((total_value - initial_capital) / initial_capital) * 100
+            # Calculate position size
+            capital_to_invest = book.cash * settings['position_size']
             
-            # Save snapshot
-            cursor.execute('''
-                INSERT INTO snapshots (portfolio_id, date, total_value, cash, positions_value, num_positions, total_return_pct)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (portfolio_id, date_str, total_value, cash, positions_value, len(open_positions), total_return_pct))
+            if capital_to_invest < 100:  # Minimum investment
+                break
             
-            # Move to next day (skip weekends)
-            current_date += timedelta(days=1)
-            while current_date.weekday() >= 5:  # Saturday=5, Sunday=6
-                current_date += timedelta(days=1)
-        
-        # Update portfolio
-        cursor.execute('''
-            UPDATE portfolios
-            SET current_capital = ?, end_date = ?
-            WHERE id = ?
-        ''', (cash + positions_value, end_date or datetime.now().strftime('%Y-%m-%d'), portfolio_id))
-        
-        conn.commit()
-        conn.close()
-        
-        return {
-            'success': True,
-            'portfolio_id': portfolio_id,
-            'trades_made': len(trades_made),
-            'final_value': cash + positions_value,
-            'return_pct': total_return_pct
-        }
+            try:
+                # Get current price (forward-fill if market closed)
+                current_price = day.price(ticker)
+                if current_price is None:
+                    continue
+                shares = int(capital_to_invest / current_price)
+                
+                if shares == 0:
+                    continue
+                
+                actual_investment = shares * current_price
+                book.cash -= actual_investment
+                
+                position_id = book.ledger.buy(date_str, ticker, current_price, shares, actual_investment, score)
+                open_positions[ticker] = (position_id, current_price, shares, actual_investment)
+                book.trades_made += 1
+                
+                print(f"📈 {tag}{date_str} BUY {ticker} @ ${current_price:.2f} (Score: {score:.1f}) → {shares} shares")
+            
+            except Exception as e:
+                print(f"⚠️  Error buying {ticker}: {e}")
+                continue
+        
+        # Calculate daily snapshot (use last known close if a ticker has no bar today → avoids fake drops)
+        positions_value = 0
+        for ticker, (_, _, shares, _) in open_positions.items():
+            try:
+                current_price = day.price(ticker)
+                if current_price is not None:
+                    positions_value += shares * current_price
+            except Exception:
+                pass
+        
+        book.total_value = book.cash + positions_value
+        total_return_pct = ((book.total_value - book.initial_capital) / book.initial_capital) * 100
+        
+        book.ledger.snapshot(date_str, book.total_value, book.cash, positions_value, len(open_positions), total_return_pct)
     
     def get_portfolio_status(self, portfolio_id):
         """Get current portfolio status"""
@@ -397,7 +697,7 @@ class PortfolioSimulator:
         cursor = conn.cursor()
         
         # Get portfolio info
-        cursor.execute('SELECT * FROM portfolios WHERE id = ?', (portfolio_id,))
+        cursor.execute(f'SELECT {PORTFOLIO_COLUMNS} FROM portfolios WHERE id = ?', (portfolio_id,))
         portfolio = cursor.fetchone()
         
         if not portfolio:
@@ -446,17 +746,67 @@ class PortfolioSimulator:
         conn.close()
         
         return portfolios
+    
+    def list_portfolio_summaries(self, order_by='start_date', limit=None):
+        """Portfolios joined with their materialized metrics"""
+        return list_portfolio_summaries(self.db_path, order_by, limit)
+    
+    def get_equity_curve(self, portfolio_id, start_date=None, end_date=None):
+        """(dates, total values, total returns %) of a portfolio's snapshots, optionally within [start, end]"""
+        query = 'SELECT date, total_value, total_return_pct FROM snapshots WHERE portfolio_id = ?'
+        params = [portfolio_id]
+        if start_date:
+            query += ' AND date >= ?'
+            params.append(start_date)
+        if end_date:
+            query += ' AND date <= ?'
+            params.append(end_date)
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute(query + ' ORDER BY date', params).fetchall()
+        conn.close()
+        return [r[0] for r in rows], [r[1] for r in rows], [r[2] for r in rows]
+    
+    def equity_version(self, portfolio_id):
+        """
+        Cheap fingerprint of a portfolio's snapshots, changing whenever a run adds or replaces days:
+        (snapshot count, last date, current capital, initial capital), or None if the portfolio is unknown
+        """
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute('''
+            SELECT COUNT(*), MAX(s.date), p.current_capital, p.initial_capital
+            FROM portfolios p LEFT JOIN snapshots s ON s.portfolio_id = p.id
+            WHERE p.id = ?
+        ''', (portfolio_id,)).fetchone()
+        conn.close()
+        return None if row[3] is None else row
+    
+    def portfolio_revision(self, portfolio_id):
+        """Revision counter of one portfolio (bumped by triggers on every write), None if unknown"""
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute('SELECT revision FROM portfolios WHERE id = ?', (portfolio_id,)).fetchone()
+        conn.close()
+        return None if row is None else row[0]
+    
+    def portfolios_version(self):
+        """Fingerprint of the whole portfolio list: changes on any create, write or delete"""
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute('SELECT COUNT(*), MAX(id), TOTAL(revision) FROM portfolios').fetchone()
+        conn.close()
+        return row
 
 
 def main():
     parser = argparse.ArgumentParser(description='Portfolio Simulator')
-    parser.add_argument('command', choices=['create', 'run', 'status', 'list'], help='Command')
+    parser.add_argument('command', choices=['create', 'run', 'status', 'list', 'summaries'], help='Command')
     parser.add_argument('--name', help='Portfolio name')
     parser.add_argument('--capital', type=float, default=10000, help='Initial capital')
     parser.add_argument('--start', help='Start date (YYYY-MM-DD)')
     parser.add_argument('--end', help='End date (YYYY-MM-DD)')
     parser.add_argument('--id', type=int, help='Portfolio ID')
     parser.add_argument('--universe', nargs='+', help='Stock universe')
+    parser.add_argument('--restart', action='store_true', help='run: replay from start date instead of resuming')
+    parser.add_argument('--mc-paths', type=int, default=montecarlo.DEFAULT_PATHS,
+                        help='run: Monte Carlo block-bootstrap paths (0 = off)')
     
     args = parser.parse_args()
     
@@ -478,12 +828,15 @@ def main():
             print("❌ --id is required")
             return
         
-        result = sim.run_simulation(args.id, args.end, args.universe)
+        result = sim.run_simulation(args.id, args.end, args.universe, resume=not args.restart, mc_paths=args.mc_paths)
         if result.get('success'):
             print(f"\n✅ Simulation complete!")
             print(f"Trades executed: {result['trades_made']}")
             print(f"Final value: ${result['final_value']:,.2f}")
             print(f"Return: {result['return_pct']:+.2f}%")
+            if result.get('monte_carlo'):
+                print()
+                print('\n'.join(montecarlo.format_report(result['monte_carlo'])))
         else:
             print(f"❌ Error: {result.get('error')}")
     
@@ -511,6 +864,10 @@ def main():
                 print(f"ID {p[0]}: {p[1]} | ${p[2]:,.0f} → ${p[3]:,.0f} | {p[4]} → {p[5] or 'ongoing'} ({p[6]})")
         else:
             print("No portfolios found")
+    
+    elif args.command == 'summaries':
+        refreshed = sim.refresh_summaries(missing_only=False)
+        print(f"✅ {refreshed} portfolio summaries recomputed")
 
 
 if __name__ == '__main__':
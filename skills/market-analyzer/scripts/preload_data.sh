@@ -32,6 +32,10 @@ cd "$(dirname "$0")"
 
 python3 data_cache.py preload --tickers $TICKERS --start $START_DATE --end $END_DATE
 
+echo ""
+echo "🔎 Calcul des indicateurs du screener..."
+python3 screener.py refresh
+
 echo ""
 echo "✅ Préchargement terminé!"
 echo ""
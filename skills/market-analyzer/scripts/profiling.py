@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Profiling - Opt-in per-step timing with aggregated histograms
+
+Enable with MARKET_PROFILE=1 (or profile=True on MarketAnalyzer). When disabled, a
+NullProfiler is used: step() returns a shared no-op context and methods are not wrapped,
+so the instrumented code pays almost nothing.
+"""
+
+import os
+import json
+import time
+import bisect
+import functools
+import threading
+import contextlib
+
+# Histogram bucket upper bounds in milliseconds (last bucket is +Inf)
+BUCKETS_MS = [0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+_NULL_STEP = contextlib.nullcontext()
+
+
+def profiling_enabled():
+    """True when MARKET_PROFILE is set to a truthy value"""
+    return os.environ.get('MARKET_PROFILE', '').lower() in ('1', 'true', 'yes', 'on')
+
+
+class NullProfiler:
+    """Disabled profiler: every operation is a no-op"""
+    enabled = False
+
+    def step(self, name):
+        return _NULL_STEP
+
+    def wrap(self, name, func):
+        return func
+
+    def record(self, name, seconds):
+        pass
+
+    def snapshot(self):
+        return {}
+
+    def reset(self):
+        pass
+
+
+class StepProfiler:
+    """Aggregates wall time per named step into fixed-bucket histograms"""
+    enabled = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._steps = {}
+
+    def record(self, name, seconds):
+        ms = seconds * 1000
+        with self._lock:
+            stats = self._steps.get(name)
+            if stats is None:
+                stats = self._steps[name] = {
+                    'count': 0, 'total_ms': 0.0, 'min_ms': ms, 'max_ms': ms,
+                    'buckets': [0] * (len(BUCKETS_MS) + 1)
+                }
+            stats['count'] += 1
+            stats['total_ms'] += ms
+            stats['min_ms'] = min(stats['min_ms'], ms)
+            stats['max_ms'] = max(stats['max_ms'], ms)
+            stats['buckets'][bisect.bisect_left(BUCKETS_MS, ms)] += 1
+
+    @contextlib.contextmanager
+    def step(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def wrap(self, name, func):
+        """Return func instrumented as step `name`"""
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter() - start)
+        return timed
+
+    def snapshot(self):
+        """Per-step stats (count, total/mean/min/max, approximate p50/p95, histogram), slowest first"""
+        with self._lock:
+            steps = {name: dict(stats, buckets=list(stats['buckets'])) for name, stats in self._steps.items()}
+
+        result = {}
+        for name, stats in sorted(steps.items(), key=lambda item: -item[1]['total_ms']):
+            count = stats['count']
+            result[name] = {
+                'count': count,
+                'total_ms': round(stats['total_ms'], 3),
+                'mean_ms': round(stats['total_ms'] / count, 4),
+                'min_ms': round(stats['min_ms'], 4),
+                'max_ms': round(stats['max_ms'], 4),
+                'p50_ms': _bucket_quantile(stats['buckets'], count, 0.50),
+                'p95_ms': _bucket_quantile(stats['buckets'], count, 0.95),
+                'histogram': {
+                    (f'le_{bound}' if i < len(BUCKETS_MS) else 'le_inf'): n
+                    for i, (bound, n) in enumerate(zip(BUCKETS_MS + [None], stats['buckets'])) if n
+                }
+            }
+        return result
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def dump(self, path):
+        with open(path, 'w') as f:
+            f.write(self.to_json())
+
+
+def _bucket_quantile(buckets, count, q):
+    """Upper bound of the bucket holding quantile q (None if it falls in +Inf)"""
+    target = q * count
+    seen = 0
+    for i, n in enumerate(buckets):
+        seen += n
+        if seen >= target and n:
+            return BUCKETS_MS[i] if i < len(BUCKETS_MS) else None
+    return None
+
+
+def make_profiler(enabled=None):
+    """StepProfiler if enabled (default: MARKET_PROFILE env var), else NullProfiler"""
+    if enabled is None:
+        enabled = profiling_enabled()
+    return StepProfiler() if enabled else NullProfiler()
@@ -7,77 +7,125 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+import metrics
 from portfolio_sim import PortfolioSimulator
-import sqlite3
+import io
 import json
+import math
+import random
+import argparse
+import contextlib
 from itertools import product
+from datetime import datetime, timedelta
 
-def test_config(name, config, start_date, end_date):
-    """Test a single configuration"""
-    sim = PortfolioSimulator()
-    
-    # Create portfolio
-    conn = sqlite3.connect(sim.db_path)
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        INSERT INTO portfolios (name, initial_capital, current_capital, start_date, mode, config)
-        VALUES (?, ?, ?, ?, ?, ?)
-    ''', (name, 10000, 10000, start_date, 'backtest', json.dumps(config)))
-    
-    conn.commit()
-    portfolio_id = cursor.lastrowid
-    conn.close()
-    
-    # Run simulation
+BASE_WEIGHTS = {"technical": 0.4, "fundamental": 0.4, "sentiment": 0.2}
+
+# Continuous ranges explored by --search halving: name -> (low, high)
+SEARCH_RANGES = {
+    'buy_threshold': (5.0, 6.5),
+    'sell_threshold': (3.5, 5.0),
+    'stop_loss': (0.03, 0.08),
+    'take_profit': (0.08, 0.25),
+    'position_size': (0.10, 0.30),
+}
+
+RANKINGS = ('return', 'sharpe', 'sortino', 'calmar')
+
+def rank_runs(runs, rank, initial_capital=10000):
+    """
+    Run names from best to worst, with their scores. Rankings other than return stack every
+    run's equity curve and score them in one vectorized call (see metrics.py).
+    """
+    names = list(runs)
+    if rank == 'return':
+        scores = [runs[name]['return_pct'] for name in names]
+        return sorted(names, key=lambda name: runs[name]['return_pct'], reverse=True), dict(zip(names, scores))
+    equity = metrics.stack([[v for _, v in runs[name]['equity_curve']] for name in names], initial_capital)
+    order, scores = metrics.rank(equity, rank)
+    return [names[i] for i in order], {name: metrics.scalar(score) for name, score in zip(names, scores)}
+
+def test_config(sim, name, config, start_date, end_date, equity_curve=False):
+    """Test a single configuration (in memory: nothing is written to portfolio_sim.db)"""
     print(f"\n🧪 Testing: {name}")
     print(f"   BUY={config['buy_threshold']:.1f} SELL={config['sell_threshold']:.1f} | "
           f"SL={config['stop_loss']:.0%} TP={config['take_profit']:.0%}")
     
-    sim.run_simulation(portfolio_id, end_date=end_date)
-    
-    # Get results
-    conn = sqlite3.connect(sim.db_path)
-    cursor = conn.cursor()
+    with contextlib.redirect_stdout(io.StringIO()):  # Silence per-trade logs
+        result = sim.simulate_config(config, start_date, end_date, initial_capital=10000, equity_curve=equity_curve)
     
-    cursor.execute('''
-        SELECT current_capital, 
-               (SELECT COUNT(*) FROM trades_log WHERE portfolio_id = ?)
-        FROM portfolios WHERE id = ?
-    ''', (portfolio_id, portfolio_id))
-    
-    final_value, num_trades = cursor.fetchone()
-    return_pct = ((final_value - 10000) / 10000) * 100
-    
-    # Calculate win rate
-    cursor.execute('''
-        SELECT COUNT(*) FROM trades_log 
-        WHERE portfolio_id = ? AND pnl_pct > 0
-    ''', (portfolio_id,))
-    wins = cursor.fetchone()[0]
-    win_rate = (wins / num_trades * 100) if num_trades > 0 else 0
-    
-    conn.close()
-    
-    print(f"   ✅ Return: {return_pct:+.2f}% | Trades: {num_trades} | Win rate: {win_rate:.1f}%")
+    print(f"   ✅ Return: {result['return_pct']:+.2f}% | Trades: {result['trades_made']} | "
+          f"Win rate: {result['win_rate']:.1f}%")
     
     return {
         'name': name,
         'config': config,
-        'return_pct': return_pct,
-        'num_trades': num_trades,
-        'win_rate': win_rate,
-        'final_value': final_value
+        'return_pct': result['return_pct'],
+        'num_trades': result['trades_made'],
+        'win_rate': result['win_rate'],
+        'max_drawdown_pct': result['max_drawdown_pct'],
+        'final_value': result['final_value'],
+        'equity_curve': result.get('equity_curve')
     }
 
-def main():
-    print("\n🔬 BALANCED STRATEGY OPTIMIZER")
-    print("=" * 60)
-    
-    # Base config
-    base_weights = {"technical": 0.4, "fundamental": 0.4, "sentiment": 0.2}
-    
-    # Test configurations
+def sample_configs(n, seed=None, ranges=SEARCH_RANGES):
+    """n random configs drawn uniformly from `ranges` (sell threshold always below buy threshold)"""
+    rng = random.Random(seed)
+    configs = []
+    while len(configs) < n:
+        config = {name: round(rng.uniform(low, high), 3) for name, (low, high) in ranges.items()}
+        if config['sell_threshold'] >= config['buy_threshold']:
+            continue
+        config['weights'] = BASE_WEIGHTS
+        configs.append(config)
+    return configs
+
+def successive_halving(sim, configs, start_date, end_date, eta=3, min_fraction=1 / 9, rank='return'):
+    """
+    Budgeted search: every config is first simulated on a short prefix of the period, the best
+    1/eta move on to a prefix eta times longer, and so on until the survivors run on the whole
+    period. Each rung simulates all its configs in one lockstep pass (simulate_strategies), so
+    81 configs cost about (1/9 + 1/3 + 1) full runs instead of 81.
+    rank: what survivors are chosen on (one of RANKINGS).
+    Returns (final results sorted by rank, [(rung end date, configs run), ...]).
+    """
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    end = datetime.strptime(end_date, '%Y-%m-%d')
+    rungs = max(1, round(math.log(1 / min_fraction, eta)) + 1)
+    
+    candidates = {f"Cfg_{i:03d}": config for i, config in enumerate(configs, 1)}
+    history = []
+    for rung in range(rungs):
+        fraction = eta ** (rung - rungs + 1)
+        rung_end = (start + timedelta(days=round((end - start).days * fraction))).strftime('%Y-%m-%d')
+        print(f"\n🪜 Rung {rung + 1}/{rungs}: {len(candidates)} configs on {start_date} → {rung_end}")
+        
+        with contextlib.redirect_stdout(io.StringIO()):  # Silence per-trade logs
+            runs = sim.simulate_strategies(candidates, start_date, rung_end, initial_capital=10000,
+                                           equity_curve=rank != 'return')
+        history.append((rung_end, len(candidates)))
+        ranked, scores = rank_runs(runs, rank)
+        
+        if rung == rungs - 1:
+            return [{
+                'name': name,
+                'config': candidates[name],
+                'return_pct': runs[name]['return_pct'],
+                'num_trades': runs[name]['trades_made'],
+                'win_rate': runs[name]['win_rate'],
+                'max_drawdown_pct': runs[name]['max_drawdown_pct'],
+                'final_value': runs[name]['final_value'],
+                'score': scores[name]
+            } for name in ranked], history
+        
+        best = runs[ranked[0]]
+        print(f"   Best so far: {ranked[0]} {best['return_pct']:+.2f}% ({rank}: {_fmt(scores[ranked[0]])})")
+        candidates = {name: candidates[name] for name in ranked[:max(1, len(ranked) // eta)]}
+
+def _fmt(value):
+    return f"{value:.2f}" if value is not None else 'N/A'
+
+def grid_configs():
+    """Exhaustive grid around the Balanced strategy"""
     configs = []
     
     # Vary thresholds
@@ -96,28 +144,59 @@ def main():
         config = {
             'buy_threshold': buy,
             'sell_threshold': sell,
-            'weights': base_weights,
+            'weights': BASE_WEIGHTS,
             'position_size': 0.20,
             'stop_loss': sl,
             'take_profit': tp
         }
         
         configs.append(config)
+    return configs
+
+def main():
+    parser = argparse.ArgumentParser(description='Quick optimizer')
+    parser.add_argument('--keep', type=int, default=0, help='Save the N best configurations as portfolios')
+    parser.add_argument('--search', choices=['grid', 'halving'], default='grid',
+                        help='grid: every grid point on the full period; halving: random samples, successive halving')
+    parser.add_argument('--samples', type=int, default=81, help='halving: number of random configurations')
+    parser.add_argument('--eta', type=int, default=3, help='halving: keep 1/eta of the configs at each rung')
+    parser.add_argument('--seed', type=int, help='halving: random seed')
+    parser.add_argument('--rank', choices=RANKINGS, default='return',
+                        help='Metric configurations are ranked on (sharpe, sortino, calmar: risk-adjusted)')
+    parser.add_argument('--start', default='2024-01-01', help='Start date (YYYY-MM-DD)')
+    parser.add_argument('--end', default='2024-12-31', help='End date (YYYY-MM-DD)')
+    args = parser.parse_args()
+    if args.eta < 2:
+        parser.error('--eta must be at least 2')
+    if args.samples < 1:
+        parser.error('--samples must be at least 1')
     
-    print(f"\n📊 Testing {len(configs)} configurations...\n")
-    
-    results = []
-    for i, config in enumerate(configs, 1):
-        name = f"Opt_{i:02d}"
-        try:
-            result = test_config(name, config, "2024-01-01", "2024-12-31")
-            results.append(result)
-        except Exception as e:
-            print(f"   ❌ Error: {e}")
-            continue
+    print("\n🔬 BALANCED STRATEGY OPTIMIZER")
+    print("=" * 60)
     
-    # Sort by return
-    results.sort(key=lambda x: x['return_pct'], reverse=True)
+    sim = PortfolioSimulator()
+    if args.search == 'halving':
+        configs = sample_configs(args.samples, args.seed)
+        print(f"\n📊 Successive halving over {len(configs)} random configurations (eta={args.eta})...")
+        results, history = successive_halving(sim, configs, args.start, args.end, eta=args.eta, rank=args.rank)
+        print(f"\n   Simulated {sum(n for _, n in history)} config-periods over {len(history)} rungs")
+    else:
+        configs = grid_configs()
+        print(f"\n📊 Testing {len(configs)} configurations...\n")
+        
+        results = []
+        for i, config in enumerate(configs, 1):
+            name = f"Opt_{i:02d}"
+            try:
+                result = test_config(sim, name, config, args.start, args.end, equity_curve=args.rank != 'return')
+                results.append(result)
+            except Exception as e:
+                print(f"   ❌ Error: {e}")
+                continue
+        
+        by_name = {r['name']: r for r in results}
+        ranked, scores = rank_runs(by_name, args.rank)
+        results = [dict(by_name[name], score=scores[name]) for name in ranked]
     
     print("\n" + "=" * 60)
     print("🏆 TOP 5 CONFIGURATIONS")
@@ -125,10 +204,11 @@ def main():
     
     for i, r in enumerate(results[:5], 1):
         cfg = r['config']
-        print(f"\n{i}. {r['name']} → Return: {r['return_pct']:+.2f}%")
+        print(f"\n{i}. {r['name']} → Return: {r['return_pct']:+.2f}%"
+              + (f" | {args.rank.capitalize()}: {_fmt(r['score'])}" if args.rank != 'return' else ''))
         print(f"   BUY: {cfg['buy_threshold']:.1f} | SELL: {cfg['sell_threshold']:.1f}")
         print(f"   Stop-loss: {cfg['stop_loss']:.0%} | Take-profit: {cfg['take_profit']:.0%}")
-        print(f"   Trades: {r['num_trades']} | Win rate: {r['win_rate']:.1f}%")
+        print(f"   Trades: {r['num_trades']} | Win rate: {r['win_rate']:.1f}% | Max DD: {r['max_drawdown_pct']:.1f}%")
         print(f"   Final value: ${r['final_value']:,.2f}")
     
     if results:
@@ -136,6 +216,15 @@ def main():
         print("💡 BEST CONFIG:")
         best = results[0]
         print(json.dumps(best['config'], indent=2))
+    
+    # Persist only the configurations worth keeping
+    for r in results[:args.keep]:
+        with contextlib.redirect_stdout(io.StringIO()):
+            saved = sim.save_simulation(r['name'], r['config'], args.start, args.end, initial_capital=10000)
+        if saved.get('success'):
+            print(f"💾 Saved {r['name']} as portfolio #{saved['portfolio_id']}")
+        else:
+            print(f"❌ {r['name']}: {saved.get('error')}")
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Screener - Filter and rank the cached universe on precomputed indicators
+
+Indicators are computed once per ticker from `price_history` and stored in an
+`indicators` table next to the price cache. Filter and ranking expressions are
+compiled to SQL so a screen over 1,000+ tickers is a single indexed query
+instead of one `analyze_stock` call per ticker.
+"""
+
+import ast
+import sqlite3
+import json
+import argparse
+import numpy as np
+import pandas as pd
+from data_cache import DataCache
+
+# Column name -> description (also the whitelist for expressions)
+INDICATOR_COLUMNS = {
+    'close': 'Closing price',
+    'volume': 'Daily volume',
+    'rsi': 'RSI (14)',
+    'sma20': 'Simple moving average (20)',
+    'sma50': 'Simple moving average (50)',
+    'sma200': 'Simple moving average (200)',
+    'macd': 'MACD line (12/26 EMA)',
+    'macd_signal': 'MACD signal line (9 EMA)',
+    'macd_hist': 'MACD - signal',
+    'bb_upper': 'Upper Bollinger band (20, 2σ)',
+    'bb_lower': 'Lower Bollinger band (20, 2σ)',
+    'bb_position': 'Position within Bollinger bands (0 = lower, 1 = upper)',
+    'williams_r': 'Williams %R (14)',
+    'adx': 'ADX (14)',
+    'volume_ratio': 'Avg volume 5d / avg volume 60d',
+    'return_5d': '5-day return (%)',
+    'return_30d': '30-day return (%)',
+    'volatility_20d': '20-day annualized volatility (%)',
+    'position_52w': 'Position in 52-week range (%)',
+}
+
+_SQL_BINOPS = {ast.Add: '+', ast.Sub: '-', ast.Mult: '*', ast.Div: '/'}
+_SQL_CMPOPS = {ast.Lt: '<', ast.LtE: '<=', ast.Gt: '>', ast.GtE: '>=', ast.Eq: '=', ast.NotEq: '!='}
+_SQL_FUNCTIONS = {'abs': 'ABS', 'min': 'MIN', 'max': 'MAX'}
+
+
+def compile_expression(expr):
+    """
+    Compile a Python-style expression over indicator columns into a SQL fragment.
+    Example: "rsi < 30 and sma50 > sma200" -> "((rsi < 30) AND (sma50 > sma200))"
+    Only whitelisted columns, numbers, arithmetic, comparisons, and/or/not and
+    abs/min/max are accepted; anything else raises ValueError.
+    """
+    try:
+        tree = ast.parse(expr, mode='eval')
+    except SyntaxError as e:
+        raise ValueError(f"Invalid expression: {expr!r} ({e.msg})")
+    return _compile_node(tree.body)
+
+
+def _compile_node(node):
+    if isinstance(node, ast.BoolOp):
+        op = ' AND ' if isinstance(node.op, ast.And) else ' OR '
+        return '(' + op.join(_compile_node(v) for v in node.values) + ')'
+    if isinstance(node, ast.Compare):
+        # Chained comparisons (10 < rsi < 30) expand to an AND of pairs
+        parts = []
+        left = node.left
+        for op, right in zip(node.ops, node.comparators):
+            if type(op) not in _SQL_CMPOPS:
+                raise ValueError(f"Unsupported comparison: {type(op).__name__}")
+            parts.append(f"({_compile_node(left)} {_SQL_CMPOPS[type(op)]} {_compile_node(right)})")
+            left = right
+        return parts[0] if len(parts) == 1 else '(' + ' AND '.join(parts) + ')'
+    if isinstance(node, ast.BinOp):
+        if type(node.op) not in _SQL_BINOPS:
+            raise ValueError(f"Unsupported operator: {type(node.op).__name__}")
+        # Force real division (SQLite divides integer columns as integers)
+        left = _compile_node(node.left)
+        if isinstance(node.op, ast.Div):
+            left = f"CAST({left} AS REAL)"
+        return f"({left} {_SQL_BINOPS[type(node.op)]} {_compile_node(node.right)})"
+    if isinstance(node, ast.UnaryOp):
+        if isinstance(node.op, ast.Not):
+            return f"(NOT {_compile_node(node.operand)})"
+        if isinstance(node.op, ast.USub):
+            return f"(-{_compile_node(node.operand)})"
+        if isinstance(node.op, ast.UAdd):
+            return _compile_node(node.operand)
+        raise ValueError(f"Unsupported operator: {type(node.op).__name__}")
+    if isinstance(node, ast.Name):
+        if node.id not in INDICATOR_COLUMNS:
+            raise ValueError(f"Unknown column: {node.id} (available: {', '.join(INDICATOR_COLUMNS)})")
+        return node.id
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+        return repr(node.value)
+    if isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.func.id not in _SQL_FUNCTIONS or node.keywords:
+            raise ValueError("Unsupported function call in expression")
+        # One-argument MIN/MAX would be SQLite's aggregate functions, not the scalar ones
+        arity = 1 if node.func.id == 'abs' else 2
+        if len(node.args) < arity or (node.func.id == 'abs' and len(node.args) > 1):
+            raise ValueError(f"{node.func.id}() needs {'exactly one argument' if arity == 1 else 'at least two arguments'}")
+        args = ', '.join(_compile_node(a) for a in node.args)
+        return f"{_SQL_FUNCTIONS[node.func.id]}({args})"
+    raise ValueError(f"Unsupported syntax: {type(node).__name__}")
+
+
+def compute_indicators(close, high, low, volume):
+    """
+    Compute the indicator columns with the same formulas as MarketAnalyzer.
+    Inputs are Series (one ticker) or wide DataFrames (dates x tickers); rolling windows
+    run column-wise, so a whole universe is computed in one pass.
+    Returns {column name: Series/DataFrame} for every INDICATOR_COLUMNS entry.
+    """
+    out = {'close': close, 'volume': volume}
+
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    out['rsi'] = 100 - (100 / (1 + gain / loss))
+
+    out['sma20'] = close.rolling(window=20).mean()
+    out['sma50'] = close.rolling(window=50).mean()
+    out['sma200'] = close.rolling(window=200).mean()
+
+    macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    out['macd'] = macd
+    out['macd_signal'] = macd.ewm(span=9, adjust=False).mean()
+    out['macd_hist'] = macd - out['macd_signal']
+
+    std20 = close.rolling(window=20).std()
+    out['bb_upper'] = out['sma20'] + 2 * std20
+    out['bb_lower'] = out['sma20'] - 2 * std20
+    out['bb_position'] = (close - out['bb_lower']) / (out['bb_upper'] - out['bb_lower'])
+
+    high14, low14 = high.rolling(14).max(), low.rolling(14).min()
+    out['williams_r'] = -100 * (high14 - close) / (high14 - low14)
+
+    plus_dm = high.diff().clip(lower=0)
+    minus_dm = (-low.diff()).clip(lower=0)
+    prev_close = close.shift(1)
+    tr = np.maximum(high - low, np.maximum((high - prev_close).abs(), (low - prev_close).abs()))
+    atr = tr.rolling(14).mean()
+    plus_di = 100 * plus_dm.rolling(14).mean() / atr
+    minus_di = 100 * minus_dm.rolling(14).mean() / atr
+    out['adx'] = (100 * (plus_di - minus_di).abs() / (plus_di + minus_di)).rolling(14).mean()
+
+    out['volume_ratio'] = volume.rolling(5).mean() / volume.rolling(60, min_periods=5).mean()
+    out['return_5d'] = (close / close.shift(4) - 1) * 100  # same lookback as analyzer (iloc[-5])
+    out['return_30d'] = (close / close.shift(29) - 1) * 100
+    out['volatility_20d'] = close.pct_change().rolling(20).std() * (252 ** 0.5) * 100
+
+    high52, low52 = high.rolling(252, min_periods=20).max(), low.rolling(252, min_periods=20).min()
+    out['position_52w'] = (close - low52) / (high52 - low52) * 100
+
+    return {name: out[name].replace([np.inf, -np.inf], np.nan) for name in INDICATOR_COLUMNS}
+
+
+class Screener:
+    def __init__(self, db_path=None):
+        self.cache = DataCache(db_path)  # Ensures price_history exists
+        self.db_path = self.cache.db_path
+        self.init_db()
+
+    def init_db(self):
+        """Create the indicators table (lives in the price cache database)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        columns = ',\n'.join(f'                {name} REAL' for name in INDICATOR_COLUMNS)
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS indicators (
+                ticker TEXT NOT NULL,
+                date TEXT NOT NULL,
+{columns},
+                PRIMARY KEY (ticker, date)
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_indicators_date ON indicators (date)')
+
+        conn.commit()
+        conn.close()
+
+    def refresh(self, tickers=None, full=False):
+        """
+        Recompute indicators from price_history.
+        Incremental by default: only tickers with bars newer than their last indicator row are
+        recomputed, and only the new rows are written. Returns the number of rows written.
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute('SELECT ticker, MAX(date) FROM price_history GROUP BY ticker')
+            price_last = dict(cursor.fetchall())
+            cursor.execute('SELECT ticker, MAX(date) FROM indicators GROUP BY ticker')
+            indicator_last = {} if full else dict(cursor.fetchall())
+
+            if tickers:
+                tickers = [t.upper() for t in tickers]
+            else:
+                tickers = list(price_last)
+            stale = [t for t in tickers if t in price_last and indicator_last.get(t, '') < price_last[t]]
+
+            if not stale:
+                return 0
+
+            placeholders = ','.join('?' * len(stale))
+            prices = pd.read_sql_query(f'''
+                SELECT ticker, date, open, high, low, close, volume
+                FROM price_history
+                WHERE ticker IN ({placeholders})
+                ORDER BY ticker, date
+            ''', conn, params=stale)
+
+            # Each ticker on its own date index: aligning on a common index would leave NaN holes
+            # where a ticker misses a bar, and every rolling window spanning a hole would be NaN
+            names = list(INDICATOR_COLUMNS)
+            per_ticker = {}
+            for ticker, bars in prices.groupby('ticker', sort=False):
+                bars = bars.set_index('date')
+                indicators = compute_indicators(
+                    bars['close'].astype(float), bars['high'].astype(float),
+                    bars['low'].astype(float), bars['volume'].astype(float)
+                )
+                per_ticker[ticker] = pd.DataFrame({name: indicators[name] for name in names})
+            rows = pd.concat(per_ticker)  # (ticker, date) index
+            rows = rows[rows['close'].notna()]
+
+            # Indicators need the full history for warm-up, but only new rows are written
+            row_tickers = rows.index.get_level_values(0)
+            row_dates = rows.index.get_level_values(1)
+            last = row_tickers.to_series().map(indicator_last).fillna('')
+            rows = rows[row_dates > last.values]
+            if rows.empty:
+                return 0
+
+            cursor.executemany(f'''
+                INSERT OR REPLACE INTO indicators (ticker, date, {', '.join(names)})
+                VALUES (?, ?, {', '.join('?' * len(names))})
+            ''', [(t, d, *values) for (t, d), values in zip(rows.index, rows.values.tolist())])
+            written = len(rows)
+
+            conn.commit()
+            return written
+        finally:
+            conn.close()
+
+    def screen(self, where=None, rank=None, descending=False, limit=50, as_of=None, columns=None):
+        """
+        Run a screen on each ticker's most recent indicator row on or before `as_of` (default:
+        latest). Tickers are cached on demand, so their newest bars need not share one date.
+        `where` and `rank` are expressions over INDICATOR_COLUMNS (see compile_expression).
+        Returns {'as_of', 'count', 'results': [row dicts with their own 'date']} or {'error': ...}.
+        """
+        try:
+            where_sql = compile_expression(where) if where else '1'
+            rank_sql = compile_expression(rank) if rank else None
+        except ValueError as e:
+            return {'error': str(e)}
+
+        columns = columns or ['close', 'rsi', 'sma50', 'sma200', 'macd_hist', 'volume_ratio', 'return_30d']
+        unknown = [c for c in columns if c not in INDICATOR_COLUMNS]
+        if unknown:
+            return {'error': f"Unknown column(s): {', '.join(unknown)}"}
+
+        if as_of:
+            as_of = as_of.strftime('%Y-%m-%d') if hasattr(as_of, 'strftime') else as_of
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        try:
+            select = ', '.join(['ticker', 'date'] + columns)
+            if rank_sql:
+                select += f', {rank_sql} AS rank_value'
+                # NULL ranks (indicator still warming up) always sort last
+                order = f"ORDER BY rank_value IS NULL, rank_value {'DESC' if descending else 'ASC'}, ticker"
+            else:
+                order = 'ORDER BY ticker'
+
+            cursor.execute(f'''
+                WITH latest AS (
+                    SELECT ticker, MAX(date) AS date
+                    FROM indicators
+                    {'WHERE date <= ?' if as_of else ''}
+                    GROUP BY ticker
+                )
+                SELECT {select}
+                FROM indicators JOIN latest USING (ticker, date)
+                WHERE {where_sql}
+                {order}
+                LIMIT ?
+            ''', ((as_of,) if as_of else ()) + (int(limit),))
+
+            names = [d[0] for d in cursor.description]
+            results = [dict(zip(names, row)) for row in cursor.fetchall()]
+
+            return {'as_of': as_of, 'count': len(results), 'results': results}
+        except sqlite3.Error as e:
+            return {'error': f"Query failed: {e}"}
+        finally:
+            conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Universe Screener')
+    parser.add_argument('command', choices=['refresh', 'run', 'columns'], help='Command')
+    parser.add_argument('--tickers', nargs='+', help='Restrict refresh to these tickers')
+    parser.add_argument('--full', action='store_true', help='Recompute all indicator rows')
+    parser.add_argument('--where', help='Filter, e.g. "rsi < 30 and sma50 > sma200"')
+    parser.add_argument('--rank', help='Ranking expression, e.g. "rsi" or "close / sma200"')
+    parser.add_argument('--desc', action='store_true', help='Rank descending')
+    parser.add_argument('--limit', type=int, default=50, help='Max results')
+    parser.add_argument('--as-of', help='Screen as of date (YYYY-MM-DD)')
+    parser.add_argument('--columns', nargs='+', help='Columns to display')
+    parser.add_argument('--output', choices=['json', 'text'], default='text', help='Output format')
+
+    args = parser.parse_args()
+
+    screener = Screener()
+
+    if args.command == 'columns':
+        for name, description in INDICATOR_COLUMNS.items():
+            print(f"  {name:<16} {description}")
+
+    elif args.command == 'refresh':
+        written = screener.refresh(args.tickers, full=args.full)
+        print(f"✅ {written:,} indicator rows updated")
+
+    elif args.command == 'run':
+        result = screener.screen(args.where, args.rank, args.desc, args.limit, args.as_of, args.columns)
+
+        if 'error' in result:
+            print(f"❌ {result['error']}")
+            return
+
+        if args.output == 'json':
+            print(json.dumps(result, indent=2))
+            return
+
+        print(f"\n🔎 Screen as of {result['as_of'] or 'latest bars'}: {result['count']} match(es)\n")
+        if result['results']:
+            names = list(result['results'][0].keys())
+            print('  '.join(f"{n:>12}" for n in names))
+            print('-' * (14 * len(names)))
+            for row in result['results']:
+                print('  '.join(f"{v:>12.2f}" if isinstance(v, float) else f"{str(v):>12}" for v in row.values()))
+
+
+if __name__ == '__main__':
+    main()
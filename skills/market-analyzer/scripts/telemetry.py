@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Telemetry - In-process metrics exported in the Prometheus text format
+
+Counters and histograms live in a module-level registry shared by every engine in the
+process. The dashboard serves them on /metrics; standalone processes (live monitor)
+can expose them with start_http_server(port).
+"""
+
+import time
+import bisect
+import functools
+import threading
+import contextlib
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Default latency buckets in seconds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label_str(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + '}'
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, '') for n in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels.get(n, '') for n in self.labels), 0)
+
+    def snapshot(self):
+        """{label values tuple: value}"""
+        with self._lock:
+            return dict(self._values)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        if not items and not self.labels:
+            items = [((), 0)]  # Unlabelled counters are exported from zero
+        return [(self.name, _label_str(self.labels, key), value) for key, value in items]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, '') for n in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    @contextlib.contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels):
+        series = self._series.get(tuple(labels.get(n, '') for n in self.labels))
+        return sum(series[:-1]) if series else 0
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        samples = []
+        for key, series in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + ('+Inf',), series[:-1]):
+                cumulative += n
+                le = bound if bound == '+Inf' else repr(float(bound))
+                samples.append((f'{self.name}_bucket', _label_str(self.labels + ('le',), key + (le,)), cumulative))
+            samples.append((f'{self.name}_sum', _label_str(self.labels, key), series[-1]))
+            samples.append((f'{self.name}_count', _label_str(self.labels, key), cumulative))
+        return samples
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []  # Callables returning extra (name, kind, doc, samples) at render time
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self.register(Counter(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def render(self):
+        """Prometheus text exposition of every metric"""
+        lines = []
+        families = [(m.name, m.kind, m.documentation, m.samples()) for m in self._metrics.values()]
+        for collector in self._collectors:
+            families.extend(collector())
+        for name, kind, documentation, samples in families:
+            lines.append(f'# HELP {name} {documentation}')
+            lines.append(f'# TYPE {name} {kind}')
+            for sample_name, labels, value in samples:
+                lines.append(f'{sample_name}{labels} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(value) if value == value else 'NaN'
+    return str(value)
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    'market_http_request_duration_seconds', 'Dashboard request latency by route', ('method', 'route', 'status'))
+ENGINE_DURATION = REGISTRY.histogram(
+    'market_engine_duration_seconds', 'Duration of analysis, backtest and simulation runs', ('operation',),
+    buckets=DEFAULT_BUCKETS + (120, 300, 600))
+CACHE_REQUESTS = REGISTRY.counter(
+    'market_cache_requests_total', 'DataCache and page cache lookups by kind and result (hit/miss)', ('kind', 'result'))
+PROVIDER_REQUESTS = REGISTRY.counter(
+    'market_provider_requests_total', 'Market data provider calls', ('provider', 'call'))
+RATE_LIMIT_WAIT = REGISTRY.counter(
+    'market_provider_rate_limit_wait_seconds_total', 'Time spent sleeping between downloads to respect rate limits')
+SQLITE_QUERY_DURATION = REGISTRY.histogram(
+    'market_sqlite_query_duration_seconds', 'SQLite query time by operation', ('operation',))
+
+
+def _cache_hit_ratio():
+    """Derived gauge: hit ratio per cache kind"""
+    totals = {}
+    for (kind, result), value in CACHE_REQUESTS.snapshot().items():
+        hits, total = totals.get(kind, (0, 0))
+        totals[kind] = (hits + (value if result == 'hit' else 0), total + value)
+    samples = [
+        ('market_cache_hit_ratio', _label_str(('kind',), (kind,)), hits / total)
+        for kind, (hits, total) in sorted(totals.items()) if total
+    ]
+    return [('market_cache_hit_ratio', 'gauge', 'Cache hit ratio by kind', samples)]
+
+
+REGISTRY.add_collector(_cache_hit_ratio)
+
+
+def render():
+    return REGISTRY.render()
+
+
+def timed(operation):
+    """Decorator: record each call's duration in ENGINE_DURATION under `operation`"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with ENGINE_DURATION.time(operation=operation):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def start_http_server(port, host='0.0.0.0'):
+    """Serve /metrics from a background thread (for processes without the dashboard)"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Scrapes every few seconds would flood the console
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -3,8 +3,6 @@
 import sys, os
 sys.path.insert(0, os.path.dirname(__file__))
 from portfolio_sim import PortfolioSimulator
-import sqlite3
-import json
 
 sim = PortfolioSimulator()
 
@@ -31,23 +29,9 @@ for buy_thresh, sell_thresh, name in thresholds_to_test:
     }
     
     print(f"Testing BUY={buy_thresh}, SELL={sell_thresh}...")
-    result = sim.create_portfolio(name, 10000, "2024-01-01", config=config)
-    pid = result['portfolio_id']
-    
-    sim.run_simulation(pid, end_date="2024-12-31")
-    
-    # Get results
-    conn = sqlite3.connect(sim.db_path)
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT current_capital, 
-               (SELECT COUNT(*) FROM trades_log WHERE portfolio_id = ?)
-        FROM portfolios WHERE id = ?
-    ''', (pid, pid))
-    final, trades = cursor.fetchone()
-    conn.close()
-    
-    return_pct = ((final - 10000) / 10000) * 100
+    # In-memory run: sweeps leave no portfolios behind in portfolio_sim.db
+    result = sim.simulate_config(config, "2024-01-01", "2024-12-31", initial_capital=10000)
+    return_pct, trades = result['return_pct'], result['trades_made']
     results.append((buy_thresh, sell_thresh, return_pct, trades))
     print(f"  ✅ {name}: {return_pct:+.2f}% ({trades} trades)\n")
 
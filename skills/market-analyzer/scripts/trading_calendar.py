@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Trading Calendar - NYSE sessions, holidays and early closes
+
+The exchange calendar is derived from the NYSE holiday rules (plus the unscheduled closures
+listed in SPECIAL_CLOSURES) and precomputed once per year, so the cache, the simulator and
+the live monitor iterate real sessions only: no loop over weekends, no query or download
+for a day the market was closed.
+
+Standard library only (imported by data_cache and live_monitor on every start).
+
+Usage:
+    python3 trading_calendar.py 2026            # holidays and early closes of a year
+    python3 trading_calendar.py 2026-11-20 2026-12-31   # sessions in a range
+"""
+
+import bisect
+import argparse
+from functools import lru_cache
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+TZ = ZoneInfo('America/New_York')
+OPEN = time(9, 30)
+CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+
+# Closures outside the regular rules (national days of mourning, weather, 9/11)
+SPECIAL_CLOSURES = frozenset(date.fromisoformat(d) for d in (
+    '2001-09-11', '2001-09-12', '2001-09-13', '2001-09-14',
+    '2004-06-11', '2007-01-02', '2012-10-29', '2012-10-30', '2018-12-05', '2025-01-09',
+))
+
+
+def _as_date(day):
+    return day.date() if isinstance(day, datetime) else day
+
+
+def _easter(year):
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)"""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year, month, weekday, n):
+    """n-th `weekday` (Mon=0) of a month; n=-1 for the last one"""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day):
+    """Saturday holidays move to Friday, Sunday holidays to Monday"""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+@lru_cache(maxsize=None)
+def holidays(year):
+    """Full-day closures of a year (weekdays only)"""
+    days = {
+        _nth_weekday(year, 1, 0, 3),    # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),    # Washington's Birthday
+        _easter(year) - timedelta(days=2),  # Good Friday
+        _nth_weekday(year, 5, 0, -1),   # Memorial Day
+        _observed(date(year, 7, 4)),    # Independence Day
+        _nth_weekday(year, 9, 0, 1),    # Labor Day
+        _nth_weekday(year, 11, 3, 4),   # Thanksgiving
+        _observed(date(year, 12, 25)),  # Christmas
+    }
+    # New Year's Day: a Saturday holiday is not moved back into the previous year
+    if date(year, 1, 1).weekday() != 5:
+        days.add(_observed(date(year, 1, 1)))
+    if year >= 2022:
+        days.add(_observed(date(year, 6, 19)))  # Juneteenth
+    days.update(d for d in SPECIAL_CLOSURES if d.year == year)
+    return frozenset(d for d in days if d.weekday() < 5)
+
+
+@lru_cache(maxsize=None)
+def half_days(year):
+    """Sessions closing at EARLY_CLOSE: eve of Independence Day, day after Thanksgiving, Christmas Eve"""
+    days = {
+        date(year, 7, 3),
+        _nth_weekday(year, 11, 3, 4) + timedelta(days=1),
+        date(year, 12, 24),
+    }
+    return frozenset(d for d in days if d.weekday() < 5 and d not in holidays(year))
+
+
+@lru_cache(maxsize=None)
+def _sessions(year):
+    """Sorted sessions of a year"""
+    closed = holidays(year)
+    day, end, days = date(year, 1, 1), date(year, 12, 31), []
+    while day <= end:
+        if day.weekday() < 5 and day not in closed:
+            days.append(day)
+        day += timedelta(days=1)
+    return tuple(days)
+
+
+def is_session(day):
+    day = _as_date(day)
+    return day.weekday() < 5 and day not in holidays(day.year)
+
+
+def sessions(start, end):
+    """Every session in [start, end], as dates"""
+    start, end = _as_date(start), _as_date(end)
+    days = []
+    for year in range(start.year, end.year + 1):
+        year_sessions = _sessions(year)
+        lo = bisect.bisect_left(year_sessions, start) if year == start.year else 0
+        hi = bisect.bisect_right(year_sessions, end) if year == end.year else len(year_sessions)
+        days.extend(year_sessions[lo:hi])
+    return days
+
+
+def count_sessions(start, end):
+    return len(sessions(start, end)) if _as_date(start) <= _as_date(end) else 0
+
+
+def next_session(day):
+    """First session strictly after day"""
+    day = _as_date(day)
+    year_sessions = _sessions(day.year)
+    i = bisect.bisect_right(year_sessions, day)
+    return year_sessions[i] if i < len(year_sessions) else _sessions(day.year + 1)[0]
+
+
+def last_session(day):
+    """Last session on or before day (day itself when the market opens that day)"""
+    day = _as_date(day)
+    year_sessions = _sessions(day.year)
+    i = bisect.bisect_right(year_sessions, day)
+    return year_sessions[i - 1] if i else _sessions(day.year - 1)[-1]
+
+
+def previous_session(day):
+    """Last session strictly before day"""
+    return last_session(_as_date(day) - timedelta(days=1))
+
+
+def session_hours(day):
+    """(open, close) New York datetimes of a session, or None when the market is closed"""
+    day = _as_date(day)
+    if not is_session(day):
+        return None
+    close = EARLY_CLOSE if day in half_days(day.year) else CLOSE
+    return datetime.combine(day, OPEN, tzinfo=TZ), datetime.combine(day, close, tzinfo=TZ)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='NYSE trading calendar')
+    parser.add_argument('start', help='Year (YYYY) or first day (YYYY-MM-DD)')
+    parser.add_argument('end', nargs='?', help='Last day (YYYY-MM-DD): list the sessions in between')
+    args = parser.parse_args()
+
+    if args.end is None and len(args.start) == 4:
+        year = int(args.start)
+        print(f"📅 NYSE {year}: {len(_sessions(year))} sessions")
+        for day in sorted(holidays(year) | half_days(year)):
+            kind = 'closed' if day in holidays(year) else f"early close {EARLY_CLOSE:%H:%M}"
+            print(f"  {day} {day:%a}  {kind}")
+        return
+
+    start = date.fromisoformat(args.start)
+    end = date.fromisoformat(args.end) if args.end else start
+    days = sessions(start, end)
+    for day in days:
+        print(f"{day} {day:%a}" + (f"  early close {EARLY_CLOSE:%H:%M}" if day in half_days(day.year) else ''))
+    print(f"📅 {len(days)} sessions")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Walk-Forward Optimization - Out-of-sample validation of strategy parameters
+
+History is split into rolling windows: parameters are optimized on each train window,
+then evaluated, untouched, on the test window that follows it. Only the test results
+say how a tuned strategy would have done on data it had not seen.
+
+Prices and technical scores are computed once for the whole panel (the score is built from
+causal rolling windows, so it is the same value whichever window a bar belongs to) and put
+in one shared-memory block. Folds run in worker processes that map that block read-only
+instead of each reloading and rescoring the universe.
+
+Usage:
+    python3 walkforward.py AAPL MSFT GOOGL NVDA --start 2018-01-01 --end 2025-12-31 --workers 4
+    python3 walkforward.py AAPL MSFT --train 252 --test 63 --output json
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import json
+import argparse
+import contextlib
+import numpy as np
+from itertools import product
+from datetime import datetime
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+
+from backtest import Backtester
+from data_cache import DataCache
+from data_provider import get_provider
+from telemetry import timed
+
+ARRAYS = ('Close', 'High', 'Low', 'Open', 'Score')
+TRAIN_BARS = 504  # ~2 trading years
+TEST_BARS = 126  # ~6 trading months
+
+DEFAULT_GRID = {
+    'buy_threshold': [6.0, 6.5, 7.0],
+    'sell_threshold': [3.0, 3.5, 4.0],
+    'stop_loss': [0.04, 0.05, 0.07],
+    'take_profit': [0.10, 0.15, 0.20],
+}
+
+
+def expand_grid(grid):
+    """Every combination of a {parameter: [values]} grid, as parameter dicts"""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in product(*(grid[n] for n in names))]
+
+
+def make_folds(n_bars, train, test, step=None, start=0):
+    """[(train_start, train_end, test_end), ...] bar indices; windows are [start, end)"""
+    step = step or test
+    folds = []
+    i = start
+    while i + train + test <= n_bars:
+        folds.append((i, i + train, i + train + test))
+        i += step
+    return folds
+
+
+# Worker state: views into the shared block, set by _attach (also used in-process)
+_SHARED = {}
+
+
+def _attach(name, shape, settings):
+    """Process-pool initializer: map the shared price/score block (read-only)"""
+    block = shared_memory.SharedMemory(name=name)
+    data = np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+    data.flags.writeable = False
+    _SHARED.update({'block': block, 'data': data, 'settings': settings})
+
+
+def _evaluate(params, lo, hi, dates):
+    """Mean return % and trade stats of one parameter set over bars [lo, hi) of every ticker"""
+    data = _SHARED['data']
+    backtester = Backtester(**_SHARED['settings'], **params)
+    returns, trades, wins = [], 0, 0
+    for j in range(data.shape[2]):
+        close = data[0, lo:hi, j]
+        rows = np.flatnonzero(~np.isnan(close))
+        if len(rows) < 2:
+            continue
+        window = [data[k, lo:hi, j][rows] for k in range(len(ARRAYS))]
+        ticker_trades, capital = backtester._simulate_trades(
+            dates[lo:hi][rows], window[0], window[4], window[1], window[2], window[3], warmup=0)
+        returns.append((capital - backtester.initial_capital) / backtester.initial_capital * 100)
+        trades += len(ticker_trades)
+        wins += sum(1 for t in ticker_trades if t['pnl'] > 0)
+    return {
+        'return_pct': float(np.mean(returns)) if returns else 0.0,
+        'num_trades': trades,
+        'win_rate': wins / trades * 100 if trades else 0.0,
+    }
+
+
+def _run_fold(fold, candidates, dates):
+    """Optimize on the train window, then evaluate the winner on the test window"""
+    train_lo, train_hi, test_hi = fold
+    scored = [(params, _evaluate(params, train_lo, train_hi, dates)) for params in candidates]
+    best_params, best_train = max(scored, key=lambda item: item[1]['return_pct'])
+    return {
+        'train': (dates[train_lo].strftime('%Y-%m-%d'), dates[train_hi - 1].strftime('%Y-%m-%d')),
+        'test': (dates[train_hi].strftime('%Y-%m-%d'), dates[test_hi - 1].strftime('%Y-%m-%d')),
+        'params': best_params,
+        'train_result': best_train,
+        'test_result': _evaluate(best_params, train_hi, test_hi, dates),
+    }
+
+
+class WalkForward:
+    def __init__(self, initial_capital=10000, position_size=0.2, intrabar=False, provider=None):
+        self.settings = {'initial_capital': initial_capital, 'position_size': position_size, 'intrabar': intrabar}
+        self.provider = provider or get_provider()
+
+    def load(self, tickers, start_date, end_date):
+        """(dates, array of shape (len(ARRAYS), dates, tickers), tickers present) from the local cache"""
+        cache = DataCache(provider=self.provider)
+        cache.preload_universe(tickers, start_date, end_date)
+        panel = cache.get_cached_panel(tickers, start_date, end_date)
+        close = panel['Close']
+        scores = Backtester(provider=self.provider)._score_panel(close)  # Per ticker, on its own bars
+        frames = [panel['Close'], panel['High'], panel['Low'], panel['Open'], scores]
+        # Plain datetimes: per-trade date lookups on a DatetimeIndex dominate the fold time otherwise
+        dates = close.index.to_pydatetime()
+        return dates, np.stack([f.to_numpy(dtype=np.float64) for f in frames]), list(close.columns)
+
+    @timed('walkforward')
+    def run(self, tickers, start_date, end_date, train=TRAIN_BARS, test=TEST_BARS, step=None, grid=None, workers=None):
+        """
+        Walk-forward over [start_date, end_date]. The first WARMUP_BARS bars only seed the
+        indicators; folds start after them. Returns per-fold results and the out-of-sample summary.
+        """
+        dates, data, present = self.load(tickers, start_date, end_date)
+        if not present:
+            return {'error': 'No cached data for these tickers'}
+        candidates = expand_grid(grid or DEFAULT_GRID)
+        folds = make_folds(len(dates), train, test, step, start=Backtester.WARMUP_BARS)
+        if not folds:
+            return {'error': f'{len(dates)} bars: not enough for {Backtester.WARMUP_BARS} warmup + '
+                             f'{train} train + {test} test bars'}
+
+        print(f"🔁 {len(folds)} folds x {len(candidates)} configs on {len(present)} tickers "
+              f"({workers or 1} worker(s))")
+        block = shared_memory.SharedMemory(create=True, size=data.nbytes)
+        try:
+            np.ndarray(data.shape, dtype=np.float64, buffer=block.buf)[:] = data
+            del data
+            if workers and workers > 1:
+                with ProcessPoolExecutor(max_workers=workers, initializer=_attach,
+                                         initargs=(block.name, (len(ARRAYS), len(dates), len(present)), self.settings)) as pool:
+                    results = list(pool.map(_run_fold, folds, [candidates] * len(folds), [dates] * len(folds)))
+            else:
+                _attach(block.name, (len(ARRAYS), len(dates), len(present)), self.settings)
+                try:
+                    results = [_run_fold(fold, candidates, dates) for fold in folds]
+                finally:
+                    _SHARED.pop('data')
+                    _SHARED.pop('block').close()
+        finally:
+            block.close()
+            block.unlink()
+
+        return {'tickers': present, 'folds': results, 'summary': summarize(results)}
+
+
+def summarize(folds):
+    """Out-of-sample figures: test returns only, compared with what the train windows promised"""
+    test = np.array([f['test_result']['return_pct'] for f in folds])
+    train = np.array([f['train_result']['return_pct'] for f in folds])
+    compounded = float(np.prod(1 + test / 100) - 1) * 100
+    return {
+        'folds': len(folds),
+        'mean_test_return_pct': float(test.mean()),
+        'compounded_test_return_pct': compounded,
+        'positive_test_folds': int((test > 0).sum()),
+        'mean_train_return_pct': float(train.mean()),
+        # Test return per unit of train return: well below 1 means the tuning mostly fits noise
+        'efficiency': float(test.mean() / train.mean()) if train.mean() > 0 else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Walk-forward optimization')
+    parser.add_argument('tickers', nargs='+', help='Stock ticker symbols')
+    parser.add_argument('--start', default='2018-01-01', help='Start date (YYYY-MM-DD)')
+    parser.add_argument('--end', help='End date (YYYY-MM-DD, default: today)')
+    parser.add_argument('--train', type=int, default=TRAIN_BARS, help='Train window (bars)')
+    parser.add_argument('--test', type=int, default=TEST_BARS, help='Test window (bars)')
+    parser.add_argument('--step', type=int, help='Bars between folds (default: --test, non-overlapping tests)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Processes (1 = in-process)')
+    parser.add_argument('--output', choices=['json', 'text'], default='text', help='Output format')
+    args = parser.parse_args()
+
+    start = datetime.strptime(args.start, '%Y-%m-%d')
+    end = datetime.strptime(args.end, '%Y-%m-%d') if args.end else datetime.now()
+    # Progress (cache downloads, fold count) goes to stderr when stdout carries the JSON result
+    with contextlib.redirect_stdout(sys.stderr if args.output == 'json' else sys.stdout):
+        result = WalkForward().run([t.upper() for t in args.tickers], start, end, args.train, args.test,
+                                   args.step, workers=args.workers)
+
+    if args.output == 'json':
+        print(json.dumps(result, indent=2))
+        return
+    if 'error' in result:
+        print(f"❌ {result['error']}")
+        return
+
+    print(f"\n{'Train':<25} {'Test':<25} {'BUY':>5} {'SELL':>5} {'SL':>5} {'TP':>5} {'Train %':>9} {'Test %':>9}")
+    print('-' * 92)
+    for f in result['folds']:
+        p = f['params']
+        print(f"{f['train'][0]} → {f['train'][1]}  {f['test'][0]} → {f['test'][1]}  "
+              f"{p['buy_threshold']:>5.1f} {p['sell_threshold']:>5.1f} {p['stop_loss']:>5.0%} {p['take_profit']:>5.0%} "
+              f"{f['train_result']['return_pct']:>+8.2f}% {f['test_result']['return_pct']:>+8.2f}%")
+    s = result['summary']
+    print(f"\n📊 Out-of-sample: mean {s['mean_test_return_pct']:+.2f}% per fold, "
+          f"compounded {s['compounded_test_return_pct']:+.2f}%, "
+          f"{s['positive_test_folds']}/{s['folds']} positive folds")
+    if s['efficiency'] is not None:
+        print(f"   Walk-forward efficiency (test / train): {s['efficiency']:.2f}")
+
+
+if __name__ == '__main__':
+    main()
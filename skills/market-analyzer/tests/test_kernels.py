@@ -0,0 +1,157 @@
+import numpy as np
+import pytest
+
+import kernels
+from kernels import (select_top_k, find_exits, EXIT_NONE, EXIT_STOP_LOSS, EXIT_TAKE_PROFIT,
+                     EXIT_SELL_SIGNAL)
+
+
+def reference_top_k(scores, k=None, threshold=None, eligible=None):
+    """Plain loop: every scored, eligible candidate above threshold, best first, ties by index"""
+    picks = [i for i, s in enumerate(scores)
+             if not np.isnan(s) and (threshold is None or s >= threshold)
+             and (eligible is None or eligible[i])]
+    picks.sort(key=lambda i: (-scores[i], i))
+    return picks if k is None else picks[:max(k, 0)]
+
+
+def reference_exits(entry_idx, close, stop_loss, take_profit, sell_mask=None, high=None, low=None, open_=None):
+    """Bar-by-bar walk of each entry, as the simulators did before the kernel"""
+    out = []
+    for entry in entry_idx:
+        stop, target = close[entry] * (1 - stop_loss), close[entry] * (1 + take_profit)
+        result = (-1, np.nan, EXIT_NONE)
+        for bar in range(entry + 1, len(close)):
+            lo = low[bar] if high is not None else close[bar]
+            hi = high[bar] if high is not None else close[bar]
+            if lo <= stop:
+                price = close[bar] if high is None else stop
+                if high is not None and open_ is not None:
+                    price = min(price, open_[bar])
+                result = (bar, price, EXIT_STOP_LOSS)
+            elif hi >= target:
+                price = close[bar] if high is None else target
+                if high is not None and open_ is not None:
+                    price = max(price, open_[bar])
+                result = (bar, price, EXIT_TAKE_PROFIT)
+            elif sell_mask is not None and sell_mask[bar]:
+                result = (bar, close[bar], EXIT_SELL_SIGNAL)
+            else:
+                continue
+            break
+        out.append(result)
+    return out
+
+
+def assert_exits_match(got, expected):
+    exit_idx, exit_price, reason = got
+    assert exit_idx.tolist() == [e[0] for e in expected]
+    assert reason.tolist() == [e[2] for e in expected]
+    np.testing.assert_allclose(exit_price, [e[1] for e in expected], equal_nan=True)
+
+
+def random_bars(rng, n):
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.03, n))
+    open_ = close * (1 + rng.normal(0, 0.02, n))
+    high = np.maximum(close, open_) * (1 + np.abs(rng.normal(0, 0.02, n)))
+    low = np.minimum(close, open_) * (1 - np.abs(rng.normal(0, 0.02, n)))
+    return close, high, low, open_
+
+
+# --- select_top_k ---
+
+@pytest.mark.parametrize('seed', range(20))
+def test_select_top_k_matches_reference_on_random_scores(seed):
+    rng = np.random.default_rng(seed)
+    scores = rng.integers(0, 10, 50).astype(float)  # Small integer range: many ties
+    scores[rng.random(50) < 0.2] = np.nan
+    eligible = rng.random(50) < 0.8
+    for k in (None, 0, 1, 5, 49, 50, 80):
+        for threshold in (None, 5):
+            got = select_top_k(scores, k=k, threshold=threshold, eligible=eligible)
+            assert got.tolist() == reference_top_k(scores, k, threshold, eligible)
+
+
+def test_select_top_k_equal_scores_keep_universe_order():
+    scores = np.array([3.0, 7.0, 7.0, 1.0, 7.0, 7.0])
+    assert select_top_k(scores).tolist() == [1, 2, 4, 5, 0, 3]
+    # The partial sort must not pick arbitrary members of a tie that straddles k
+    assert select_top_k(scores, k=2).tolist() == [1, 2]
+    assert select_top_k(scores, k=3).tolist() == [1, 2, 4]
+
+
+def test_select_top_k_edge_cases():
+    assert select_top_k([]).tolist() == []
+    assert select_top_k([np.nan, np.nan], k=1).tolist() == []
+    assert select_top_k([5.0, 6.0], threshold=7).tolist() == []
+    assert select_top_k([5.0, 6.0], k=-1).tolist() == []
+
+
+# --- find_exits ---
+
+@pytest.mark.parametrize('seed', range(10))
+@pytest.mark.parametrize('intrabar', [False, True])
+def test_find_exits_matches_reference_on_random_bars(seed, intrabar):
+    rng = np.random.default_rng(seed)
+    close, high, low, open_ = random_bars(rng, 120)
+    sell_mask = rng.random(120) < 0.05
+    entries = np.sort(rng.choice(120, 30, replace=False))
+    kwargs = {'high': high, 'low': low, 'open_': open_} if intrabar else {}
+    got = find_exits(entries, close, 0.05, 0.08, sell_mask, **kwargs)
+    assert_exits_match(got, reference_exits(entries, close, 0.05, 0.08, sell_mask, **kwargs))
+
+
+def test_find_exits_gap_through_stop_fills_at_open():
+    close = np.array([100.0, 99.0, 90.0])
+    open_ = np.array([100.0, 99.0, 88.0])  # Opens below the 95 stop
+    high = np.array([101.0, 100.0, 91.0])
+    low = np.array([99.0, 98.0, 87.0])
+    idx, price, reason = find_exits([0], close, 0.05, 0.10, high=high, low=low, open_=open_)
+    assert (idx[0], price[0], reason[0]) == (2, 88.0, EXIT_STOP_LOSS)
+
+
+def test_find_exits_gap_through_target_fills_at_open():
+    close = np.array([100.0, 101.0, 115.0])
+    open_ = np.array([100.0, 101.0, 113.0])  # Opens above the 110 target
+    high = np.array([101.0, 102.0, 116.0])
+    low = np.array([99.0, 100.0, 112.0])
+    idx, price, reason = find_exits([0], close, 0.05, 0.10, high=high, low=low, open_=open_)
+    assert (idx[0], price[0], reason[0]) == (2, 113.0, EXIT_TAKE_PROFIT)
+
+
+def test_find_exits_same_bar_priority_is_stop_then_target_then_sell():
+    close = np.array([100.0, 100.0])
+    sell = np.array([False, True])
+    # Bar 1 reaches both levels and has a sell signal: the stop wins
+    idx, price, reason = find_exits([0], close, 0.05, 0.10, sell, high=np.array([100.0, 120.0]),
+                                    low=np.array([100.0, 80.0]), open_=np.array([100.0, 100.0]))
+    assert (idx[0], price[0], reason[0]) == (1, 95.0, EXIT_STOP_LOSS)
+    # Target and sell signal on the same bar: the target wins
+    idx, price, reason = find_exits([0], close, 0.05, 0.10, sell, high=np.array([100.0, 120.0]),
+                                    low=np.array([100.0, 99.0]), open_=np.array([100.0, 100.0]))
+    assert (idx[0], reason[0]) == (1, EXIT_TAKE_PROFIT) and price[0] == pytest.approx(110.0)
+    # Sell signal alone exits at the close
+    idx, price, reason = find_exits([0], close, 0.05, 0.10, sell)
+    assert (idx[0], price[0], reason[0]) == (1, 100.0, EXIT_SELL_SIGNAL)
+
+
+def test_find_exits_without_trigger_or_on_last_bar():
+    close = np.array([100.0, 101.0, 102.0])
+    idx, price, reason = find_exits([0, 2], close, 0.05, 0.10)
+    assert idx.tolist() == [-1, -1]
+    assert reason.tolist() == [EXIT_NONE, EXIT_NONE]
+    assert np.isnan(price).all()
+    idx, price, reason = find_exits([], close, 0.05, 0.10)
+    assert len(idx) == len(price) == len(reason) == 0
+
+
+@pytest.mark.parametrize('cells', [1, 7, 50, 333])
+def test_find_exits_chunking_matches_single_pass(monkeypatch, cells):
+    rng = np.random.default_rng(7)
+    close, high, low, open_ = random_bars(rng, 200)
+    sell_mask = rng.random(200) < 0.02
+    entries = rng.permutation(200)[:60]  # Unsorted: chunks follow entry order, results input order
+    expected = reference_exits(entries, close, 0.04, 0.06, sell_mask, high, low, open_)
+    monkeypatch.setattr(kernels, '_MAX_WINDOW_CELLS', cells)
+    got = find_exits(entries, close, 0.04, 0.06, sell_mask, high=high, low=low, open_=open_)
+    assert_exits_match(got, expected)
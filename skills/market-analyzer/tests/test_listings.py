@@ -0,0 +1,106 @@
+import sqlite3
+
+import pytest
+
+import listings
+from db_migrations import migrate, PORTFOLIO_SIM_MIGRATIONS, LIVE_PORTFOLIO_MIGRATIONS
+
+
+@pytest.fixture
+def sim_db(tmp_path):
+    db_path = str(tmp_path / 'portfolio_sim.db')
+    migrate(db_path, PORTFOLIO_SIM_MIGRATIONS)
+    conn = sqlite3.connect(db_path)
+    # Many trades share a date: pages must split ties on rowid without skipping or repeating
+    dates = ['2024-01-02'] * 5 + ['2024-01-03'] * 4 + ['2024-01-04'] * 5
+    conn.executemany(
+        'INSERT INTO trades_log (portfolio_id, date, action, ticker, price, shares, value) VALUES (?, ?, ?, ?, ?, ?, ?)',
+        [(1, d, 'BUY', f'T{i}', 10.0, 1, 10.0) for i, d in enumerate(dates)]
+        + [(2, '2024-01-02', 'BUY', 'OTHER', 10.0, 1, 10.0)]
+    )
+    conn.executemany(
+        'INSERT INTO positions (portfolio_id, ticker, entry_date, entry_price, shares, capital_invested, status) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+        [(1, 'AAA', '2024-01-02', 10.0, 1, 10.0, 'closed'), (1, 'BBB', '2024-01-03', 10.0, 1, 10.0, 'open')]
+    )
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+@pytest.fixture
+def live_db(tmp_path):
+    db_path = str(tmp_path / 'live_portfolio.db')
+    migrate(db_path, LIVE_PORTFOLIO_MIGRATIONS)
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        'INSERT INTO trades (timestamp, action, ticker, shares, price) VALUES (?, ?, ?, ?, ?)',
+        [('2026-01-05T09:31:00', 'BUY', 'AAA', 1, 10.0), ('2026-01-05T23:59:59', 'SELL', 'AAA', 1, 11.0),
+         ('2026-01-06T00:00:00', 'BUY', 'BBB', 1, 12.0)]
+    )
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+def all_pages(db_path, listing, limit, **params):
+    items, after, pages = [], None, 0
+    while True:
+        result = listings.page(db_path, listing, after=after, limit=limit, **params)
+        items.extend(result['items'])
+        pages += 1
+        after = result['next_cursor']
+        if after is None:
+            return items, pages
+
+
+@pytest.mark.parametrize('cursor', [('2024-01-02', 7), ('2026-01-05T23:59:59', 1), (None, 0)])
+def test_cursor_round_trip(cursor):
+    encoded = listings.encode_cursor(*cursor)
+    assert '=' not in encoded and '/' not in encoded and '+' not in encoded
+    assert listings.decode_cursor(encoded) == cursor
+
+
+@pytest.mark.parametrize('bad', ['not-a-cursor', '', listings.encode_cursor('2024-01-02', 'x')[:-2], 'WzEsMiwzXQ'])
+def test_malformed_cursor_is_a_value_error(bad):
+    with pytest.raises(ValueError):
+        listings.decode_cursor(bad)
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3, 4, 5, 14, 100])
+@pytest.mark.parametrize('desc', [False, True])
+def test_pages_across_equal_keys_cover_every_row_once(sim_db, limit, desc):
+    items, pages = all_pages(sim_db, 'sim_trades', limit, scope_id=1, desc=desc)
+    expected = list(listings.iter_rows(sim_db, 'sim_trades', scope_id=1, desc=desc))
+    assert [tuple(item.values()) for item in items] == expected
+    assert len(items) == 14 and len({item['id'] for item in items}) == 14
+    assert pages == max(1, -(-14 // limit))
+    keys = [(item['date'], item['id']) for item in items]
+    assert keys == sorted(keys, reverse=desc)
+
+
+def test_end_day_is_inclusive_for_dates_and_timestamps(sim_db, live_db):
+    items = listings.page(sim_db, 'sim_trades', 1, start='2024-01-03', end='2024-01-03')['items']
+    assert {item['date'] for item in items} == {'2024-01-03'} and len(items) == 4
+    # A timestamp late on the end day is in, midnight of the next day is out
+    items = listings.page(live_db, 'live_trades', end='2026-01-05')['items']
+    assert [item['timestamp'] for item in items] == ['2026-01-05T09:31:00', '2026-01-05T23:59:59']
+    items = listings.page(live_db, 'live_trades', start='2026-01-06T12:00:00')['items']
+    assert [item['timestamp'] for item in items] == ['2026-01-06T00:00:00']
+
+
+def test_status_filter(sim_db, live_db):
+    items = listings.page(sim_db, 'sim_positions', 1, status='open')['items']
+    assert [item['ticker'] for item in items] == ['BBB']
+    with pytest.raises(ValueError, match='status'):
+        listings.page(live_db, 'live_trades', status='open')
+    with pytest.raises(ValueError, match='status'):
+        listings.iter_rows(live_db, 'live_positions', status='open')
+
+
+def test_export_streams_every_row(sim_db):
+    chunks, media_type = listings.export(sim_db, 'sim_trades', 'csv', scope_id=1)
+    lines = ''.join(chunks).splitlines()
+    assert media_type == 'text/csv'
+    assert lines[0] == ','.join(listings.LISTINGS['sim_trades']['columns'])
+    assert len(lines) == 15
@@ -0,0 +1,93 @@
+import math
+
+import numpy as np
+import pytest
+
+import metrics
+
+# Daily returns +10%, -10%, +22.2%; three periods per year makes the curve exactly one year long
+EQUITY = [100.0, 110.0, 99.0, 121.0]
+RETURNS = [0.1, -0.1, 22 / 99]
+PERIODS = 3
+
+
+def test_returns_and_totals():
+    np.testing.assert_allclose(metrics.returns(EQUITY), RETURNS)
+    assert metrics.final_value(EQUITY) == 121.0
+    assert metrics.total_return(EQUITY) == pytest.approx(21.0)
+    assert metrics.cagr(EQUITY, periods_per_year=PERIODS) == pytest.approx(21.0)
+    assert metrics.cagr(EQUITY, years=2) == pytest.approx((math.sqrt(1.21) - 1) * 100)
+
+
+def test_risk_ratios_against_hand_computed_values():
+    mean = sum(RETURNS) / 3
+    std = math.sqrt(sum((r - mean) ** 2 for r in RETURNS) / 2)
+    downside = math.sqrt(0.1 ** 2 / 3)  # Only the -10% day is below target
+    assert metrics.volatility(EQUITY, PERIODS) == pytest.approx(std * math.sqrt(3) * 100)
+    assert metrics.sharpe(EQUITY, periods_per_year=PERIODS) == pytest.approx(mean / std * math.sqrt(3))
+    assert metrics.sortino(EQUITY, periods_per_year=PERIODS) == pytest.approx(mean / downside * math.sqrt(3))
+    assert metrics.sharpe(EQUITY, periods_per_year=PERIODS) == pytest.approx(0.7887230)
+    assert metrics.sortino(EQUITY, periods_per_year=PERIODS) == pytest.approx(2.2222222)
+
+
+def test_drawdowns_and_calmar():
+    np.testing.assert_allclose(metrics.drawdown(EQUITY), [0, 0, -0.1, 0], atol=1e-12)
+    assert metrics.max_drawdown(EQUITY) == pytest.approx(-10.0)
+    assert metrics.max_drawdown_duration(EQUITY) == 1
+    assert metrics.max_drawdown_duration([100, 90, 80, 95, 101, 99]) == 3
+    assert metrics.calmar(EQUITY, periods_per_year=PERIODS) == pytest.approx(2.1)
+
+
+def test_trade_metrics():
+    assert metrics.profit_factor([30, -10, 20, -5]) == pytest.approx(50 / 15)
+    assert metrics.win_rate([30, -10, 20, -5]) == pytest.approx(50.0)
+    assert metrics.profit_factor([5, 10]) == np.inf
+    assert metrics.exposure([0, 50, 100], [100, 100, 100]) == pytest.approx(50.0)
+    assert metrics.turnover(600, [100, 100, 100], periods_per_year=3) == pytest.approx(3.0)
+
+
+def test_rows_of_a_stack_match_single_curves():
+    curves = [EQUITY, [100.0, 95.0, 97.0], [100.0, 101.0, 103.0, 102.0, 108.0]]
+    equity = metrics.stack(curves)
+    assert np.isnan(equity[1, 3:]).all()  # Shorter curves are NaN-padded at the end
+    for name, fn in metrics.RANKING_METRICS.items():
+        batch = fn(equity)
+        for i, curve in enumerate(curves):
+            np.testing.assert_allclose(batch[i], fn(curve), err_msg=name)
+
+
+def test_rank_puts_undefined_scores_last():
+    equity = metrics.stack([[100.0, 100.0, 100.0], [100.0, 90.0, 95.0], [100.0, 104.0, 110.0]])
+    order, scores = metrics.rank(equity, 'sharpe')
+    assert order.tolist() == [2, 1, 0]
+    assert np.isnan(scores[0])
+
+
+def test_flat_curve():
+    summary = metrics.summary([100.0, 100.0, 100.0])
+    assert summary['return_pct'] == 0
+    assert summary['volatility_pct'] == 0
+    assert summary['max_drawdown_pct'] == 0
+    assert summary['max_drawdown_days'] == 0
+    for name in ('sharpe', 'sortino', 'calmar'):
+        assert np.isnan(summary[name]), name
+        assert metrics.scalar(summary[name]) is None
+
+
+def test_single_point():
+    summary = metrics.summary([100.0])
+    assert summary['final_value'] == 100
+    assert summary['return_pct'] == 0
+    assert summary['max_drawdown_pct'] == 0
+    assert summary['max_drawdown_days'] == 0
+    for name in ('cagr_pct', 'volatility_pct', 'sharpe', 'sortino', 'calmar'):
+        assert np.isnan(summary[name]), name
+
+
+def test_zero_trades():
+    assert np.isnan(metrics.profit_factor([]))
+    assert np.isnan(metrics.win_rate([]))
+    assert metrics.scalar(metrics.profit_factor([])) is None
+    assert metrics.scalar(metrics.profit_factor([5.0])) is None  # inf is not JSON either
+    summary = metrics.summary([100.0, 101.0], pnl=[])
+    assert np.isnan(summary['profit_factor']) and np.isnan(summary['win_rate'])
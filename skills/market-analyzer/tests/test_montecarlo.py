@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+import montecarlo
+
+PNL = [120.0, -80.0, 45.0, 200.0, -150.0, 60.0, -20.0, 90.0]
+
+
+def test_fixed_seed_is_reproducible():
+    a = montecarlo.from_trades(PNL, 10000, n_paths=500, seed=7)
+    b = montecarlo.from_trades(PNL, 10000, n_paths=500, seed=7)
+    assert a == b
+    assert montecarlo.from_trades(PNL, 10000, n_paths=500, seed=8) != a
+
+    equity = 10000 * np.cumprod(1 + np.random.default_rng(0).normal(0, 0.01, 300))
+    a = montecarlo.from_equity(equity, 10000, n_paths=300, seed=3)
+    assert a == montecarlo.from_equity(equity, 10000, n_paths=300, seed=3)
+    assert a['method'] == 'block' and a['paths'] == 300
+
+
+def test_chunked_paths_match_one_pass(monkeypatch):
+    returns = np.random.default_rng(1).normal(0, 0.01, 50)
+    whole = montecarlo.block_bootstrap(returns, n_paths=40, block=5, seed=11)
+    monkeypatch.setattr(montecarlo, 'PATH_CHUNK_CELLS', 50 * 3)  # 3 paths per slice
+    sliced = montecarlo.block_bootstrap(returns, n_paths=40, block=5, seed=11)
+    # Slices consume one generator in turn: memory bounding does not change the outcomes
+    np.testing.assert_array_equal(sliced['return_pct'], whole['return_pct'])
+    np.testing.assert_array_equal(sliced['max_drawdown_pct'], whole['max_drawdown_pct'])
+
+
+def test_identical_trades_give_one_outcome():
+    # Every resampled path is the same 5 trades of +10%: no dispersion, no drawdown
+    outcomes = montecarlo.bootstrap_trades([0.1] * 5, n_paths=200, seed=0)
+    np.testing.assert_allclose(outcomes['return_pct'], (1.1 ** 5 - 1) * 100)
+    np.testing.assert_allclose(outcomes['max_drawdown_pct'], 0)
+
+
+def test_trade_returns_are_relative_to_equity_before_each_trade():
+    # +1000 on 10000 then +1100 on 11000: both trades are +10%
+    mc = montecarlo.from_trades([1000.0, 1100.0], 10000, n_paths=100, seed=0)
+    assert mc['return_pct']['low'] == pytest.approx(21.0)
+    assert mc['return_pct']['high'] == pytest.approx(21.0)
+    assert mc['prob_loss_pct'] == 0
+
+
+def test_block_bootstrap_of_constant_returns():
+    # Whatever blocks are drawn, 10 days of +1% compound to the same path
+    outcomes = montecarlo.block_bootstrap([0.01] * 10, n_paths=20, block=4, seed=5)
+    np.testing.assert_allclose(outcomes['return_pct'], (1.01 ** 10 - 1) * 100)
+    # A block longer than the history is clamped to it
+    assert len(montecarlo.block_bootstrap([0.01] * 10, n_paths=3, block=50, seed=5)['return_pct']) == 3
+
+
+def test_confidence_interval():
+    ci = montecarlo.confidence_interval(np.arange(101), confidence=0.90)
+    assert ci == pytest.approx({'low': 5.0, 'median': 50.0, 'high': 95.0, 'mean': 50.0})
+
+
+def test_degenerate_inputs():
+    assert montecarlo.from_trades([], 10000) is None        # Zero trades
+    assert montecarlo.from_trades([50.0], 10000) is None    # A single trade has no ordering
+    assert montecarlo.from_trades(PNL, 10000, n_paths=0) is None
+    assert montecarlo.from_equity([], 10000) is None
+    assert montecarlo.from_equity([10000.0], 10000) is None  # Single point
+    flat = montecarlo.from_equity([10000.0] * 30, 10000, n_paths=100, seed=0)
+    assert flat['return_pct'] == {'low': 0.0, 'median': 0.0, 'high': 0.0, 'mean': 0.0}
+    assert flat['max_drawdown_pct']['low'] == 0
+    assert flat['prob_loss_pct'] == 0
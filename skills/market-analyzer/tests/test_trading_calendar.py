@@ -0,0 +1,104 @@
+from datetime import date, datetime
+
+import pandas as pd
+import pytest
+
+import trading_calendar as tc
+from data_cache import DataCache
+from data_provider import DataProvider
+
+
+@pytest.mark.parametrize('year, count', [
+    (2019, 252), (2020, 253), (2021, 252), (2022, 251), (2023, 250), (2024, 252), (2025, 250),
+])
+def test_sessions_per_year(year, count):
+    assert len(tc.sessions(date(year, 1, 1), date(year, 12, 31))) == count
+    assert tc.count_sessions(date(year, 1, 1), date(year, 12, 31)) == count
+
+
+@pytest.mark.parametrize('day', [
+    date(2021, 7, 5),    # Independence Day on a Sunday, observed Monday
+    date(2021, 12, 24),  # Christmas on a Saturday, observed Friday
+    date(2022, 6, 20),   # Juneteenth on a Sunday, observed Monday
+    date(2022, 12, 26),  # Christmas on a Sunday, observed Monday
+    date(2027, 6, 18),   # Juneteenth on a Saturday, observed Friday
+    date(2024, 3, 29),   # Good Friday
+    date(2025, 4, 18),   # Good Friday
+    date(2025, 1, 9),    # Special closure (national day of mourning)
+])
+def test_observed_and_special_holidays_are_closed(day):
+    assert not tc.is_session(day)
+    assert tc.session_hours(day) is None
+
+
+def test_saturday_new_year_is_not_observed_in_previous_year():
+    assert tc.is_session(date(2021, 12, 31))  # 2022-01-01 is a Saturday
+    assert tc.is_session(date(2022, 6, 17))   # Before Juneteenth 2022 (Sunday)
+    assert tc.is_session(date(2021, 6, 18))   # Juneteenth only from 2022
+
+
+def test_half_days():
+    assert tc.half_days(2024) == {date(2024, 7, 3), date(2024, 11, 29), date(2024, 12, 24)}
+    # 2021-12-24 is the observed Christmas holiday, 2022-07-03 a Sunday
+    assert date(2021, 12, 24) not in tc.half_days(2021)
+    assert date(2022, 7, 3) not in tc.half_days(2022)
+    _, close = tc.session_hours(date(2024, 11, 29))
+    assert close.time() == tc.EARLY_CLOSE
+    _, close = tc.session_hours(date(2024, 11, 27))
+    assert close.time() == tc.CLOSE
+
+
+def test_year_rollover():
+    assert tc.next_session(date(2024, 12, 31)) == date(2025, 1, 2)
+    assert tc.last_session(date(2025, 1, 1)) == date(2024, 12, 31)
+    assert tc.previous_session(date(2025, 1, 2)) == date(2024, 12, 31)
+    assert tc.last_session(datetime(2024, 12, 31, 18)) == date(2024, 12, 31)
+    assert tc.sessions(date(2024, 12, 30), date(2025, 1, 3)) == [
+        date(2024, 12, 30), date(2024, 12, 31), date(2025, 1, 2), date(2025, 1, 3)]
+
+
+def test_count_sessions_empty_and_holiday_only_ranges():
+    assert tc.count_sessions(date(2024, 12, 31), date(2024, 12, 1)) == 0  # Reversed range
+    assert tc.count_sessions(date(2024, 12, 25), date(2024, 12, 25)) == 0  # Christmas
+    assert tc.count_sessions(date(2024, 12, 28), date(2024, 12, 29)) == 0  # Weekend
+    assert tc.count_sessions(date(2024, 3, 29), date(2024, 3, 31)) == 0    # Good Friday + weekend
+
+
+class CountingProvider(DataProvider):
+    """Records downloads; returns one bar per session of the requested range"""
+    name = 'test'
+
+    def __init__(self):
+        self.calls = []
+
+    def history(self, ticker, start=None, end=None, period=None):
+        self.calls.append((ticker, start, end))
+        days = pd.DatetimeIndex([d for d in tc.sessions(start, end) if d < end.date()])
+        return pd.DataFrame({'Open': 1.0, 'High': 1.0, 'Low': 1.0, 'Close': 1.0, 'Volume': 100}, index=days)
+
+    def info(self, ticker):
+        return {}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DataCache(str(tmp_path / 'cache.db'), provider=CountingProvider())
+
+
+def test_holiday_only_range_does_not_fetch(cache):
+    assert cache.fetch_and_cache('AAA', datetime(2024, 12, 25), datetime(2024, 12, 25))
+    assert cache.fetch_and_cache('AAA', datetime(2024, 3, 29), datetime(2024, 3, 31))
+    assert cache.get_cached_data('AAA', datetime(2024, 12, 28), datetime(2024, 12, 29)).empty
+    assert cache.provider.calls == []
+
+
+def test_covered_range_is_not_fetched_again(cache):
+    assert cache.fetch_and_cache('AAA', datetime(2024, 1, 2), datetime(2024, 6, 28))
+    assert len(cache.provider.calls) == 1
+    # Every session of the range is cached: the coverage check is a hit
+    assert cache.fetch_and_cache('AAA', datetime(2024, 1, 2), datetime(2024, 6, 28))
+    assert cache.fetch_and_cache('AAA', datetime(2024, 3, 1), datetime(2024, 3, 31))
+    assert len(cache.provider.calls) == 1
+    # A range reaching past the cached data is downloaded
+    assert cache.fetch_and_cache('AAA', datetime(2024, 6, 1), datetime(2024, 8, 30))
+    assert len(cache.provider.calls) == 2
@@ -0,0 +1,90 @@
+import contextlib
+from datetime import datetime, timedelta
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from walkforward import make_folds, _evaluate, _attach, _SHARED
+
+SETTINGS = {'initial_capital': 10000, 'position_size': 0.2, 'intrabar': False}
+PARAMS = {'buy_threshold': 6.0, 'sell_threshold': 4.0, 'stop_loss': 0.05, 'take_profit': 0.10}
+
+
+@pytest.mark.parametrize('n_bars, train, test, step, start', [
+    (1000, 504, 126, None, 200), (1000, 100, 50, 25, 0), (830, 504, 126, None, 200),
+    (829, 504, 126, None, 200), (300, 100, 100, 7, 13),
+])
+def test_make_folds_bounds(n_bars, train, test, step, start):
+    folds = make_folds(n_bars, train, test, step, start)
+    step = step or test
+    expected = len(range(start, n_bars - train - test + 1, step))
+    assert len(folds) == expected
+    for k, (train_lo, train_hi, test_hi) in enumerate(folds):
+        assert train_lo == start + k * step
+        assert train_hi - train_lo == train and test_hi - train_hi == test
+        assert test_hi <= n_bars
+
+
+def test_make_folds_too_short_or_exact():
+    assert make_folds(829, 504, 126, start=200) == []
+    assert make_folds(830, 504, 126, start=200) == [(200, 704, 830)]
+    assert make_folds(0, 504, 126) == []
+
+
+def panel(n_bars, n_tickers, seed=0):
+    """(len(ARRAYS), bars, tickers) block of random prices and scores that trigger trades"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.02, (n_bars, n_tickers)), axis=0)
+    score = np.clip(5 + np.cumsum(rng.normal(0, 0.8, (n_bars, n_tickers)), axis=0) % 6 - 1, 0, 10)
+    data = np.stack([close, close * 1.01, close * 0.99, close, score])
+    dates = np.array([datetime(2020, 1, 1) + timedelta(days=i) for i in range(n_bars)])
+    return data, dates
+
+
+@contextlib.contextmanager
+def shared(data):
+    """Put `data` in a shared-memory block and attach it in-process, as WalkForward.run does"""
+    block = shared_memory.SharedMemory(create=True, size=data.nbytes)
+    try:
+        np.ndarray(data.shape, dtype=np.float64, buffer=block.buf)[:] = data
+        _attach(block.name, data.shape, SETTINGS)
+        try:
+            yield
+        finally:
+            _SHARED.pop('data')
+            _SHARED.pop('block').close()
+    finally:
+        block.close()
+        block.unlink()
+
+
+def test_evaluate_skips_leading_nans_of_a_late_ticker():
+    data, dates = panel(300, 2)
+    late = 60
+    gapped = data.copy()
+    gapped[:, :late, 1] = np.nan  # Ticker 1 is listed from bar 60 on
+
+    with shared(gapped):
+        both = _evaluate(PARAMS, 0, 300, dates)
+        early_only = _evaluate(PARAMS, 0, late, dates)  # Ticker 1 has no bar there
+    with shared(data[:, late:, 1:]):
+        alone = _evaluate(PARAMS, 0, 300 - late, dates[late:])
+    with shared(data[:, :, :1]):
+        first = _evaluate(PARAMS, 0, 300, dates)
+        first_early = _evaluate(PARAMS, 0, late, dates)
+
+    assert alone['num_trades'] > 0 and first['num_trades'] > 0
+    assert np.isfinite(both['return_pct'])
+    # Ticker 1 is evaluated on its own bars only: same as a panel holding just those bars
+    assert both['num_trades'] == first['num_trades'] + alone['num_trades']
+    assert both['return_pct'] == pytest.approx((first['return_pct'] + alone['return_pct']) / 2)
+    # A window before the listing ignores the ticker instead of averaging in a NaN or a zero
+    assert early_only == first_early
+
+
+def test_evaluate_window_with_no_data():
+    data, dates = panel(50, 1)
+    data[:] = np.nan
+    with shared(data):
+        assert _evaluate(PARAMS, 0, 50, dates) == {'return_pct': 0.0, 'num_trades': 0, 'win_rate': 0.0}